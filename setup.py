@@ -33,6 +33,9 @@ setup_args = {
     'install_requires': [
         'pynwb>=1.3.0'
     ],
+    'entry_points': {
+        'console_scripts': ['ndx-genotype=ndx_genotype.cli:main'],
+    },
     'packages': find_packages('src/pynwb'),
     'package_dir': {'': 'src/pynwb'},
     'package_data': {'ndx_genotype': [
@@ -24,3 +24,23 @@ load_namespaces(ndx_genotype_specpath)
 
 from .genotypes_table import GenotypesTable, AllelesTable  # noqa: F401,E402
 from .genotype_subject import GenotypeSubject  # noqa: F401,E402
+from . import io as __io  # noqa: F401,E402
+from .bitmap import GenotypeBitmap, SubjectSet  # noqa: F401,E402
+from .snapshot import GenotypesSnapshot, AllelesSnapshot  # noqa: F401,E402
+from .shared_store import GenotypeStore, write_genotype_store  # noqa: F401,E402
+from .importers import ImportProgress, import_tabular_genotypes, import_vcf_genotypes  # noqa: F401,E402
+from .resource_cache import ResourceCache, ResourceRecord  # noqa: F401,E402
+from .diff import GenotypesChangeset, diff_genotypes_tables  # noqa: F401,E402
+from .reader import SubjectGenotypes, read_genotype_subject, read_genotype_subjects  # noqa: F401,E402
+from .genotype_parser import (ParsedGenotypes, parse_genotype_strings,  # noqa: F401,E402
+                              add_genotypes_tables_from_strings)
+from .summary import GenotypesSummary, read_genotypes_summary, genotypes_may_match  # noqa: F401,E402
+from .streaming import alleles_table_from_iterators, genotypes_table_from_iterators  # noqa: F401,E402
+from .stats import GenotypeStatistics  # noqa: F401,E402
+from .cross import CrossPrediction, predict_cross, predict_crosses  # noqa: F401,E402
+from .similarity import MinHashIndex  # noqa: F401,E402
+from .catalogue import (AlleleCatalogue, write_allele_catalogue, open_allele_catalogue,  # noqa: F401,E402
+                        close_allele_catalogues)
+from .serialization import to_bytes, from_bytes  # noqa: F401,E402
+from .server import GenotypeQueryServer, GenotypeQueryClient, run_load_test  # noqa: F401,E402
+from .symbol_index import SymbolIndex, normalize_symbol  # noqa: F401,E402
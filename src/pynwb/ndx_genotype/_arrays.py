@@ -0,0 +1,74 @@
+"""Helpers for reading the columns of genotype tables as NumPy arrays.
+
+These work on both in-memory tables and tables read lazily from a file, where column data are h5py datasets.
+"""
+import numpy as np
+from hdmf.data_utils import DataIO
+
+
+def _unwrap(data):
+    """Return the data wrapped by a DataIO, e.g., H5DataIO, or the given data."""
+    return data.data if isinstance(data, DataIO) else data
+
+
+def decode_strings(values):
+    """Return the given text values as a 1D NumPy array of str objects, decoding bytes if necessary."""
+    values = _unwrap(values)
+    arr = np.asarray(values[:] if hasattr(values, 'shape') else values, dtype=object)
+    if arr.size and isinstance(arr.flat[0], bytes):
+        arr = np.array([v.decode('utf-8') for v in arr], dtype=object)
+    return arr.reshape(-1)
+
+
+def column_values(table, name):
+    """Return the data of the column with the given name as a NumPy array, or None if the column does not exist."""
+    if name not in table:
+        return None
+    data = _unwrap(table[name].data)
+    return np.asarray(data[:] if hasattr(data, 'shape') else data)
+
+
+def ids(table):
+    """Return the row IDs of the given table as an int64 NumPy array."""
+    data = _unwrap(table.id.data)
+    return np.asarray(data[:] if hasattr(data, 'shape') else data, dtype=np.int64)
+
+
+def allele_symbols(alleles_table):
+    """Return the symbols of the given AllelesTable as a NumPy array of str objects."""
+    return decode_strings(alleles_table['symbol'].data)
+
+
+def loci(genotypes_table):
+    """Return the loci of the given GenotypesTable as a NumPy array of str objects."""
+    if len(genotypes_table) == 0:
+        return np.empty(0, dtype=object)
+    return decode_strings(genotypes_table['locus'].data)
+
+
+def allele_indices(genotypes_table):
+    """
+    Return the allele1, allele2 and allele3 indices of the given GenotypesTable as an (n, 3) int64 array.
+
+    Missing alleles, i.e., allele3 when the table has no allele3 column, are set to -1.
+    """
+    ret = np.full((len(genotypes_table), 3), -1, dtype=np.int64)
+    for i, name in enumerate(('allele1', 'allele2', 'allele3')):
+        values = column_values(genotypes_table, name)
+        if values is not None:
+            ret[:, i] = values
+    return ret
+
+
+def ragged_column(table, name):
+    """
+    Return the values and the end offsets of the indexed column with the given name as a tuple of NumPy arrays, or
+    None if the column does not exist. The values of row i are values[offsets[i-1]:offsets[i]].
+    """
+    if name not in table:
+        return None
+    index = table[name]
+    values = decode_strings(index.target.data)
+    data = _unwrap(index.data)
+    offsets = np.asarray(data[:] if hasattr(data, 'shape') else data, dtype=np.int64)
+    return values, offsets
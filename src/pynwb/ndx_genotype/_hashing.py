@@ -0,0 +1,40 @@
+"""
+Hashes of the contents of genotypes tables, for matching rows between versions of a table and for summaries.
+
+Rows are hashed by their locus and allele symbols, computed for all rows at once with pandas, so the hash does not
+depend on the order of the alleles in the alleles table.
+"""
+import numpy as np
+import pandas as pd
+
+from . import _arrays
+
+
+ALLELE_COLUMNS = ('allele1', 'allele2', 'allele3')
+
+
+def _genotype_frame(genotypes_table):
+    """Return the loci and allele symbols of the table as a DataFrame, with None for missing alleles."""
+    symbols = np.append(_arrays.allele_symbols(genotypes_table.alleles_table), None)
+    indices = _arrays.allele_indices(genotypes_table)  # -1 for missing alleles selects the trailing None
+    frame = pd.DataFrame({name: symbols[indices[:, i]] for i, name in enumerate(ALLELE_COLUMNS)})
+    frame.insert(0, 'locus', _arrays.loci(genotypes_table))
+    return frame
+
+
+def _hashes(frame):
+    """
+    Return the hash of each row of a genotype frame, and the hash of the locus and its occurrence number of each row.
+    The occurrence number distinguishes rows with the same locus, which are matched in order.
+    """
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    occurrence = frame.groupby('locus', sort=False).cumcount()
+    locus_hashes = pd.util.hash_pandas_object(pd.DataFrame({'locus': frame['locus'], 'occurrence': occurrence}),
+                                              index=False).to_numpy()
+    return row_hashes, locus_hashes
+
+
+def _table_hash(row_hashes):
+    """Return a hash of the contents of a table from the hashes of its rows, as a hex string."""
+    order = np.arange(1, len(row_hashes) + 1, dtype=np.uint64)
+    return '%016x%08x' % (int(np.bitwise_xor.reduce(row_hashes * order, initial=np.uint64(0))), len(row_hashes))
@@ -0,0 +1,125 @@
+"""
+Buffers of rows added one at a time to the tables of this extension.
+
+AllelesTable.add_allele and GenotypesTable.add_genotype append rows to a RowBuffer instead of to the columns of the
+table. The rows are stored in typed NumPy arrays that double their capacity as needed: strings as codes into a list
+of distinct strings, region indices as integers, and the values of ragged columns with their end offsets. The buffer
+is written to the columns of the table in one bulk extend the first time the table is read or written.
+"""
+import numpy as np
+
+
+class GrowableArray:
+    """A 1D NumPy array that is appended to one value at a time, doubling its capacity when it is full."""
+
+    def __init__(self, dtype, capacity=16):
+        self.__data = np.empty(capacity, dtype=dtype)
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def append(self, value):
+        if self.__size == len(self.__data):
+            data = np.empty(2 * len(self.__data), dtype=self.__data.dtype)
+            data[:self.__size] = self.__data
+            self.__data = data
+        self.__data[self.__size] = value
+        self.__size += 1
+
+    @property
+    def values(self):
+        """The values appended so far, as a view of the underlying array."""
+        return self.__data[:self.__size]
+
+
+class StringCodes:
+    """Strings stored as integer codes into the list of distinct strings."""
+
+    def __init__(self):
+        self.__codes = GrowableArray(np.int32)
+        self.__strings = list()
+        self.__index = dict()
+
+    def __len__(self):
+        return len(self.__codes)
+
+    def append(self, value):
+        code = self.__index.get(value)
+        if code is None:
+            code = self.__index[value] = len(self.__strings)
+            self.__strings.append(value)
+        self.__codes.append(code)
+
+    def tolist(self):
+        """Return the strings appended so far as a list."""
+        return np.array(self.__strings, dtype=object)[self.__codes.values].tolist()
+
+
+class RaggedStringCodes:
+    """Lists of strings stored as the codes of all strings and the end offset of each list."""
+
+    def __init__(self):
+        self.__values = StringCodes()
+        self.__offsets = GrowableArray(np.int64)
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def append(self, values):
+        for value in values:
+            self.__values.append(value)
+        self.__offsets.append(len(self.__values))
+
+    def tolist(self):
+        """Return the lists appended so far as a list of lists."""
+        values = self.__values.tolist()
+        starts = np.concatenate(([0], self.__offsets.values[:-1]))
+        return [values[start:end] for start, end in zip(starts.tolist(), self.__offsets.values.tolist())]
+
+
+class Integers:
+    """Integers, e.g., indices into the rows of another table, stored in a GrowableArray."""
+
+    def __init__(self):
+        self.__values = GrowableArray(np.int64)
+
+    def __len__(self):
+        return len(self.__values)
+
+    def append(self, value):
+        self.__values.append(value)
+
+    def tolist(self):
+        return self.__values.values.tolist()
+
+
+class RowBuffer:
+    """
+    Rows with the same columns, appended one at a time. Use take to get the values of each column of the rows and
+    empty the buffer.
+    """
+
+    def __init__(self, columns):
+        self.__types = dict(columns)  # the type of buffer of each column, by name
+        self.__columns = None
+
+    def __len__(self):
+        return 0 if self.__columns is None else len(next(iter(self.__columns.values())))
+
+    @property
+    def colnames(self):
+        """The names of the columns of the rows in the buffer, or None if the buffer is empty."""
+        return None if self.__columns is None else tuple(self.__columns)
+
+    def append(self, row):
+        """Append a row, given as a dict of the values of each column. All rows must have the same columns."""
+        if self.__columns is None:
+            self.__columns = {name: self.__types[name]() for name in row}
+        for name, column in self.__columns.items():
+            column.append(row[name])
+
+    def take(self):
+        """Return the values of each column of the rows in the buffer as a dict of lists, and empty the buffer."""
+        columns, self.__columns = self.__columns, None
+        return dict() if columns is None else {name: column.tolist() for name, column in columns.items()}
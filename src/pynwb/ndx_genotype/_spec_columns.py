@@ -0,0 +1,92 @@
+"""
+Column definitions for the tables of this extension.
+
+This file is generated from spec/ndx-genotype.extensions.yaml by src/spec/create_columns_module.py. Do not edit it
+by hand; edit src/spec/create_extension_spec.py and regenerate the spec and this file instead.
+"""
+
+
+ALLELES_TABLE_COLUMNS = (
+    {
+        'name': 'symbol',
+        'description': 'Symbol/name of the allele',
+        'required': True,
+    },
+    {
+        'name': 'recombinase',
+        'description': ('An enzyme that mediates a recombination exchange reaction between two DNA templates, each '
+                        'containing a specific recognition site.'),
+        'required': False,
+        'index': True,
+    },
+    {
+        'name': 'reporter',
+        'description': ('Sequence that forms all or part of the protein product encoded by a transgenic locus or '
+                        'modified endogenous locus and that encodes an enzyme whose activity can be used to detect '
+                        'the presence of that protein product.'),
+        'required': False,
+        'index': True,
+    },
+    {
+        'name': 'promoter',
+        'description': 'A DNA sequence at which RNA polymerase binds and initiates transcription.',
+        'required': False,
+        'index': True,
+    },
+    {
+        'name': 'recombinase_recognition_site',
+        'description': ('Site where recombination occurs mediated by a specific recombinase, leading to integration, '
+                        'deletion or inversion of a DNA fragment.'),
+        'required': False,
+        'index': True,
+    },
+)
+
+GENOTYPES_TABLE_COLUMNS = (
+    {
+        'name': 'locus',
+        'description': 'Symbol/name of the locus, e.g., Rorb.',
+        'required': True,
+    },
+    {
+        'name': 'allele1',
+        'description': ('The first allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                        'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another '
+                        'file.'),
+        'required': True,
+        'table': True,
+    },
+    {
+        'name': 'allele2',
+        'description': ('The second allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                        'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another '
+                        'file.'),
+        'required': True,
+        'table': True,
+    },
+    {
+        'name': 'allele3',
+        'description': ('The third allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                        'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another '
+                        'file.'),
+        'required': False,
+        'table': True,
+    },
+)
+
+# Python types of the values of each column, used to validate rows added in bulk
+COLUMN_DTYPES = {
+    'AllelesTable': {
+        'symbol': str,
+        'recombinase': str,
+        'reporter': str,
+        'promoter': str,
+        'recombinase_recognition_site': str,
+    },
+    'GenotypesTable': {
+        'locus': str,
+        'allele1': int,
+        'allele2': int,
+        'allele3': int,
+    },
+}
@@ -0,0 +1,216 @@
+from collections import Counter
+
+import numpy as np
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .genotype_subject import GenotypeSubject
+
+
+# number of set bits for every possible byte value, used to count the bits in packed bit vectors
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class SubjectSet:
+    """
+    A set of subjects of a GenotypeBitmap, stored as a packed bit vector with one bit per subject.
+
+    SubjectSets of the same GenotypeBitmap support the set operators ``&``, ``|``, ``^``, ``-`` and ``~``.
+    """
+
+    __slots__ = ('bitmap', 'bits')
+
+    def __init__(self, bitmap, bits):
+        self.bitmap = bitmap
+        self.bits = bits
+
+    def __check_other(self, other):
+        if not isinstance(other, SubjectSet) or other.bitmap is not self.bitmap:
+            raise ValueError("Set operations are only supported between SubjectSets of the same GenotypeBitmap.")
+
+    def __and__(self, other):
+        self.__check_other(other)
+        return SubjectSet(self.bitmap, self.bits & other.bits)
+
+    def __or__(self, other):
+        self.__check_other(other)
+        return SubjectSet(self.bitmap, self.bits | other.bits)
+
+    def __xor__(self, other):
+        self.__check_other(other)
+        return SubjectSet(self.bitmap, self.bits ^ other.bits)
+
+    def __sub__(self, other):
+        self.__check_other(other)
+        return SubjectSet(self.bitmap, self.bits & ~other.bits)
+
+    def __invert__(self):
+        # clear the padding bits past the last subject so that they are never counted
+        return SubjectSet(self.bitmap, ~self.bits & self.bitmap._mask)
+
+    def __eq__(self, other):
+        return (isinstance(other, SubjectSet) and other.bitmap is self.bitmap and
+                np.array_equal(self.bits, other.bits))
+
+    def __len__(self):
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def __contains__(self, subject_id):
+        index = self.bitmap.get_subject_index(subject_id)
+        return index is not None and bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __iter__(self):
+        return iter(self.bitmap.subject_ids[self.indices].tolist())
+
+    def __repr__(self):
+        return '%s(%d of %d subjects)' % (self.__class__.__name__, len(self), self.bitmap.num_subjects)
+
+    @property
+    def indices(self):
+        """The positions of the subjects in this set along the subject axis of the bitmap."""
+        unpacked = np.unpackbits(self.bits, count=self.bitmap.num_subjects, bitorder='little')
+        return np.flatnonzero(unpacked)
+
+    def count(self):
+        """Return the number of subjects in this set."""
+        return len(self)
+
+
+class GenotypeBitmap:
+    """
+    A bitmap of subjects by features, where a feature is either an allele symbol or a locus.
+
+    Each feature is stored as a packed bit vector over the subjects, so that selecting subjects by the presence or
+    absence of alleles or loci is done with bitwise operations on whole arrays instead of loops over tables.
+    """
+
+    __features_by = ('allele', 'locus')
+
+    def __init__(self, subject_ids, features, bits, by='allele'):
+        if by not in self.__features_by:
+            raise ValueError("'by' must be one of %s, got '%s'." % (self.__features_by, by))
+        self.subject_ids = np.asarray(subject_ids, dtype=object)
+        self.features = np.asarray(features, dtype=object)
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.by = by
+        num_bytes = (len(self.subject_ids) + 7) // 8
+        if self.bits.shape != (len(self.features), num_bytes):
+            raise ValueError("'bits' must have shape %s for %d features and %d subjects, got %s."
+                             % ((len(self.features), num_bytes), len(self.features), len(self.subject_ids),
+                                self.bits.shape))
+        self._mask = np.packbits(np.ones(len(self.subject_ids), dtype=bool), bitorder='little')
+        self.__feature_index = {f: i for i, f in enumerate(self.features.tolist())}
+        self.__subject_index = {s: i for i, s in enumerate(self.subject_ids.tolist())}
+        if len(self.__subject_index) != len(self.subject_ids):
+            duplicates = [s for s, n in Counter(self.subject_ids.tolist()).items() if n > 1]
+            raise ValueError("'subject_ids' must be unique, got duplicate IDs %s." % duplicates)
+
+    @property
+    def num_subjects(self):
+        return len(self.subject_ids)
+
+    @classmethod
+    @docval({'name': 'genotypes_tables', 'type': (list, tuple), 'doc': 'The GenotypesTables, one per subject.'},
+            {'name': 'subject_ids', 'type': (list, tuple, np.ndarray),
+             'doc': 'The ID of the subject of each table. Defaults to the position of the table in the list.',
+             'default': None},
+            {'name': 'by', 'type': str, 'doc': "The features of the bitmap, either 'allele' or 'locus'.",
+             'default': 'allele'})
+    def from_genotypes_tables(cls, **kwargs):
+        """Build a GenotypeBitmap from the contents of the given GenotypesTables."""
+        tables, subject_ids, by = getargs('genotypes_tables', 'subject_ids', 'by', kwargs)
+        if subject_ids is None:
+            subject_ids = list(range(len(tables)))
+        if len(subject_ids) != len(tables):
+            raise ValueError("'subject_ids' must have the same length as 'genotypes_tables'.")
+        values = list()
+        for table in tables:
+            if by == 'locus':
+                values.append(_arrays.loci(table))
+            else:
+                indices = _arrays.allele_indices(table)
+                symbols = _arrays.allele_symbols(table.alleles_table)
+                values.append(symbols[indices[indices >= 0]])
+        lengths = np.array([len(v) for v in values], dtype=np.int64)
+        subjects = np.repeat(np.arange(len(tables), dtype=np.int64), lengths)
+        if len(subjects):
+            features, codes = np.unique(np.concatenate(values).astype(str), return_inverse=True)
+        else:
+            features, codes = np.empty(0, dtype=str), np.empty(0, dtype=np.int64)
+        bits = np.zeros((len(features), (len(tables) + 7) // 8), dtype=np.uint8)
+        np.bitwise_or.at(bits, (codes.reshape(-1), subjects >> 3), (1 << (subjects & 7)).astype(np.uint8))
+        return cls(subject_ids, features.astype(object), bits, by=by)
+
+    @classmethod
+    @docval({'name': 'subjects', 'type': (list, tuple), 'doc': 'The GenotypeSubjects to index.'},
+            {'name': 'by', 'type': str, 'doc': "The features of the bitmap, either 'allele' or 'locus'.",
+             'default': 'allele'})
+    def from_genotype_subjects(cls, **kwargs):
+        """Build a GenotypeBitmap from the GenotypesTables of the given GenotypeSubjects, keyed by subject_id."""
+        subjects, by = getargs('subjects', 'by', kwargs)
+        for subject in subjects:
+            if not isinstance(subject, GenotypeSubject) or subject.genotypes_table is None:
+                raise ValueError("All subjects must be GenotypeSubjects with a GenotypesTable.")
+        return cls.from_genotypes_tables(
+            genotypes_tables=[s.genotypes_table for s in subjects],
+            subject_ids=[s.subject_id for s in subjects],
+            by=by,
+        )
+
+    def get_subject_index(self, subject_id):
+        """Return the position of the subject with the given ID along the subject axis, or None if not found."""
+        return self.__subject_index.get(subject_id)
+
+    def subjects_with(self, feature):
+        """Return the SubjectSet of subjects that have the given allele symbol or locus."""
+        index = self.__feature_index.get(feature)
+        if index is None:
+            return self.none()
+        return SubjectSet(self, self.bits[index].copy())
+
+    def all(self):
+        """Return the SubjectSet of all subjects."""
+        return SubjectSet(self, self._mask.copy())
+
+    def none(self):
+        """Return the empty SubjectSet."""
+        return SubjectSet(self, np.zeros_like(self._mask))
+
+    def query(self, all_of=(), any_of=(), none_of=()):
+        """
+        Return the SubjectSet of subjects that have all of the features in *all_of*, at least one of the features
+        in *any_of* (if given), and none of the features in *none_of*.
+        """
+        ret = self.all()
+        for feature in all_of:
+            ret &= self.subjects_with(feature)
+        if any_of:
+            selected = self.none()
+            for feature in any_of:
+                selected |= self.subjects_with(feature)
+            ret &= selected
+        for feature in none_of:
+            ret -= self.subjects_with(feature)
+        return ret
+
+    def counts(self):
+        """Return a dict mapping each feature to the number of subjects that have it."""
+        counts = _POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+        return dict(zip(self.features.tolist(), counts.tolist()))
+
+    def save(self, path):
+        """Save this bitmap to the given path as a NumPy .npz file."""
+        np.savez_compressed(
+            path,
+            subject_ids=np.asarray(self.subject_ids.tolist()),
+            features=self.features.astype(str),
+            bits=self.bits,
+            by=np.array(self.by),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a bitmap saved with GenotypeBitmap.save."""
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f['subject_ids'].astype(object), f['features'].astype(object), f['bits'], by=str(f['by']))
@@ -0,0 +1,130 @@
+"""
+A shared allele catalogue, i.e., one AllelesTable in its own HDF5 file that the genotypes tables of many NWB files
+refer to instead of each storing a copy of the alleles.
+
+Write the catalogue once with write_allele_catalogue. Open it with open_allele_catalogue, create GenotypesTables with
+its alleles_table, and write the NWB files with the io of the catalogue, which shares the catalogue's build manager,
+so that the alleles_table of each GenotypesTable is written as an HDF5 external link to the catalogue file:
+
+    catalogue = open_allele_catalogue('alleles.h5')
+    genotypes_table = GenotypesTable(alleles_table=catalogue.alleles_table)
+    ...
+    with catalogue.io('session.nwb', mode='w') as io:
+        io.write(nwbfile)
+
+HDF5 object references cannot refer to objects in another file, so the allele1, allele2 and allele3 columns of a
+table whose alleles are in a catalogue are written as AlleleIndex datasets rather than as DynamicTableRegions. An
+AlleleIndex holds the indices into the alleles table and, in its 'catalogue' attribute, the path of the catalogue
+file. The columns are rebuilt as DynamicTableRegions of the alleles_table of the GenotypesTable when the file is read
+with this extension.
+
+The catalogue opened by open_allele_catalogue is cached by path, so the tables of all files read in a process that
+refer to the same catalogue share one AllelesTable, read from one open file. The cached catalogues stay open until
+close_allele_catalogues is called, or else until the interpreter exits.
+"""
+import atexit
+import os
+import threading
+
+from hdmf.backends.hdf5 import HDF5IO
+from hdmf.common import SimpleMultiContainer
+from hdmf.utils import docval, getargs
+from pynwb import NWBHDF5IO, get_manager
+
+from .genotypes_table import AllelesTable
+
+
+CATALOGUE_NAME = 'alleles_table'
+
+__catalogues = dict()  # the open catalogues, by absolute path of the file
+__catalogues_lock = threading.Lock()
+
+
+class AlleleCatalogue:
+    """An AllelesTable read from a catalogue file written with write_allele_catalogue, and the open file."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.__io = HDF5IO(self.path, mode='r', manager=get_manager())
+        root = self.__io.read()
+        if not isinstance(root, SimpleMultiContainer) or CATALOGUE_NAME not in root.containers:
+            self.__io.close()
+            raise ValueError("'%s' is not an allele catalogue file." % path)
+        self.alleles_table = root.containers[CATALOGUE_NAME]
+
+    def __repr__(self):
+        return "%s('%s', %d alleles)" % (self.__class__.__name__, self.path, len(self.alleles_table))
+
+    @property
+    def manager(self):
+        """The build manager that the catalogue was read with."""
+        return self.__io.manager
+
+    @docval({'name': 'path', 'type': str, 'doc': 'the path of the NWB file'},
+            {'name': 'mode', 'type': str, 'doc': 'the mode to open the file with', 'default': 'w'},
+            returns='an NWBHDF5IO that writes links to the catalogue', rtype=NWBHDF5IO)
+    def io(self, **kwargs):
+        """
+        Return an NWBHDF5IO for the given NWB file that shares the build manager of the catalogue, so that the
+        alleles_table of a GenotypesTable that is the alleles table of the catalogue is written as an external link.
+        """
+        path, mode = getargs('path', 'mode', kwargs)
+        return NWBHDF5IO(path, mode=mode, manager=self.manager)
+
+    def close(self):
+        self.__io.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'the path of the catalogue file to write'},
+        {'name': 'alleles_table', 'type': AllelesTable, 'doc': 'the alleles of the catalogue'},
+        is_method=False)
+def write_allele_catalogue(**kwargs):
+    """
+    Write an allele catalogue file, i.e., an HDF5 file with the given AllelesTable in the group /alleles_table. The
+    table must not have a parent, e.g., a GenotypesTable.
+    """
+    path, alleles_table = getargs('path', 'alleles_table', kwargs)
+    if alleles_table.parent is not None:
+        raise ValueError("Cannot write AllelesTable '%s' to a catalogue because it has a parent." % alleles_table.name)
+    if alleles_table.name != CATALOGUE_NAME:
+        raise ValueError("The AllelesTable of a catalogue must be named '%s'." % CATALOGUE_NAME)
+    with HDF5IO(path, mode='w', manager=get_manager()) as io:
+        io.write(SimpleMultiContainer(name='root', containers=[alleles_table]))
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'the path of the catalogue file'},
+        returns='the open catalogue', rtype=AlleleCatalogue, is_method=False)
+def open_allele_catalogue(**kwargs):
+    """
+    Open the allele catalogue file at the given path, or return the catalogue that is already open, so that a
+    catalogue is read once per process however many files refer to it.
+    """
+    path = os.path.abspath(getargs('path', kwargs))
+    with __catalogues_lock:
+        catalogue = __catalogues.get(path)
+        if catalogue is None:
+            catalogue = __catalogues[path] = AlleleCatalogue(path)
+    return catalogue
+
+
+def close_allele_catalogues():
+    """Close the catalogues opened with open_allele_catalogue."""
+    with __catalogues_lock:
+        for catalogue in __catalogues.values():
+            catalogue.close()
+        __catalogues.clear()
+
+
+atexit.register(close_allele_catalogues)
+
+
+def _is_external(alleles_table, source):
+    """Return whether the given AllelesTable is read from a file other than *source*, i.e., is written as a link."""
+    return (alleles_table is not None and alleles_table.container_source is not None and source is not None and
+            os.path.abspath(alleles_table.container_source) != os.path.abspath(source))
@@ -0,0 +1,321 @@
+"""
+The ndx-genotype command-line tool.
+
+    ndx-genotype ingest genotypes/*.tsv --output-dir nwb/ --jobs 8
+    ndx-genotype dump nwb/*.nwb --format csv > genotypes.csv
+    ndx-genotype query nwb/*.nwb --locus Pvalb --allele Ai14 --jobs 8 | cut -f 2 | sort -u
+    ndx-genotype serve --port 8765
+    ndx-genotype load-test nwb/*.nwb --locus Pvalb --clients 16
+
+Files are processed by a pool of worker processes when --jobs is greater than 1. Results are written to standard
+output as soon as each file is done, in the order the files were given, so that the output can be consumed by
+other commands while the remaining files are processed.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pynwb import NWBFile, NWBHDF5IO
+
+from .genotype_subject import GenotypeSubject
+from .genotypes_table import GenotypesTable
+from .importers import import_tabular_genotypes, import_vcf_genotypes
+from .reader import read_genotype_subject
+from .server import GenotypeQueryServer, run_load_test, _genotype_rows, HOST, PORT, MAX_OPEN_FILES, MAX_CACHED_FILES
+from .summary import read_genotypes_summary
+
+
+DUMP_COLUMNS = ('file', 'subject_id', 'locus', 'allele1', 'allele2', 'allele3')
+
+
+def _map(func, items, jobs):
+    """Apply func to each item, using a pool of *jobs* worker processes if jobs > 1. Yield the results in order."""
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(func, items)
+
+
+def _strip_extension(path):
+    name = os.path.basename(path)
+    for ext in ('.gz', '.vcf', '.csv', '.tsv', '.txt'):
+        if name.lower().endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+
+class _Ingest:
+    """Convert one genotype file to an NWB file. A class so that the options can be pickled to worker processes."""
+
+    def __init__(self, args):
+        self.output_dir = args.output_dir
+        self.subject_id = args.subject_id
+        self.subject_column = args.subject_column
+        self.locus_column = args.locus_column
+        self.allele_columns = args.allele_columns.split(',')
+        self.delimiter = args.delimiter
+        self.chunk_size = args.chunk_size
+        self.overwrite = args.overwrite
+
+    def __call__(self, path):
+        start = time.perf_counter()
+        name = _strip_extension(path)
+        subject_id = self.subject_id or name
+        output = os.path.join(self.output_dir, name + '.nwb')
+        if os.path.exists(output) and not self.overwrite:
+            raise FileExistsError("'%s' already exists. Use --overwrite to replace it." % output)
+
+        genotypes_table = GenotypesTable()
+        if '.vcf' in os.path.basename(path).lower():
+            stats = import_vcf_genotypes(genotypes_table, path, sample=self.subject_id, chunk_size=self.chunk_size)
+        else:
+            stats = import_tabular_genotypes(
+                genotypes_table, path, locus_column=self.locus_column, allele_columns=self.allele_columns,
+                delimiter=self.delimiter, subject_column=self.subject_column,
+                subject_id=self.subject_id if self.subject_column else None, chunk_size=self.chunk_size)
+        if stats.genotypes == 0:
+            raise ValueError("No genotypes found in '%s'." % path)
+        nwbfile = NWBFile(
+            session_description='Genotypes imported from %s' % os.path.basename(path),
+            identifier=str(uuid.uuid4()),
+            session_start_time=datetime.datetime.now(datetime.timezone.utc),
+        )
+        nwbfile.subject = GenotypeSubject(subject_id=subject_id, genotypes_table=genotypes_table)
+        with NWBHDF5IO(output, mode='w') as io:
+            io.write(nwbfile)
+        return (path, output, subject_id, stats.records, stats.genotypes, stats.skipped,
+                '%.3f' % (time.perf_counter() - start))
+
+
+def _read_genotypes(path):
+    """
+    Return the subject ID and the genotypes of the subject of an NWB file as a GenotypesSnapshot. Only the subject
+    is read, not the rest of the file.
+    """
+    subject = read_genotype_subject(path, external_resources=False).subject
+    if subject is None or subject.genotypes_table is None:
+        return None, None
+    return subject.subject_id, subject.genotypes_table.freeze()
+
+
+def _dump(path):
+    subject_id, snapshot = _read_genotypes(path)
+    if snapshot is None:
+        return path, None
+    return path, _genotype_rows(path, subject_id, snapshot, np.arange(len(snapshot)))
+
+
+class _Query:
+    """Find the genotypes of one NWB file that match the given loci and alleles."""
+
+    def __init__(self, args):
+        self.loci = args.locus
+        self.alleles = args.allele
+
+    def __call__(self, path):
+        # skip files whose summary rules out the query without reading the file
+        summary = read_genotypes_summary(path) if self.loci or self.alleles else None
+        if summary is not None and not summary.may_match(loci=self.loci, alleles=self.alleles):
+            return path, []
+        subject_id, snapshot = _read_genotypes(path)
+        if snapshot is None:
+            return path, None
+        return path, _genotype_rows(path, subject_id, snapshot, snapshot.find_rows(self.loci, self.alleles))
+
+
+class _RowWriter:
+    """Write rows to a text stream as CSV, TSV or JSON lines, flushing after each file."""
+
+    def __init__(self, stream, fmt, columns):
+        self.stream = stream
+        self.fmt = fmt
+        self.columns = columns
+        if fmt in ('csv', 'tsv'):
+            self.writer = csv.writer(stream, delimiter=',' if fmt == 'csv' else '\t', lineterminator='\n')
+            self.writer.writerow(columns)
+
+    def write(self, rows):
+        if self.fmt == 'jsonl':
+            for row in rows:
+                self.stream.write(json.dumps(dict(zip(self.columns, row))) + '\n')
+        else:
+            self.writer.writerows(rows)
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class _ParquetWriter:
+    """Write rows to a Parquet file, one row group per file."""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing Parquet requires the pyarrow package.") from e
+        self.pa = pa
+        self.columns = columns
+        self.writer = pq.ParquetWriter(path, pa.schema([(c, pa.string()) for c in columns]))
+
+    def write(self, rows):
+        if rows:
+            arrays = [self.pa.array(list(values), type=self.pa.string()) for values in zip(*rows)]
+            self.writer.write_table(self.pa.Table.from_arrays(arrays, names=list(self.columns)))
+
+    def close(self):
+        self.writer.close()
+
+
+def _warn(message):
+    print('ndx-genotype: %s' % message, file=sys.stderr)
+
+
+def _write_rows(args, func):
+    """Run func on each input file and write the returned rows with the writer selected by the arguments."""
+    if args.format == 'parquet':
+        if args.output is None:
+            raise ValueError('--output is required for the parquet format.')
+        writer = _ParquetWriter(args.output, DUMP_COLUMNS)
+    else:
+        stream = open(args.output, 'w', newline='') if args.output else sys.stdout
+        writer = _RowWriter(stream, args.format, DUMP_COLUMNS)
+    try:
+        for path, rows in _map(func, args.files, args.jobs):
+            if rows is None:
+                _warn("'%s' has no GenotypeSubject with a genotypes table. Skipping." % path)
+                continue
+            writer.write(rows)
+    finally:
+        writer.close()
+
+
+def ingest(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    writer = _RowWriter(sys.stdout, 'tsv',
+                        ('input', 'output', 'subject_id', 'records', 'genotypes', 'skipped', 'seconds'))
+    for result in _map(_Ingest(args), args.files, args.jobs):
+        writer.write([result])
+
+
+def dump(args):
+    _write_rows(args, _dump)
+
+
+def query(args):
+    if not args.locus and not args.allele:
+        raise ValueError('At least one --locus or --allele is required.')
+    _write_rows(args, _Query(args))
+
+
+async def _serve(args):
+    server = GenotypeQueryServer(max_open_files=args.max_open_files, max_cached_files=args.max_cached_files)
+    await server.start(host=args.host, port=args.port, path=args.socket, allow_remote=args.allow_remote)
+    _warn('serving on %s' % (server.address, ))
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def serve(args):
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+def load_test(args):
+    result = run_load_test(args.files, clients=args.clients, requests=args.requests, loci=args.locus,
+                           alleles=args.allele)
+    writer = _RowWriter(sys.stdout, 'tsv', tuple(result))
+    writer.write([tuple(round(v, 3) if isinstance(v, float) else v for v in result.values())])
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='ndx-genotype', description='Bulk ingest, dump and query of genotypes.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_jobs(p):
+        p.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes (default: 1)')
+
+    p = subparsers.add_parser('ingest', help='convert CSV/TSV or VCF genotype files to NWB files, one per input')
+    p.add_argument('files', nargs='+', help='genotype files, optionally gzipped')
+    p.add_argument('-o', '--output-dir', default='.', help='directory of the NWB files (default: .)')
+    p.add_argument('--subject-id', help=('ID of the subject (default: the name of the input file). Selects the '
+                                         'rows of --subject-column, or the sample of a VCF file'))
+    p.add_argument('--subject-column', help='column of subject IDs of CSV/TSV files with many subjects')
+    p.add_argument('--locus-column', default='locus', help='column of loci (default: locus)')
+    p.add_argument('--allele-columns', default='allele1,allele2',
+                   help='comma-separated columns of allele symbols (default: allele1,allele2)')
+    p.add_argument('--delimiter', help="column delimiter (default: ',' for .csv files and tab otherwise)")
+    p.add_argument('--chunk-size', type=int, default=100000, help='rows read at a time (default: 100000)')
+    p.add_argument('--overwrite', action='store_true', help='replace existing NWB files')
+    add_jobs(p)
+    p.set_defaults(func=ingest)
+
+    for name, func, help in (('dump', dump, 'write the genotypes of NWB files as rows'),
+                             ('query', query, 'write the genotypes of NWB files that match loci and alleles')):
+        p = subparsers.add_parser(name, help=help)
+        p.add_argument('files', nargs='+', help='NWB files')
+        if name == 'query':
+            p.add_argument('--locus', action='append', default=[], help='match genotypes at this locus')
+            p.add_argument('--allele', action='append', default=[], help='match genotypes with this allele')
+        p.add_argument('-f', '--format', choices=('csv', 'tsv', 'jsonl', 'parquet'),
+                       default='csv' if name == 'dump' else 'tsv', help='output format')
+        p.add_argument('-o', '--output', help='output file (default: standard output)')
+        add_jobs(p)
+        p.set_defaults(func=func)
+
+    p = subparsers.add_parser('serve', help='answer genotype queries from other processes, with cached file contents')
+    p.add_argument('--host', default=HOST, help='loopback address to listen on (default: %s)' % HOST)
+    p.add_argument('--allow-remote', action='store_true',
+                   help='allow --host to be an address that is not a loopback address. The server has no '
+                        'authentication, and reads any file that a client names')
+    p.add_argument('--port', type=int, default=PORT, help='port to listen on (default: %d)' % PORT)
+    p.add_argument('--socket', help='path of a Unix socket to listen on instead of a port')
+    p.add_argument('--max-open-files', type=int, default=MAX_OPEN_FILES,
+                   help='number of files kept open (default: %d)' % MAX_OPEN_FILES)
+    p.add_argument('--max-cached-files', type=int, default=MAX_CACHED_FILES,
+                   help='number of files whose genotypes are cached (default: %d)' % MAX_CACHED_FILES)
+    p.set_defaults(func=serve)
+
+    p = subparsers.add_parser('load-test', help='measure the query server on localhost with concurrent clients')
+    p.add_argument('files', nargs='+', help='NWB files')
+    p.add_argument('--locus', action='append', default=[], help='match genotypes at this locus')
+    p.add_argument('--allele', action='append', default=[], help='match genotypes with this allele')
+    p.add_argument('--clients', type=int, default=8, help='number of concurrent clients (default: 8)')
+    p.add_argument('--requests', type=int, default=50, help='number of requests of each client (default: 50)')
+    p.set_defaults(func=load_test)
+    return parser
+
+
+def main(argv=None):
+    """Run the ndx-genotype command-line tool. Return the exit status."""
+    args = _parser().parse_args(argv)
+    try:
+        args.func(args)
+    except BrokenPipeError:
+        # the reader of the output exited, e.g., head. Silence the error on the implicit flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, ImportError) as e:
+        _warn(str(e))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
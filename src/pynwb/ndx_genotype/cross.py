@@ -0,0 +1,194 @@
+"""
+Prediction of the offspring genotypes of breeding crosses between GenotypeSubjects.
+
+At each locus, each parent passes on its first or its second allele with probability 1/2, independently, so that
+each cross has four equally likely offspring genotypes per locus. The alleles of all parents are coded into one
+(subjects, loci, 2) array of allele symbol codes, and the four genotypes of every pair of parents at every locus are
+computed with array operations over that array, so that all pairs of a colony can be evaluated at once.
+
+Only allele1 and allele2 are used. A parent with several rows at a locus is taken to have the genotype of the first.
+"""
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .genotype_subject import GenotypeSubject
+from .genotypes_table import GenotypesTable
+
+
+PAIRS_PER_BATCH = 10000
+
+
+def _parent_alleles(tables, missing_allele):
+    """
+    Return the loci and allele symbols of the given GenotypesTables, sorted, and the (tables, loci, 2) array of the
+    codes of the symbols of allele1 and allele2 of each table at each locus, with -1 where a table has no genotype at
+    a locus, or the code of missing_allele if it is given.
+    """
+    loci, alleles = list(), list()
+    for table in tables:
+        indices = _arrays.allele_indices(table)[:, :2]
+        loci.append(_arrays.loci(table).astype(str))
+        alleles.append(_arrays.allele_symbols(table.alleles_table).astype(str)[indices.reshape(-1)].reshape(-1, 2))
+    extra = [missing_allele] if missing_allele is not None else []
+    all_loci = np.unique(np.concatenate(loci + [np.empty(0, dtype=str)]))
+    all_symbols = np.unique(np.concatenate([a.reshape(-1) for a in alleles] + [np.array(extra, dtype=str)]))
+    codes = np.full((len(tables), len(all_loci), 2), -1, dtype=np.int64)
+    for i, (table_loci, table_alleles) in enumerate(zip(loci, alleles)):
+        locus_codes, first = np.unique(np.searchsorted(all_loci, table_loci), return_index=True)
+        codes[i, locus_codes] = np.searchsorted(all_symbols, table_alleles[first])
+    if missing_allele is not None:
+        codes[codes < 0] = np.searchsorted(all_symbols, missing_allele)
+    return all_loci.astype(object), all_symbols.astype(object), codes
+
+
+class CrossPrediction:
+    """
+    The offspring genotype probabilities of a set of crosses, i.e., pairs of parents, at each locus that both parents
+    are genotyped at.
+
+    The predictions are stored as arrays with one element per cross, locus and distinct offspring genotype:
+    ``cross``, the index of the cross; ``locus``, the index into ``loci``; ``allele1`` and ``allele2``, the indices into
+    ``symbols`` of the alleles of the genotype, with allele1 <= allele2; and ``probability``.
+    """
+
+    def __init__(self, parent_ids, loci, symbols, cross, locus, allele1, allele2, probability):
+        self.parent_ids = np.asarray(parent_ids, dtype=object).reshape(-1, 2)
+        self.loci = np.asarray(loci, dtype=object)
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.cross = np.asarray(cross, dtype=np.int64)
+        self.locus = np.asarray(locus, dtype=np.int64)
+        self.allele1 = np.asarray(allele1, dtype=np.int64)
+        self.allele2 = np.asarray(allele2, dtype=np.int64)
+        self.probability = np.asarray(probability, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.parent_ids)
+
+    def __repr__(self):
+        return '%s(%d crosses, %d loci)' % (self.__class__.__name__, len(self), len(self.loci))
+
+    def __cross_rows(self, cross):
+        if not 0 <= cross < len(self):
+            raise IndexError("Cross %d is out of range for %d crosses." % (cross, len(self)))
+        start, stop = np.searchsorted(self.cross, [cross, cross + 1])
+        return slice(start, stop)
+
+    def distribution(self, cross, locus):
+        """
+        Return a dict mapping each offspring genotype of the given cross at the given locus, a tuple of two allele
+        symbols, to its probability. The dict is empty if a parent is not genotyped at the locus.
+        """
+        rows = self.__cross_rows(cross)
+        selected = self.loci[self.locus[rows]] == locus
+        return {(self.symbols[a1], self.symbols[a2]): float(p) for a1, a2, p in
+                zip(self.allele1[rows][selected], self.allele2[rows][selected], self.probability[rows][selected])}
+
+    def to_dataframe(self):
+        """
+        Return the predictions as a DataFrame with columns 'parent1', 'parent2', 'locus', 'allele1', 'allele2' and
+        'probability'.
+        """
+        return pd.DataFrame({
+            'parent1': self.parent_ids[self.cross, 0],
+            'parent2': self.parent_ids[self.cross, 1],
+            'locus': self.loci[self.locus],
+            'allele1': self.symbols[self.allele1],
+            'allele2': self.symbols[self.allele2],
+            'probability': self.probability,
+        })
+
+    @docval({'name': 'cross', 'type': int, 'doc': 'the index of the cross', 'default': 0},
+            returns='a new GenotypesTable with the most likely offspring genotype at each locus', rtype=GenotypesTable)
+    def most_likely_genotypes_table(self, **kwargs):
+        """
+        Return a new GenotypesTable with the most likely offspring genotype of the given cross at each locus, where
+        ties go to the first genotype in symbol order. Its alleles table holds the alleles of the genotypes.
+        """
+        cross = getargs('cross', kwargs)
+        rows = self.__cross_rows(cross)
+        locus, allele1, allele2 = self.locus[rows], self.allele1[rows], self.allele2[rows]
+        # the rows of a cross are sorted by locus and genotype, so a stable sort by decreasing probability within
+        # each locus puts the first most likely genotype first
+        order = np.lexsort((-self.probability[rows], locus))
+        first = order[np.unique(locus[order], return_index=True)[1]]
+        used, codes = np.unique(np.concatenate([allele1[first], allele2[first]]), return_inverse=True)
+        codes = codes.reshape(2, -1)
+        table = GenotypesTable()
+        table.add_alleles(symbol=self.symbols[used].tolist())
+        table.add_genotypes(locus=self.loci[locus[first]].tolist(), allele1=codes[0].tolist(),
+                            allele2=codes[1].tolist())
+        return table
+
+
+def _predict(codes, pairs):
+    """
+    Return the cross, locus, allele1 and allele2 codes and the probability of the distinct offspring genotypes of the
+    given (n, 2) pairs of indices into the first axis of the (parents, loci, 2) array of allele codes.
+    """
+    num_loci, num_symbols = codes.shape[1], max(int(codes.max(initial=-1)) + 1, 1)
+    parent1, parent2 = codes[pairs[:, 0]], codes[pairs[:, 1]]
+    # the four equally likely combinations of one allele of each parent, in the last axis
+    from1 = np.repeat(parent1, 2, axis=2)
+    from2 = np.tile(parent2, (1, 1, 2))
+    low, high = np.minimum(from1, from2), np.maximum(from1, from2)
+    cross, locus = np.nonzero(((parent1 >= 0) & (parent2 >= 0)).all(axis=2))
+    keys = ((cross[:, None] * num_loci + locus[:, None]) * num_symbols + low[cross, locus]) * num_symbols
+    keys = (keys + high[cross, locus]).reshape(-1)
+    keys, counts = np.unique(keys, return_counts=True)
+    keys, allele2 = np.divmod(keys, num_symbols)
+    keys, allele1 = np.divmod(keys, num_symbols)
+    cross, locus = np.divmod(keys, num_loci)
+    return cross, locus, allele1, allele2, counts / 4
+
+
+@docval({'name': 'subjects', 'type': (list, tuple), 'doc': 'the GenotypeSubjects that can be parents'},
+        {'name': 'pairs', 'type': ('array_data', 'data'),
+         'doc': ('the (n, 2) indices into subjects of the parents of each cross. Defaults to all pairs of distinct '
+                 'subjects, i.e., (i, j) for i < j.'),
+         'default': None},
+        {'name': 'missing_allele', 'type': str,
+         'doc': ("the symbol of the allele, e.g., 'wt', that a parent is taken to be homozygous for at a locus it is "
+                 "not genotyped at. By default, loci that either parent is not genotyped at are not predicted."),
+         'default': None},
+        {'name': 'pairs_per_batch', 'type': int, 'doc': 'the number of crosses computed at a time',
+         'default': PAIRS_PER_BATCH},
+        returns='the offspring genotype probabilities of the crosses', rtype=CrossPrediction, is_method=False)
+def predict_crosses(**kwargs):
+    """
+    Predict the Mendelian offspring genotype probabilities per locus of many crosses between the given subjects.
+    The crosses are computed with array operations, pairs_per_batch at a time.
+    """
+    subjects, pairs, missing_allele, pairs_per_batch = getargs('subjects', 'pairs', 'missing_allele',
+                                                               'pairs_per_batch', kwargs)
+    for subject in subjects:
+        if not isinstance(subject, GenotypeSubject) or subject.genotypes_table is None:
+            raise ValueError("All subjects must be GenotypeSubjects with a GenotypesTable.")
+    if pairs is None:
+        pairs = np.stack(np.triu_indices(len(subjects), k=1), axis=1)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) and (pairs.min() < 0 or pairs.max() >= len(subjects)):
+        raise ValueError("'pairs' must be indices into 'subjects', between 0 and %d." % (len(subjects) - 1))
+    loci, symbols, codes = _parent_alleles([s.genotypes_table for s in subjects], missing_allele)
+    batches = list()
+    for start in range(0, len(pairs), pairs_per_batch):
+        cross, *predicted = _predict(codes, pairs[start:start + pairs_per_batch])
+        batches.append([cross + start] + predicted)
+    results = [np.concatenate(values) for values in zip(*batches)] if batches else [np.empty(0)] * 5
+    subject_ids = np.array([s.subject_id for s in subjects], dtype=object)
+    return CrossPrediction(subject_ids[pairs], loci, symbols, *results)
+
+
+@docval({'name': 'parent1', 'type': GenotypeSubject, 'doc': 'the first parent'},
+        {'name': 'parent2', 'type': GenotypeSubject, 'doc': 'the second parent'},
+        {'name': 'missing_allele', 'type': str,
+         'doc': ("the symbol of the allele, e.g., 'wt', that a parent is taken to be homozygous for at a locus it is "
+                 "not genotyped at. By default, loci that either parent is not genotyped at are not predicted."),
+         'default': None},
+        returns='the offspring genotype probabilities of the cross', rtype=CrossPrediction, is_method=False)
+def predict_cross(**kwargs):
+    """Predict the Mendelian offspring genotype probabilities per locus of a cross between two subjects."""
+    parent1, parent2, missing_allele = getargs('parent1', 'parent2', 'missing_allele', kwargs)
+    return predict_crosses([parent1, parent2], pairs=[[0, 1]], missing_allele=missing_allele)
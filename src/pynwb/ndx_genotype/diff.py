@@ -0,0 +1,272 @@
+"""
+Diffs between two versions of a GenotypesTable and their application in place.
+
+Genotype rows are matched by locus, and compared by a hash of the locus and the allele symbols computed for all rows
+at once with pandas. Rows are matched by symbol rather than by allele index, so the two tables may order their
+alleles differently. The tables may be in memory or read lazily from a file.
+"""
+import h5py
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from ._hashing import ALLELE_COLUMNS, _genotype_frame, _hashes, _table_hash
+from .summary import GenotypesSummary
+
+
+OPTIONAL_ALLELE_COLUMNS = ('recombinase', 'reporter', 'promoter', 'recombinase_recognition_site')
+
+
+def _symbols(values):
+    return [None if v is None else str(v) for v in values]
+
+
+class GenotypesChangeset:
+    """
+    The changes that turn one version of a GenotypesTable into another.
+
+    Create one with diff_genotypes_tables or GenotypesTable.diff, and apply it with apply. Row indices refer to the
+    rows of the old table, and alleles are given by symbol.
+    """
+
+    def __init__(self, base_hash, new_alleles, removed_rows, removed_loci, changed_rows, changed_alleles,
+                 added_loci, added_alleles):
+        self.base_hash = base_hash
+        self.new_alleles = new_alleles  # dict of 'symbol' and the optional allele columns to lists of values
+        self.removed_rows = np.asarray(removed_rows, dtype=np.int64)
+        self.removed_loci = list(removed_loci)
+        self.changed_rows = np.asarray(changed_rows, dtype=np.int64)
+        self.changed_alleles = [list(a) for a in changed_alleles]
+        self.added_loci = list(added_loci)
+        self.added_alleles = [list(a) for a in added_alleles]
+
+    def __len__(self):
+        """The number of changed genotype rows."""
+        return len(self.removed_rows) + len(self.changed_rows) + len(self.added_loci)
+
+    def __repr__(self):
+        return ('%s(new_alleles=%d, removed=%d, changed=%d, added=%d)'
+                % (self.__class__.__name__, len(self.new_alleles['symbol']), len(self.removed_rows),
+                   len(self.changed_rows), len(self.added_loci)))
+
+    def to_dict(self):
+        """Return the changeset as a dict that can be serialized to JSON."""
+        return dict(
+            base_hash=self.base_hash,
+            new_alleles=self.new_alleles,
+            removed_rows=self.removed_rows.tolist(),
+            removed_loci=self.removed_loci,
+            changed_rows=self.changed_rows.tolist(),
+            changed_alleles=self.changed_alleles,
+            added_loci=self.added_loci,
+            added_alleles=self.added_alleles,
+        )
+
+    @classmethod
+    def from_dict(cls, d):
+        """Create a changeset from a dict returned by to_dict."""
+        return cls(**d)
+
+    @docval({'name': 'genotypes_table', 'type': 'GenotypesTable',
+             'doc': 'the table to change, in memory or read from a file opened in append mode'},
+            {'name': 'resource_cache', 'type': 'ResourceCache',
+             'doc': 'a cache of resource records used to add the external resources of the added loci',
+             'default': None},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource of the loci in the cache',
+             'default': None},
+            {'name': 'check', 'type': bool,
+             'doc': 'check that the table is the version that the changeset was computed from', 'default': True})
+    def apply(self, **kwargs):
+        """
+        Apply this changeset to the given table in place, touching only the affected rows.
+
+        Changed rows are overwritten, removed rows are removed while keeping the order of the remaining rows, and
+        added rows and alleles are appended. For tables read from a file, the datasets of the table must be
+        resizable to add or remove rows, i.e., written with H5DataIO(maxshape=(None,)). Alleles are added with
+        values only for the optional columns that the alleles table already has.
+
+        For tables read from a file, the summary attributes of the table are recomputed, so that queries that skip
+        files by their summary see the changes.
+
+        If the table has an ERNWBFile ancestor and *resource_cache* is given, the references to the added loci are
+        added to its ExternalResources from the cache. The references to the removed loci are kept, because
+        ExternalResources has no API for removing references.
+        """
+        table, resource_cache, resource_name, check = getargs('genotypes_table', 'resource_cache', 'resource_name',
+                                                              'check', kwargs)
+        if (resource_cache is None) != (resource_name is None):
+            raise ValueError("'resource_cache' and 'resource_name' must be given together.")
+        if check and _table_hash(_hashes(_genotype_frame(table))[0]) != self.base_hash:
+            raise ValueError("GenotypesTable '%s' is not the version that the changeset was computed from."
+                             % table.name)
+        columns = [name for name in ALLELE_COLUMNS if name in table]
+        for name, values in zip(ALLELE_COLUMNS, zip(*(self.changed_alleles + self.added_alleles))):
+            if (name in columns) != (values[0] is not None) or len(set(v is None for v in values)) > 1:
+                raise ValueError("Column '%s' of the changeset does not match the columns of GenotypesTable '%s'."
+                                 % (name, table.name))
+
+        symbol_index = self.__add_alleles(table.alleles_table)
+        for i, name in enumerate(columns):
+            values = [symbol_index[a[i]] for a in self.changed_alleles]
+            _set_rows(table[name].data, self.changed_rows, values)
+        if len(self.removed_rows):
+            for column in [table.id, table['locus']] + [table[name] for name in columns]:
+                _remove_rows(column.data, self.removed_rows)
+        if self.added_loci:
+            start = len(table)
+            _append_ids(table.id.data, len(self.added_loci))
+            _append(table['locus'].data, self.added_loci)
+            for i, name in enumerate(columns):
+                _append(table[name].data, [symbol_index[a[i]] for a in self.added_alleles])
+            table._check_sorted(start)
+        self.__update_external_resources(table, resource_cache, resource_name)
+        _update_summary(table)
+
+    def __add_alleles(self, alleles_table):
+        """Add the new alleles to the alleles table. Return a dict of the index of each allele symbol."""
+        symbol_index = dict()
+        for i, symbol in enumerate(_arrays.allele_symbols(alleles_table)):
+            symbol_index.setdefault(symbol, i)
+        new = [i for i, s in enumerate(self.new_alleles['symbol']) if s not in symbol_index]
+        if not new:
+            return symbol_index
+        start = len(alleles_table)
+        symbols = [self.new_alleles['symbol'][i] for i in new]
+        _append_ids(alleles_table.id.data, len(new))
+        _append(alleles_table['symbol'].data, symbols)
+        for name in OPTIONAL_ALLELE_COLUMNS:
+            if name in alleles_table:
+                rows = self.new_alleles.get(name) or [[] for _ in self.new_alleles['symbol']]
+                rows = [rows[i] for i in new]
+                if (isinstance(alleles_table[name].data, list) and not isinstance(alleles_table.id.data, list)
+                        and any(rows)):
+                    # a column stored sparsely in a file is read into memory and its datasets are not changed, which
+                    # is only correct if the new rows have no values
+                    raise ValueError("Column '%s' is stored sparsely and cannot be changed in place." % name)
+                _append_ragged(alleles_table[name], rows)
+        symbol_index.update(zip(symbols, range(start, start + len(new))))
+        return symbol_index
+
+    def __update_external_resources(self, table, resource_cache, resource_name):
+        if resource_cache is None or not self.added_loci:
+            return
+        nwbfile = table.get_ancestor(data_type='ERNWBFile')  # TODO change me to NWBFile after merge with NWB core
+        if nwbfile is not None:
+            resource_cache.add_refs(nwbfile.external_resources, table, 'locus', self.added_loci, resource_name)
+
+
+def _update_summary(table):
+    """
+    Recompute the summary attributes of a table read from a file, after it was changed in place, and remove its
+    sorted_by attribute if the rows are no longer sorted.
+    """
+    data = _arrays._unwrap(table['locus'].data)
+    if isinstance(data, h5py.Dataset):
+        data.parent.attrs.update(GenotypesSummary.from_table(table).to_attributes())
+        if table.sorted_by is None and 'sorted_by' in data.parent.attrs:
+            del data.parent.attrs['sorted_by']
+
+
+def _resize(dset, n):
+    if dset.maxshape[0] is not None:
+        raise ValueError("Dataset '%s' cannot be resized. Write it with H5DataIO(maxshape=(None,)) to add or remove "
+                         "rows in place." % dset.name)
+    dset.resize((n, ) + dset.shape[1:])
+
+
+def _set_rows(data, rows, values):
+    """Set the given rows of a list or an h5py.Dataset."""
+    if isinstance(data, list):
+        for row, value in zip(rows, values):
+            data[row] = value
+    elif len(rows):
+        order = np.argsort(rows)  # h5py requires increasing indices
+        data[rows[order]] = np.asarray(values)[order]
+
+
+def _remove_rows(data, rows):
+    """Remove the given rows from a list or a resizable h5py.Dataset, keeping the order of the other rows."""
+    rows = np.unique(rows)
+    if isinstance(data, list):
+        keep = np.ones(len(data), dtype=bool)
+        keep[rows] = False
+        data[:] = [v for v, k in zip(data, keep) if k]
+        return
+    first = int(rows[0])
+    tail = data[first:]
+    keep = np.ones(len(tail), dtype=bool)
+    keep[rows - first] = False
+    tail = tail[keep]
+    _resize(data, first + len(tail))
+    if len(tail):
+        data[first:] = tail
+
+
+def _append(data, values):
+    """Append values to a list or a resizable h5py.Dataset."""
+    if isinstance(data, list):
+        data.extend(values)
+        return
+    n = len(data)
+    _resize(data, n + len(values))
+    data[n:] = values
+
+
+def _append_ids(data, count):
+    start = int(np.max(data[:])) + 1 if len(data) else 0
+    _append(data, list(range(start, start + count)))
+
+
+def _append_ragged(index, rows):
+    """Append the given lists of values to the indexed column of the given VectorIndex."""
+    last = int(index.data[len(index.data) - 1]) if len(index.data) else 0
+    _append(index.target.data, [v for row in rows for v in row])
+    _append(index.data, (last + np.cumsum([len(row) for row in rows], dtype=np.int64)).tolist())
+
+
+@docval({'name': 'old', 'type': 'GenotypesTable', 'doc': 'the old version of the table'},
+        {'name': 'new', 'type': 'GenotypesTable', 'doc': 'the new version of the table'},
+        returns='the changes from the old to the new version', rtype=GenotypesChangeset, is_method=False)
+def diff_genotypes_tables(**kwargs):
+    """
+    Compute the changes that turn the old version of a GenotypesTable into the new version.
+
+    Rows with the same locus are matched in order. A matched row whose alleles differ is changed, an unmatched row
+    of the old table is removed, and an unmatched row of the new table is added. Alleles of the new alleles table
+    that are not in the old alleles table are added, with the values of their optional columns.
+    """
+    old, new = getargs('old', 'new', kwargs)
+    old_frame, new_frame = _genotype_frame(old), _genotype_frame(new)
+    old_rows, old_loci = _hashes(old_frame)
+    new_rows, new_loci = _hashes(new_frame)
+
+    match = pd.Index(old_loci).get_indexer(new_loci)  # the row of the old table of each row of the new table
+    matched = match >= 0
+    changed_new = np.flatnonzero(matched & (old_rows[np.where(matched, match, 0)] != new_rows))
+    added_new = np.flatnonzero(~matched)
+    removed = np.setdiff1d(np.arange(len(old_frame)), match[matched])
+
+    old_symbols = set(_arrays.allele_symbols(old.alleles_table))
+    new_symbols = _arrays.allele_symbols(new.alleles_table)
+    new_rows_alleles = [i for i, s in enumerate(new_symbols) if s not in old_symbols]
+    new_alleles = {'symbol': [str(new_symbols[i]) for i in new_rows_alleles]}
+    for name in OPTIONAL_ALLELE_COLUMNS:
+        ragged = _arrays.ragged_column(new.alleles_table, name)
+        if ragged is not None:
+            values, offsets = ragged
+            starts = np.concatenate([[0], offsets[:-1]])
+            new_alleles[name] = [_symbols(values[starts[i]:offsets[i]]) for i in new_rows_alleles]
+
+    allele_values = new_frame[list(ALLELE_COLUMNS)].to_numpy(dtype=object)
+    return GenotypesChangeset(
+        base_hash=_table_hash(old_rows),
+        new_alleles=new_alleles,
+        removed_rows=removed,
+        removed_loci=_symbols(old_frame['locus'].to_numpy()[removed]),
+        changed_rows=match[changed_new],
+        changed_alleles=[_symbols(a) for a in allele_values[changed_new]],
+        added_loci=_symbols(new_frame['locus'].to_numpy()[added_new]),
+        added_alleles=[_symbols(a) for a in allele_values[added_new]],
+    )
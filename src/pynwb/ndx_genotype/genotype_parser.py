@@ -0,0 +1,149 @@
+"""
+Parsing of free-text genotype strings, such as the Subject.genotype field, into structured genotypes.
+
+A genotype string lists the genotype at each locus separated by ';', and the two or three alleles at a locus
+separated by '/', e.g., "Pvalb-IRES-Cre/wt;Ai14(RCL-tdT)/wt". The strings are parsed with pandas string operations
+over all distinct strings at once, so archives where many subjects share a genotype are parsed in one pass over the
+distinct strings.
+
+The locus of a genotype is not part of the string. It is looked up by allele symbol in an optional map, e.g.,
+{'Ai14(RCL-tdT)': 'ROSA26'}, or taken from the symbol of the first allele that is not wild type, up to the first
+'-' or '(', e.g., "Pvalb" for "Pvalb-IRES-Cre".
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs, popargs
+
+from .genotypes_table import GenotypesTable
+
+
+_ALLELE = r'\s*([^/;\s]+)\s*'
+_PART = re.compile('%s/%s(?:/%s)?$' % (_ALLELE, _ALLELE, _ALLELE))
+_LOCUS = re.compile(r'[^-(]+')
+
+
+class ParsedGenotypes:
+    """
+    The genotypes parsed from a sequence of genotype strings.
+
+    The genotypes are stored once per distinct string. Use genotypes or genotypes_table to get the genotypes of the
+    string at a given position, and errors for the strings that could not be parsed.
+    """
+
+    def __init__(self, codes, num_distinct, rows, errors):
+        self.__codes = codes  # the distinct string of each string, or -1 if empty
+        self.__rows = rows  # DataFrame of the genotypes of the distinct strings, indexed by distinct string
+        self.__offsets = np.searchsorted(rows.index.to_numpy(), np.arange(num_distinct + 1))
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.__codes)
+
+    @property
+    def alleles(self):
+        """The distinct allele symbols of all genotypes, in order of first appearance."""
+        values = self.__rows[['allele1', 'allele2', 'allele3']].to_numpy(dtype=object).ravel()
+        return pd.unique(values[pd.notna(values)])
+
+    def genotypes(self, index):
+        """Return the genotypes of the string at the given position as a list of (locus, allele1, allele2, allele3)
+        tuples, where allele3 is None if the genotype has two alleles."""
+        code = self.__codes[index]
+        if code < 0 or index in self.errors:
+            return []
+        rows = self.__rows.iloc[self.__offsets[code]:self.__offsets[code + 1]]
+        return [tuple(None if pd.isna(v) else v for v in row) for row in rows.itertuples(index=False)]
+
+    @docval({'name': 'index', 'type': int, 'doc': 'the position of the genotype string'},
+            allow_extra=True)
+    def genotypes_table(self, **kwargs):
+        """
+        Return a new GenotypesTable with the genotypes of the string at the given position, or None if the string
+        is empty or could not be parsed. Other keyword arguments, e.g., process, are passed to GenotypesTable.
+        """
+        index = popargs('index', kwargs)
+        genotypes = self.genotypes(index)
+        if not genotypes:
+            return None
+        loci, allele1, allele2, allele3 = zip(*genotypes)
+        symbols = pd.unique(np.array(allele1 + allele2 + allele3, dtype=object))
+        table = GenotypesTable(**kwargs)
+        table.add_alleles(symbol=[s for s in symbols if s is not None])
+        table.add_genotypes(locus=list(loci), allele1=list(allele1), allele2=list(allele2),
+                            allele3=None if allele3[0] is None else list(allele3))
+        return table
+
+
+@docval({'name': 'genotypes', 'type': ('array_data', 'data'),
+         'doc': 'the genotype strings. None, NaN and empty strings have no genotypes'},
+        {'name': 'locus_map', 'type': dict, 'doc': 'map from allele symbol to locus', 'default': None},
+        {'name': 'wild_type', 'type': ('array_data', 'data'),
+         'doc': 'the symbols of wild-type alleles, which do not name a locus', 'default': ('wt', '+')},
+        returns='the parsed genotypes', rtype=ParsedGenotypes, is_method=False)
+def parse_genotype_strings(**kwargs):
+    """
+    Parse many genotype strings at once. Strings that are not a ';'-separated list of genotypes with two or three
+    '/'-separated alleles, that mix genotypes with two and three alleles, or that have a genotype of only wild-type
+    alleles whose locus is not in *locus_map*, are reported in the errors of the result and have no genotypes.
+    Entries that are not strings or null raise a TypeError.
+    """
+    genotypes, locus_map, wild_type = getargs('genotypes', 'locus_map', 'wild_type', kwargs)
+    strings = pd.Series(list(genotypes), dtype=object)
+    invalid = strings.map(lambda s: not isinstance(s, str) and not (pd.api.types.is_scalar(s) and pd.isna(s)))
+    if invalid.any():
+        positions = np.flatnonzero(invalid.to_numpy())
+        raise TypeError("Genotype strings must be str or None, got %s at positions %s."
+                        % (type(strings.iat[positions[0]]).__name__, positions.tolist()))
+    strings[strings.map(lambda s: isinstance(s, str) and not s.strip())] = None
+    codes, uniques = pd.factorize(strings)
+
+    # tokenize the genotype of each locus of each distinct string with one compiled pattern
+    parts = [(i, part) for i, string in enumerate(uniques) for part in string.split(';') if part.strip()]
+    rows = pd.DataFrame([m.groups() if m else (None, None, None) for m in map(_PART.match, (p for _, p in parts))],
+                        columns=['allele1', 'allele2', 'allele3'])
+
+    named = rows.where(~rows.isin(list(wild_type)))
+    named = named['allele1'].fillna(named['allele2']).fillna(named['allele3']).dropna()
+    locus = pd.Series([m.group().strip() if m else None for m in map(_LOCUS.match, named)], index=named.index,
+                      dtype=object).reindex(rows.index)
+    if locus_map:
+        mapped = [rows[c].map(locus_map) for c in rows.columns]
+        locus = mapped[0].fillna(mapped[1]).fillna(mapped[2]).fillna(locus)
+    rows.insert(0, 'locus', locus)
+    rows.index = np.array([i for i, _ in parts], dtype=np.int64)  # the distinct string of each genotype
+
+    bad = (rows['allele1'].isna() | rows['locus'].isna() | (rows['locus'] == '')).groupby(level=0).any()
+    has_allele3 = rows['allele3'].notna().groupby(level=0)
+    bad |= has_allele3.any() & ~has_allele3.all()
+    bad_codes = bad.index[bad.to_numpy()]
+    rows = rows[~rows.index.isin(bad_codes)]
+
+    positions = np.flatnonzero(np.isin(codes, bad_codes))
+    errors = {int(i): strings.iat[i] for i in positions}
+    return ParsedGenotypes(codes, len(uniques), rows, errors)
+
+
+@docval({'name': 'subjects', 'type': ('array_data', 'data'),
+         'doc': 'the GenotypeSubjects. Subjects that already have a genotypes table are skipped'},
+        {'name': 'locus_map', 'type': dict, 'doc': 'map from allele symbol to locus', 'default': None},
+        {'name': 'wild_type', 'type': ('array_data', 'data'),
+         'doc': 'the symbols of wild-type alleles, which do not name a locus', 'default': ('wt', '+')},
+        {'name': 'process', 'type': str, 'doc': 'the process of the created genotypes tables', 'default': None},
+        returns='the unparseable genotype strings by position of the subject', rtype=dict, is_method=False)
+def add_genotypes_tables_from_strings(**kwargs):
+    """
+    Create the genotypes table of each of the given GenotypeSubjects from its genotype string, parsing all the
+    strings at once with parse_genotype_strings.
+    """
+    subjects, locus_map, wild_type, process = getargs('subjects', 'locus_map', 'wild_type', 'process', kwargs)
+    subjects = list(subjects)
+    todo = [i for i, s in enumerate(subjects) if s.genotypes_table is None]
+    parsed = parse_genotype_strings([subjects[i].genotype for i in todo], locus_map=locus_map, wild_type=wild_type)
+    for j, i in enumerate(todo):
+        table = parsed.genotypes_table(j, process=process)
+        if table is not None:
+            subjects[i].genotypes_table = table
+    return {todo[j]: genotype for j, genotype in parsed.errors.items()}
@@ -1,3 +1,5 @@
+import threading
+
 from pynwb import register_class
 from pynwb.file import Subject
 from hdmf.utils import docval, get_docval, call_docval_func, popargs
@@ -25,8 +27,20 @@ class GenotypeSubject(Subject):
         genotypes_table = popargs('genotypes_table', kwargs)
         call_docval_func(super().__init__, kwargs)
         self.genotypes_table = genotypes_table
+        self._lock = threading.Lock()
 
     def add_genotype(self, **kwargs):
-        if self.genotypes_table is None:
-            self.genotypes_table = GenotypesTable()
+        # the genotypes table is created once when genotypes are added from several threads
+        with self._lock:
+            if self.genotypes_table is None:
+                self.genotypes_table = GenotypesTable()
         self.genotypes_table.add_row(**kwargs)
+
+    def __reduce_ex__(self, protocol):
+        # pickle the fields, and the genotypes table compactly, but not the parent, e.g., the NWBFile
+        fields = {arg['name']: getattr(self, arg['name']) for arg in get_docval(GenotypeSubject.__init__)}
+        return _genotype_subject_from_fields, ({name: value for name, value in fields.items() if value is not None}, )
+
+
+def _genotype_subject_from_fields(fields):
+    return GenotypeSubject(**fields)
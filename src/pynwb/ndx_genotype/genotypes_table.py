@@ -1,41 +1,186 @@
-import numpy as np
+import bisect
+import threading
 import warnings
 
+import numpy as np
+
 from pynwb import register_class
 from pynwb.core import DynamicTable
+from hdmf.container import Data
 from hdmf.utils import docval, get_docval, getargs, popargs, call_docval_func, AllowPositional
+from hdmf.common import VectorData, VectorIndex, ElementIdentifiers, DynamicTableRegion
 from hdmf.common.resources import Key
 
+from . import _arrays, serialization
+from ._row_buffer import RowBuffer, StringCodes, RaggedStringCodes, Integers
+from .diff import diff_genotypes_tables
+from ._spec_columns import ALLELES_TABLE_COLUMNS, GENOTYPES_TABLE_COLUMNS, COLUMN_DTYPES
+from .resource_cache import ResourceCache
+from .snapshot import AllelesSnapshot, GenotypesSnapshot
+from .symbol_index import SymbolIndex
+
+
+def _check_column_values(data_type, name, values, ragged=False):
+    """Check that all values given for a column in bulk have the Python type of the column defined in the spec."""
+    dtype = COLUMN_DTYPES[data_type][name]
+    if dtype is int:
+        dtype = (int, np.integer)
+    for value in values:
+        if ragged:
+            if not isinstance(value, (list, tuple)) or not all(isinstance(v, dtype) for v in value):
+                raise TypeError("%s.%s: each row must be a list of %s, got %r" % (data_type, name, dtype, value))
+        elif not isinstance(value, dtype) or isinstance(value, bool):
+            raise TypeError("%s.%s: incorrect type for value %r (expected %s)" % (data_type, name, value, dtype))
+
+
+_ALLELE_COLUMN_NAMES = tuple(c['name'] for c in ALLELES_TABLE_COLUMNS)
+_RAGGED_ALLELE_COLUMNS = tuple(c['name'] for c in ALLELES_TABLE_COLUMNS if c.get('index'))
+_GENOTYPE_COLUMN_NAMES = tuple(c['name'] for c in GENOTYPES_TABLE_COLUMNS)
+
+_match_arg = {
+    'name': 'match',
+    'type': str,
+    'doc': ("how allele symbols are matched: 'exact', or 'normalized' to also match symbols that differ only in case, "
+            "punctuation or whitespace, and synonyms added with AllelesTable.add_allele_synonyms"),
+    'enum': ('exact', 'normalized'),
+    'default': 'exact',
+}
+
+
+def _extend_ragged(index, rows):
+    """Append the given list of lists to an indexed column, updating the VectorIndex once for all rows."""
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    offsets = len(index.target) + np.cumsum(lengths)
+    index.target.extend([v for row in rows for v in row])
+    if len(offsets):
+        uint = _offset_type(index, int(offsets[-1]))
+        Data.extend(index, [uint(o) for o in offsets])
+
+
+def _offset_type(index, max_offset):
+    """
+    Return the unsigned integer type for the offsets of the given VectorIndex up to max_offset, like
+    VectorIndex.add_vector: the smallest type that holds max_offset, or the type of the offsets of the index if that is
+    larger. The offsets of an index whose data is a list are converted to the returned type, if they are of another.
+    """
+    uint = np.min_scalar_type(max_offset)
+    if isinstance(index.data, list) and len(index.data):
+        current = np.asarray(index.data[-1]).dtype
+        if current.kind == 'u' and current.itemsize >= uint.itemsize:
+            return current.type
+        index.data[:] = [uint.type(o) for o in index.data]
+    return uint.type
+
+
+def _new_ids(ids, count):
+    """
+    Return the IDs of count new rows of a table with the given row IDs: consecutive IDs after the largest ID, which
+    are the indices of the new rows if the IDs are the row indices.
+    """
+    start = int(np.max(ids[:])) + 1 if len(ids) else 0
+    return range(start, start + count)
+
+
+def _format_near_misses(near_misses):
+    """Return a sentence listing the closest symbols of the given symbols that were not found, if there are any."""
+    near_misses = {symbol: closest for symbol, closest in near_misses.items() if closest}
+    if not near_misses:
+        return ''
+    return ' Closest symbols: %s.' % '; '.join("'%s' -> %s" % (symbol, closest)
+                                               for symbol, closest in sorted(near_misses.items()))
+
+
+class _ColumnAttribute:
+    """
+    The attribute of a table for a column defined in the spec, e.g., GenotypesTable.locus, which DynamicTable sets
+    when the column is added. Getting it writes the rows buffered by add_allele or add_genotype to the columns first.
+    """
+
+    def __init__(self, name):
+        self.__name = name
+
+    def __get__(self, table, owner=None):
+        if table is None:
+            return self
+        if self.__name not in table.__dict__:
+            raise AttributeError(self.__name)
+        table._flush_rows()
+        return table.__dict__[self.__name]
+
+    def __set__(self, table, value):
+        table.__dict__[self.__name] = value
+
+
+class _BufferedRowsMixin:
+    """
+    Buffering of the rows added one at a time to a table, in a RowBuffer of typed NumPy arrays.
+
+    The buffered rows are written to the columns of the table in one bulk extend when the table is first read after
+    they were added, through the columns, the row IDs, indexing, get, to_dataframe or len, or when it is written.
+    Subclasses create self._row_buffer and self._lock before calling DynamicTable.__init__, and implement
+    _extend_rows.
+
+    The lock makes adding rows from several threads safe; it does not make it faster. Rows are added by Python code
+    that holds the GIL, so the total rate of adding rows is about the same with 1 or 16 threads.
+    """
+
+    def _flush_rows(self):
+        """Write the buffered rows to the columns of the table."""
+        if not len(self._row_buffer):
+            return
+        with self._lock:
+            columns = self._row_buffer.take()
+            if columns:
+                self._extend_rows(columns)
+
+    def _num_rows(self):
+        """Return the number of rows of the table, including the buffered rows, without writing them."""
+        return len(DynamicTable.id.fget(self)) + len(self._row_buffer)
+
+    def _extend_ids(self, num_rows):
+        ids = DynamicTable.id.fget(self)
+        Data.extend(ids, _new_ids(ids.data, num_rows))
+
+    @property
+    def id(self):
+        self._flush_rows()
+        return DynamicTable.id.fget(self)
+
+    @id.setter
+    def id(self, value):
+        DynamicTable.id.fset(self, value)
+
+    @property
+    def columns(self):
+        self._flush_rows()
+        return DynamicTable.columns.fget(self)
+
+    @columns.setter
+    def columns(self, value):
+        DynamicTable.columns.fset(self, value)
+
+    def __getitem__(self, key):
+        self._flush_rows()
+        return super().__getitem__(key)
+
+    def get(self, *args, **kwargs):
+        self._flush_rows()
+        return super().get(*args, **kwargs)
+
+    def to_dataframe(self, *args, **kwargs):
+        self._flush_rows()
+        return super().to_dataframe(*args, **kwargs)
+
+    def add_column(self, *args, **kwargs):
+        self._flush_rows()
+        return super().add_column(*args, **kwargs)
+
 
 @register_class('AllelesTable', 'ndx-genotype')
-class AllelesTable(DynamicTable):
+class AllelesTable(_BufferedRowsMixin, DynamicTable):
     """A table to hold structured allele information."""
 
-    __columns__ = (
-        {'name': 'symbol',
-         'description': 'Symbol/name of the allele.',
-         'required': True},
-        {'name': 'recombinase',
-         'description': ('An enzyme that mediates a recombination exchange'
-                         'reaction between two DNA templates, each containing a specific recognition site.'),
-         'required': False,
-         'index': True},
-        {'name': 'reporter',
-         'description': ('Sequence that forms all or part of the protein product encoded by a'
-                         'transgenic locus or modified endogenous locus and that encodes an enzyme'
-                         'whose activity can be used to detect the presence of that protein product.'),
-         'required': False,
-         'index': True},
-        {'name': 'promoter',
-         'description': ('A DNA sequence at which RNA polymerase binds and initiates transcription.'),
-         'required': False,
-         'index': True},
-        {'name': 'recombinase_recognition_site',
-         'description': ('Site where recombination occurs mediated by a specific recombinase, leading to'
-                         'integration, deletion or inversion of a DNA fragment.'),
-         'required': False,
-         'index': True}
-    )
+    __columns__ = ALLELES_TABLE_COLUMNS
 
     @docval(
         {
@@ -53,8 +198,88 @@ class AllelesTable(DynamicTable):
         },
     )
     def __init__(self, **kwargs):
+        self._lock = threading.RLock()
+        self._row_buffer = RowBuffer(
+            [('symbol', StringCodes)] + [(name, RaggedStringCodes) for name in _RAGGED_ALLELE_COLUMNS])
+        self.__symbol_index = dict()  # the index of the first allele with each symbol
+        self.__duplicate_symbols = set()
+        self.__num_indexed = 0  # the number of alleles in the symbol index
+        self.__normalized_index = SymbolIndex()  # normalized symbols and synonyms, updated when first needed
+        self.__sparse_columns = frozenset()
         call_docval_func(super().__init__, kwargs)
 
+    @property
+    def sparse_columns(self):
+        """
+        The optional ragged columns, e.g., recombinase, that are written sparsely when few rows have values. By
+        default, all columns are written as regular ragged columns.
+
+        A sparse column is written to the '<column>_sparse_values', '<column>_sparse_index' and '<column>_rows'
+        datasets instead of the '<column>' and '<column>_index' columns, and is not listed in colnames. The file is
+        still a valid DynamicTable, but readers without this extension's Python API see the table without the sparse
+        columns. Tables read from a file have the columns that were stored sparsely.
+        """
+        return self.__sparse_columns
+
+    @sparse_columns.setter
+    def sparse_columns(self, columns):
+        columns = frozenset(columns)
+        unknown = sorted(columns.difference(_RAGGED_ALLELE_COLUMNS))
+        if unknown:
+            raise ValueError("Columns %s cannot be stored sparsely. Sparse columns must be in %s."
+                             % (unknown, list(_RAGGED_ALLELE_COLUMNS)))
+        self.__sparse_columns = columns
+
+    @docval(*get_docval(DynamicTable.add_row), allow_extra=True)
+    def add_row(self, **kwargs):
+        """Add a row to the table. Rows may be added from several threads."""
+        with self._lock:
+            self._flush_rows()
+            super().add_row(**kwargs)
+
+    def _extend_rows(self, columns):
+        self._extend_ids(len(columns['symbol']))
+        self.symbol.extend(columns['symbol'])
+        for name in _RAGGED_ALLELE_COLUMNS:
+            if name in columns:
+                _extend_ragged(self[name], columns[name])
+
+    def __update_symbol_index(self):
+        """Add the symbols of the alleles that were added without add_allele, e.g., in bulk, to the symbol index."""
+        num_rows = self._num_rows()
+        if self.__num_indexed < num_rows:
+            data = self['symbol'].data
+            for i, symbol in enumerate(_arrays.decode_strings(data[self.__num_indexed:]), self.__num_indexed):
+                self.__index_symbol(symbol, i)
+            self.__num_indexed = num_rows
+
+    def __index_symbol(self, symbol, index):
+        if self.__symbol_index.setdefault(symbol, index) != index:
+            self.__duplicate_symbols.add(symbol)
+
+    def __update_normalized_index(self):
+        """Add the symbols of the alleles that were added since the normalized index was last used to it."""
+        num_indexed = len(self.__normalized_index)
+        if num_indexed < self._num_rows():
+            self.__normalized_index.extend(_arrays.decode_strings(self['symbol'].data[num_indexed:]))
+
+    def __find_symbol(self, symbol, match):
+        """Return the index of the allele with the given symbol, or None if not found. Call with the lock held."""
+        self.__update_symbol_index()
+        index = self.__symbol_index.get(symbol)
+        if symbol in self.__duplicate_symbols:
+            warnings.warn("Multiple rows in alleles table contain symbol '%s'. Using the first match." % symbol)
+        if index is None and match == 'normalized':
+            self.__update_normalized_index()
+            index = self.__normalized_index.get(symbol)
+        return index
+
+    def __can_buffer(self, kwargs):
+        """Return whether a row can be buffered, i.e., it has a value for exactly the columns of the table."""
+        if any(name not in _ALLELE_COLUMN_NAMES for name in kwargs):
+            return False
+        return all((kwargs.get(name) is None) == (name not in self) for name in _RAGGED_ALLELE_COLUMNS)
+
     @docval(
             {'name': 'symbol',
              'type': str,
@@ -82,32 +307,184 @@ class AllelesTable(DynamicTable):
             allow_extra=True,
             allow_positional=AllowPositional.ERROR)
     def add_allele(self, **kwargs):
-        """Add an allele to this table. Return the row index of the new allele."""
+        """
+        Add an allele to this table. Return the row index of the new allele.
+
+        Alleles may be added from several threads. The check for a duplicate symbol and the addition of the row are
+        done under the lock of the table, so each symbol is added once and each thread gets the index of its allele.
+        The row is buffered and written to the columns in bulk when the table is next read.
+        """
         symbol = getargs('symbol', kwargs)
-        if symbol in self.symbol:
-            raise ValueError("Allele symbol '%s' already exists in AllelesTable." % symbol)
-        # get the index of the new allele in the table, which will be the ID if passed, or the table length if
-        # auto-incremented
-        ind = len(self)
-        super().add_row(**kwargs)
+        for name in _RAGGED_ALLELE_COLUMNS:
+            if isinstance(kwargs.get(name), str):
+                kwargs[name] = [kwargs[name]]
+        with self._lock:
+            self.__update_symbol_index()
+            if symbol in self.__symbol_index:
+                raise ValueError("Allele symbol '%s' already exists in AllelesTable." % symbol)
+            # get the index of the new allele in the table, which will be the ID if passed, or the table length if
+            # auto-incremented
+            ind = self._num_rows()
+            if self.__can_buffer(kwargs):
+                self._row_buffer.append({name: value for name, value in kwargs.items() if value is not None})
+            else:
+                self._flush_rows()
+                super().add_row(**kwargs)
+            self.__index_symbol(symbol, ind)
+            self.__num_indexed += 1
         return ind
 
+    @docval(
+            {'name': 'symbol',
+             'type': ('array_data', 'data'),
+             'doc': 'Symbols/names of the alleles. These must be unique in the table.'},
+            {'name': 'recombinase',
+             'type': ('array_data', 'data'),
+             'doc': 'For each allele, the list of recombinases.',
+             'default': None},
+            {'name': 'reporter',
+             'type': ('array_data', 'data'),
+             'doc': 'For each allele, the list of reporters.',
+             'default': None},
+            {'name': 'promoter',
+             'type': ('array_data', 'data'),
+             'doc': 'For each allele, the list of promoters.',
+             'default': None},
+            {'name': 'recombinase_recognition_site',
+             'type': ('array_data', 'data'),
+             'doc': 'For each allele, the list of recombinase recognition sites.',
+             'default': None},
+            allow_positional=AllowPositional.ERROR)
+    def add_alleles(self, **kwargs):
+        """
+        Add many alleles to this table at once. Return the row indices of the new alleles.
+
+        This is the bulk alternative to calling add_allele for each allele. The values are checked once against the
+        column definitions generated from the spec, and each column is then extended in one step. Like add_allele,
+        this may be called from several threads.
+        """
+        with self._lock:
+            self._flush_rows()
+            return self.__add_alleles(kwargs)
+
+    def __add_alleles(self, kwargs):
+        symbols = list(getargs('symbol', kwargs))
+        _check_column_values('AllelesTable', 'symbol', symbols)
+        duplicates = (set(_arrays.allele_symbols(self)) & set(symbols)) if len(self) else set()
+        if len(set(symbols)) != len(symbols):
+            duplicates.update(s for s in symbols if symbols.count(s) > 1)
+        if duplicates:
+            raise ValueError("Allele symbols %s already exist in AllelesTable." % sorted(duplicates))
+
+        ragged = dict()
+        for col in self.__columns__:
+            name = col['name']
+            values = kwargs.get(name) if name != 'symbol' else None
+            if values is not None:
+                values = list(values)
+                if len(values) != len(symbols):
+                    raise ValueError("'%s' must have the same length as 'symbol'." % name)
+                _check_column_values('AllelesTable', name, values, ragged=True)
+                if name not in self:
+                    if len(self) > 0:
+                        raise ValueError("Column '%s' must be provided for the first alleles added to the table."
+                                         % name)
+                    self.add_column(name=name, description=col['description'], index=True)
+                ragged[name] = values
+            elif name in self and name != 'symbol':
+                ragged[name] = [[] for _ in symbols]
+
+        start = len(self)
+        Data.extend(self.id, _new_ids(self.id.data, len(symbols)))
+        self.symbol.extend(symbols)
+        for name, values in ragged.items():
+            _extend_ragged(self[name], values)
+        return list(range(start, start + len(symbols)))
+
     @docval(
         {
             'name': 'symbol',
             'type': str,
             'doc': 'The symbol to search for.',
         },
+        _match_arg,
     )
     def get_allele_index(self, **kwargs):
-        """Return the index of the allele with the given symbol from the alleles table, or None if not found."""
-        symbol = getargs('symbol', kwargs)
-        index = np.where(np.array(self.symbol.data) == symbol)[0]
-        if len(index) == 0:
-            return None
-        elif len(index) > 1:
-            warnings.warn("Multiple rows in alleles table contain symbol '%s'. Using the first match." % symbol)
-        return index[0]
+        """
+        Return the index of the allele with the given symbol from the alleles table, or None if not found. An exact
+        match is used before a normalized one.
+        """
+        symbol, match = getargs('symbol', 'match', kwargs)
+        with self._lock:
+            return self.__find_symbol(symbol, match)
+
+    @docval(
+        {
+            'name': 'synonyms',
+            'type': dict,
+            'doc': ('map from synonym to the symbol of an allele in the table, e.g., '
+                    "{'Pvalb-cre': 'Pvalb-IRES-Cre'}"),
+        },
+    )
+    def add_allele_synonyms(self, **kwargs):
+        """
+        Add synonyms of the symbols of alleles in this table, e.g., from the synonym lists of MGI. Synonyms are
+        normalized like the symbols, and are matched by get_allele_index and the bulk methods with match='normalized'
+        when no symbol matches. Synonyms are held in memory only and are not written to the file.
+        """
+        synonyms = getargs('synonyms', kwargs)
+        with self._lock:
+            self.__update_symbol_index()
+            missing = sorted(set(s for s in synonyms.values() if s not in self.__symbol_index))
+            if missing:
+                raise ValueError("Allele symbols %s not found in alleles table." % missing)
+            self.__update_normalized_index()
+            for synonym, symbol in synonyms.items():
+                self.__normalized_index.add_synonym(synonym, symbol)
+
+    @docval(
+        {'name': 'symbol', 'type': str, 'doc': 'The symbol to find the closest symbols to.'},
+        {'name': 'limit', 'type': int, 'doc': 'The maximum number of symbols to return.', 'default': 5},
+        {'name': 'cutoff', 'type': float,
+         'doc': 'The minimum similarity, between 0 and 1, of the normalized symbols returned.', 'default': 0.6},
+        returns='the symbols of the alleles closest to the given symbol, from closest to farthest', rtype=list,
+    )
+    def suggest_alleles(self, **kwargs):
+        """
+        Return the symbols of the alleles in this table that are closest to the given symbol, e.g., to report a typo
+        in a symbol that was not found. Synonyms that are close to the symbol are returned as the symbols they stand
+        for.
+        """
+        symbol, limit, cutoff = getargs('symbol', 'limit', 'cutoff', kwargs)
+        with self._lock:
+            self.__update_normalized_index()
+            return self.__normalized_index.suggest(symbol, limit=limit, cutoff=cutoff)
+
+    @docval(
+        {'name': 'symbols', 'type': ('array_data', 'data'), 'doc': 'The symbols to resolve.'},
+        _match_arg,
+        {'name': 'suggestions', 'type': int,
+         'doc': 'The maximum number of closest symbols to return for each symbol that is not found.', 'default': 3},
+        returns=('the index of the allele of each symbol, or None if not found, and a dict from each distinct symbol '
+                 'that was not found to the closest symbols in the table'),
+        rtype=tuple,
+    )
+    def resolve_alleles(self, **kwargs):
+        """
+        Resolve many allele symbols at once, e.g., those of a large import, and report the near-misses of those that
+        are not found in the same pass. Each distinct symbol is looked up once.
+        """
+        symbols, match, suggestions = getargs('symbols', 'match', 'suggestions', kwargs)
+        symbols = list(symbols)
+        near_misses = dict()
+        with self._lock:
+            distinct = {symbol: self.__find_symbol(symbol, match) for symbol in dict.fromkeys(symbols)}
+            missing = [symbol for symbol, index in distinct.items() if index is None]
+            if missing:
+                self.__update_normalized_index()
+                for symbol in missing:
+                    near_misses[symbol] = self.__normalized_index.suggest(symbol, limit=suggestions)
+        return [distinct[symbol] for symbol in symbols], near_misses
 
     @docval({'name': 'column', 'type': str,
              'doc': ('the column in the AllelesTable for the external resource '
@@ -118,7 +495,11 @@ class AllelesTable(DynamicTable):
             {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource to be created', 'default': None},
             {'name': 'resource_uri', 'type': str, 'doc': 'the uri of the resource to be created', 'default': None},
             {'name': 'entity_id', 'type': str, 'doc': 'the identifier for the entity at the resource', 'default': None},
-            {'name': 'entity_uri', 'type': str, 'doc': 'the URI for the identifier at the resource', 'default': None})
+            {'name': 'entity_uri', 'type': str, 'doc': 'the URI for the identifier at the resource', 'default': None},
+            {'name': 'resource_cache', 'type': ResourceCache,
+             'doc': ('a cache of resource records. If provided, the record is added to the cache, or looked up in the '
+                     'cache by key and resource name if only those are provided'),
+             'default': None})
     def add_external_resource(self, **kwargs):
         attribute = kwargs['column']
         key = kwargs['key']
@@ -126,6 +507,7 @@ class AllelesTable(DynamicTable):
         resource_uri = kwargs['resource_uri']
         entity_id = kwargs['entity_id']
         entity_uri = kwargs['entity_uri']
+        resource_cache = kwargs['resource_cache']
 
         # assert that column name needs to be one of the columns in AllelesTable
         if attribute not in self.colnames:
@@ -137,6 +519,9 @@ class AllelesTable(DynamicTable):
             msg = "AllelesTable must have a ERNWBFile as an ancestor to associate with ExternalResources"
             raise ValueError(msg)
 
+        if resource_cache is not None:
+            return resource_cache.add_ref(nwbfile.external_resources, self, attribute, key, resource_name,
+                                          resource_uri, entity_id, entity_uri)
         er = nwbfile.external_resources.add_ref(
             container=self,
             attribute=attribute,
@@ -148,11 +533,52 @@ class AllelesTable(DynamicTable):
         )
         return er
 
+    def freeze(self):
+        """Return an immutable, array-backed AllelesSnapshot of the contents of this table."""
+        return AllelesSnapshot.from_table(self)
+
+    def __reduce_ex__(self, protocol):
+        # pickle only the columns as arrays, not the hdmf container state
+        return _alleles_table_from_state, (serialization.alleles_table_state(self, _RAGGED_ALLELE_COLUMNS), )
+
+
+def _alleles_table_from_state(state):
+    """Return a new AllelesTable with the contents returned by serialization.alleles_table_state."""
+    description, buffer, offsets = state['symbol']
+    columns = [VectorData(name='symbol', description=description,
+                          data=serialization.decode_strings(buffer, offsets))]
+    for name, (description, buffer, value_offsets, offsets) in state['columns'].items():
+        target = VectorData(name=name, description=description,
+                            data=serialization.decode_strings(buffer, value_offsets))
+        columns += [target, VectorIndex(name=name + '_index', data=offsets.tolist(), target=target)]
+    alleles_table = AllelesTable(name=state['name'], description=state['description'],
+                                 id=ElementIdentifiers(name='id', data=state['id'].tolist()), columns=columns)
+    alleles_table.sparse_columns = state['sparse_columns']
+    return alleles_table
+
+
+for _name in _ALLELE_COLUMN_NAMES + tuple(name + '_index' for name in _RAGGED_ALLELE_COLUMNS):
+    setattr(AllelesTable, _name, _ColumnAttribute(_name))
+
 # NOTE: cannot write an empty genotypes table
 
 
+class _LocusSequence:
+    """A read-only sequence view of locus column data for bisect, which reads and decodes one value at a time."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        value = self.data[i]
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
 @register_class('GenotypesTable', 'ndx-genotype')
-class GenotypesTable(DynamicTable):
+class GenotypesTable(_BufferedRowsMixin, DynamicTable):
     """A table to hold structured genotype information."""
 
     __fields__ = (
@@ -163,29 +589,7 @@ class GenotypesTable(DynamicTable):
         {'name': 'alleles_table', 'child': True, 'required_name': 'alleles_table'},
     )
 
-    __columns__ = (
-        {'name': 'locus',
-         'description': 'Symbol/name of the locus.',
-         'required': True},
-        {'name': 'allele1',
-         'description': ('The index or symbol of the first allele in the alleles table. Providing '
-                         'the index is more efficient than providing the symbol, which requires a search through the '
-                         'alleles table.'),
-         'table': True,
-         'required': True},
-        {'name': 'allele2',
-         'description': ('The index or symbol of the second allele in the alleles table. Providing '
-                         'the index is more efficient than providing the symbol, which requires a search through the '
-                         'alleles table.'),
-         'table': True,
-         'required': True},
-        {'name': 'allele3',
-         'description': ('The index or symbol of the third allele in the alleles table. Providing '
-                         'the index is more efficient than providing the symbol, which requires a search through the '
-                         'alleles table.'),
-         'table': True,
-         'required': False},
-    )
+    __columns__ = GENOTYPES_TABLE_COLUMNS
 
     @docval(
         {
@@ -232,9 +636,19 @@ class GenotypesTable(DynamicTable):
             'doc': 'The table of alleles for a genotype. If not provided, an AllelesTable will be created.',
             'default': None,
         },
+        {
+            'name': 'sorted_by',
+            'type': str,
+            'doc': ("The column that the rows are sorted by, i.e., 'locus', or None. Use sort_by_locus to sort the "
+                    "rows of a new table."),
+            'default': None,
+        },
         allow_positional=AllowPositional.ERROR,
     )
     def __init__(self, **kwargs):
+        self._lock = threading.RLock()
+        self._row_buffer = RowBuffer([('locus', StringCodes), ('allele1', Integers), ('allele2', Integers),
+                                      ('allele3', Integers)])
         call_docval_func(super().__init__, kwargs)
         self.process = getargs('process', kwargs)
         self.process_url = getargs('process_url', kwargs)
@@ -249,6 +663,83 @@ class GenotypesTable(DynamicTable):
             self['allele2'].table = self.alleles_table
         if self.allele3 is not None and self['allele3'].table is None:
             self['allele3'].table = self.alleles_table
+        sorted_by = getargs('sorted_by', kwargs)
+        if sorted_by not in (None, 'locus'):
+            raise ValueError("'sorted_by' must be 'locus' or None, not '%s'." % sorted_by)
+        self._sorted_by = sorted_by
+
+    @property
+    def sorted_by(self):
+        """
+        The column that the rows are sorted by, i.e., 'locus', or None. Adding rows out of order resets this to None.
+        """
+        return self._sorted_by
+
+    def sort_by_locus(self):
+        """
+        Sort the rows of this table by locus, keeping the order of the rows with the same locus, and mark the table as
+        sorted. When written, the rows are stored in this order and get_locus_rows on the table read from the file
+        reads only the rows it needs.
+
+        Only tables whose columns are in memory can be sorted, i.e., a table must be sorted before it is written. A
+        table read from a file is not sorted in place, because the sorted_by attribute of the file would not be
+        written. Add its rows to a new GenotypesTable instead, and sort and write that.
+        """
+        with self._lock:
+            self._flush_rows()
+            order = np.argsort(_arrays.loci(self), kind='stable')
+            for column in [self.id] + list(self.columns):
+                if not isinstance(column.data, list):
+                    raise ValueError("Cannot sort GenotypesTable '%s' because the data of '%s' is not a list. Tables "
+                                     "must be sorted before they are written." % (self.name, column.name))
+                column.data[:] = [column.data[i] for i in order]
+            self._sorted_by = 'locus'
+
+    def _check_sorted(self, start):
+        """Reset sorted_by if the rows from *start* on, which were just added, are out of locus order."""
+        if self._sorted_by is None or start >= len(self):
+            return
+        loci = _arrays.decode_strings(self['locus'].data[max(start - 1, 0):])
+        if (loci[1:] < loci[:-1]).any():
+            self._sorted_by = None
+
+    @docval({'name': 'locus', 'type': str, 'doc': 'the locus to search for'},
+            returns='the indices of the rows with the given locus', rtype=np.ndarray)
+    def get_locus_rows(self, **kwargs):
+        """
+        Return the indices of the rows with the given locus. If the table is sorted by locus, the rows are found by
+        binary search, which reads only a few values of a locus column in a file, otherwise all loci are compared.
+        """
+        locus = getargs('locus', kwargs)
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+        if self._sorted_by != 'locus':
+            return np.flatnonzero(_arrays.loci(self) == locus)
+        loci = _LocusSequence(self['locus'].data)
+        start = bisect.bisect_left(loci, locus)
+        return np.arange(start, bisect.bisect_right(loci, locus, lo=start), dtype=np.int64)
+
+    @docval(*get_docval(DynamicTable.add_row), allow_extra=True)
+    def add_row(self, **kwargs):
+        """Add a row to the table. Rows may be added from several threads."""
+        with self._lock:
+            start = len(self)
+            super().add_row(**kwargs)
+            self._check_sorted(start)
+
+    def _extend_rows(self, columns):
+        self._extend_ids(len(columns['locus']))
+        for name, values in columns.items():
+            self[name].extend(values)
+
+    def __can_buffer(self, kwargs):
+        """
+        Return whether a row can be buffered, i.e., it has a value for exactly the columns of the table and the table
+        is not sorted, so that the order of the rows need not be checked.
+        """
+        if self._sorted_by is not None or any(name not in _GENOTYPE_COLUMN_NAMES for name in kwargs):
+            return False
+        return (kwargs.get('allele3') is None) == ('allele3' not in self)
 
     @docval(
         {
@@ -302,52 +793,63 @@ class GenotypesTable(DynamicTable):
             'doc': 'The URI for the locus entity',
             'default': None,
         },
+        {
+            'name': 'resource_cache',
+            'type': ResourceCache,
+            'doc': ('A cache of resource records. If provided, the locus record is added to the cache, or looked up '
+                    'in the cache if only the locus resource name is provided.'),
+            'default': None,
+        },
+        _match_arg,
         allow_extra=True,
         allow_positional=AllowPositional.ERROR,
     )
     def add_genotype(self, **kwargs):
-        """Add a genotype to this table."""
+        """
+        Add a genotype to this table. The row is buffered and written to the columns in bulk when the table is next
+        read.
+        """
 
         locus = getargs('locus', kwargs)
+        match = popargs('match', kwargs)
         # if the allele symbol is passed in, get the index of the allele and use that in add_row
-        allele1 = getargs('allele1', kwargs)
-        if isinstance(allele1, str):
-            allele1_ind = self.get_allele_index(allele1)
-            if allele1_ind is None:
-                raise ValueError("'allele1' symbol '%s' not found in alleles table. Please first add the allele "
-                                 "using GenotypeTable.add_allele()." % allele1)
-            kwargs['allele1'] = allele1_ind
-        allele2 = getargs('allele2', kwargs)
-        if isinstance(allele2, str):
-            allele2_ind = self.get_allele_index(allele2)
-            if allele2_ind is None:
-                raise ValueError("'allele2' symbol '%s' not found in alleles table. Please first add the allele "
-                                 "using GenotypeTable.add_allele()." % allele1)
-            kwargs['allele2'] = allele2_ind
         # NOTE if allele3 is provided for any genotype, then a non-None allele3
         # value must be provided for all genotypes...
-        allele3 = getargs('allele3', kwargs)
-        if allele3 is not None and isinstance(allele3, str):
-            allele3_ind = self.get_allele_index(allele3)
-            if allele3_ind is None:
-                raise ValueError("'allele3' symbol '%s' not found in alleles table. Please first add the allele "
-                                 "using GenotypeTable.add_allele()." % allele1)
-            kwargs['allele3'] = allele3_ind
+        for name in ('allele1', 'allele2', 'allele3'):
+            allele = kwargs[name]
+            if isinstance(allele, str):
+                allele_ind = self.get_allele_index(allele, match=match)
+                if allele_ind is None:
+                    raise ValueError("'%s' symbol '%s' not found in alleles table. Please first add the allele "
+                                     "using GenotypeTable.add_allele().%s"
+                                     % (name, allele, _format_near_misses(
+                                         {allele: self.alleles_table.suggest_alleles(allele, limit=3)})))
+                kwargs[name] = allele_ind
 
         locus_resource_name = popargs('locus_resource_name', kwargs)
         locus_resource_uri = popargs('locus_resource_uri', kwargs)
         locus_entity_id = popargs('locus_entity_id', kwargs)
         locus_entity_uri = popargs('locus_entity_uri', kwargs)
-        super().add_row(**kwargs)
-
-        if self.allele3 is not None and self['allele3'].table is None:
-            self['allele3'].table = self.alleles_table
-
-        nwbfile = self.get_ancestor(data_type='ERNWBFile')  # TODO changeme to NWBFile after migration
+        resource_cache = popargs('resource_cache', kwargs)
+        with self._lock:
+            if self.__can_buffer(kwargs):
+                self._row_buffer.append({name: value for name, value in kwargs.items() if value is not None})
+            else:
+                start = len(self)
+                super().add_row(**kwargs)
+                if self.allele3 is not None and self['allele3'].table is None:
+                    self['allele3'].table = self.alleles_table
+                self._check_sorted(start)
 
+        if (resource_cache is not None and locus_resource_name is not None and
+                (locus_resource_uri is not None or resource_cache.get(locus, locus_resource_name) is not None)):
+            nwbfile = self.get_ancestor(data_type='ERNWBFile')  # TODO changeme to NWBFile after migration
+            resource_cache.add_ref(nwbfile.external_resources, self, 'locus', locus, locus_resource_name,
+                                   locus_resource_uri, locus_entity_id, locus_entity_uri)
         # TODO warn if no external resource information is provided
-        if (locus_resource_name is not None and locus_resource_uri is not None and locus_entity_id is not None and
+        elif (locus_resource_name is not None and locus_resource_uri is not None and locus_entity_id is not None and
                 locus_entity_uri is not None):
+            nwbfile = self.get_ancestor(data_type='ERNWBFile')  # TODO changeme to NWBFile after migration
             nwbfile.external_resources.add_ref(
                 container=self,
                 attribute='locus',
@@ -360,11 +862,152 @@ class GenotypesTable(DynamicTable):
         else:
             warnings.warn("User did not provide ExternalResources parameters. No external resource was created.")
 
+    @docval(
+        {
+            'name': 'locus',
+            'type': ('array_data', 'data'),
+            'doc': 'Symbols/names of the loci.',
+        },
+        {
+            'name': 'allele1',
+            'type': ('array_data', 'data'),
+            'doc': 'The indices or symbols of the first alleles in the alleles table.',
+        },
+        {
+            'name': 'allele2',
+            'type': ('array_data', 'data'),
+            'doc': 'The indices or symbols of the second alleles in the alleles table.',
+        },
+        {
+            'name': 'allele3',
+            'type': ('array_data', 'data'),
+            'doc': 'The indices or symbols of the third alleles in the alleles table.',
+            'default': None,
+        },
+        _match_arg,
+        allow_positional=AllowPositional.ERROR,
+    )
+    def add_genotypes(self, **kwargs):
+        """
+        Add many genotypes to this table at once.
+
+        This is the bulk alternative to calling add_genotype for each genotype. Allele symbols are resolved against
+        the alleles table once for all rows, and all symbols that are not found are reported together with the
+        closest symbols in the table. The values are checked once against the column definitions generated
+        from the spec, and each column is then extended in one step. External resources for the loci are not added
+        by this method. Genotypes may be added from several threads.
+        """
+        with self._lock:
+            self._flush_rows()
+            self.__add_genotypes(kwargs)
+
+    def __add_genotypes(self, kwargs):
+        loci = list(getargs('locus', kwargs))
+        _check_column_values('GenotypesTable', 'locus', loci)
+        match = getargs('match', kwargs)
+        columns = dict()
+        for name in ('allele1', 'allele2', 'allele3'):
+            values = kwargs[name]
+            if values is None:
+                if name in self:
+                    raise ValueError("'%s' must be provided because the table has an '%s' column." % (name, name))
+                continue
+            values = list(values)
+            if len(values) != len(loci):
+                raise ValueError("'%s' must have the same length as 'locus'." % name)
+            symbols = [v for v in values if isinstance(v, str)]
+            if symbols:
+                indices, near_misses = self.alleles_table.resolve_alleles(symbols, match=match)
+                if near_misses:
+                    raise ValueError("'%s' symbols %s not found in alleles table. Please first add the alleles "
+                                     "using GenotypesTable.add_alleles().%s"
+                                     % (name, sorted(near_misses), _format_near_misses(near_misses)))
+                indices = iter(indices)
+                values = [next(indices) if isinstance(v, str) else v for v in values]
+            _check_column_values('GenotypesTable', name, values)
+            if values and not 0 <= min(values) <= max(values) < len(self.alleles_table):
+                raise ValueError("'%s' indices must be between 0 and %d." % (name, len(self.alleles_table) - 1))
+            columns[name] = values
+        if 'allele3' in columns and 'allele3' not in self:
+            if len(self) > 0:
+                raise ValueError("Column 'allele3' must be provided for the first genotypes added to the table.")
+            description = [c['description'] for c in self.__columns__ if c['name'] == 'allele3'][0]
+            self.add_column(name='allele3', description=description, table=True)
+            self['allele3'].table = self.alleles_table
+
+        start = len(self)
+        Data.extend(self.id, _new_ids(self.id.data, len(loci)))
+        self.locus.extend(loci)
+        for name, values in columns.items():
+            Data.extend(self[name], values)
+        self._check_sorted(start)
+
+    @docval({'name': 'resource_cache', 'type': ResourceCache, 'doc': 'the cache of resource records of the loci'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource of the loci, e.g., MGI'},
+            returns='the loci that were not found in the cache', rtype=list)
+    def add_locus_external_resources(self, **kwargs):
+        """
+        Add the external resources of all loci in this table from the records of a resource cache, in bulk. Use this
+        after adding genotypes with add_genotypes, which does not add external resources.
+        """
+        resource_cache, resource_name = getargs('resource_cache', 'resource_name', kwargs)
+        nwbfile = self.get_ancestor(data_type='ERNWBFile')  # TODO changeme to NWBFile after migration
+        if nwbfile is None:
+            raise ValueError("GenotypesTable must have a ERNWBFile as an ancestor to associate with ExternalResources")
+        return resource_cache.add_refs(nwbfile.external_resources, self, 'locus', _arrays.loci(self).tolist(),
+                                       resource_name)
+
     @docval(*get_docval(AllelesTable.add_allele))
     def add_allele(self, **kwargs):
         return self.alleles_table.add_allele(**kwargs)
         # return call_docval_func(self.alleles_table.add_allele, kwargs)
 
+    @docval(*get_docval(AllelesTable.add_alleles))
+    def add_alleles(self, **kwargs):
+        return self.alleles_table.add_alleles(**kwargs)
+
     @docval(*get_docval(AllelesTable.get_allele_index))
     def get_allele_index(self, **kwargs):
         return call_docval_func(self.alleles_table.get_allele_index, kwargs)
+
+    @docval(*get_docval(AllelesTable.add_allele_synonyms))
+    def add_allele_synonyms(self, **kwargs):
+        return call_docval_func(self.alleles_table.add_allele_synonyms, kwargs)
+
+    def freeze(self):
+        """
+        Return an immutable, array-backed GenotypesSnapshot of the contents of this table and its alleles table.
+        The snapshot supports the same lookups as this table using a fraction of the memory.
+        """
+        return GenotypesSnapshot.from_table(self)
+
+    @docval({'name': 'other', 'type': 'GenotypesTable', 'doc': 'the new version of this table'})
+    def diff(self, **kwargs):
+        """
+        Return a GenotypesChangeset of the changes that turn this table into the other table. Apply it with
+        GenotypesChangeset.apply to update this table, or a copy of it in a file, in place.
+        """
+        other = getargs('other', kwargs)
+        return diff_genotypes_tables(self, other)
+
+    def __reduce_ex__(self, protocol):
+        # the alleles table is pickled as an argument, so that tables that share it still share it when unpickled
+        return _genotypes_table_from_state, (serialization.genotypes_table_state(self), self.alleles_table)
+
+
+def _genotypes_table_from_state(state, alleles_table):
+    """Return a new GenotypesTable with the contents returned by serialization.genotypes_table_state."""
+    description, buffer, offsets, codes = state['locus']
+    loci = np.array(serialization.decode_strings(buffer, offsets), dtype=object)
+    columns = [VectorData(name='locus', description=description, data=loci[codes].tolist())]
+    for name, (description, data) in state['alleles'].items():
+        columns.append(DynamicTableRegion(name=name, description=description, data=data.tolist(),
+                                          table=alleles_table))
+    return GenotypesTable(name=state['name'], description=state['description'],
+                          id=ElementIdentifiers(name='id', data=state['id'].tolist()), columns=columns,
+                          process=state['process'], process_url=state['process_url'], assembly=state['assembly'],
+                          annotation=state['annotation'], alleles_table=alleles_table, sorted_by=state['sorted_by'])
+
+
+for _name in _GENOTYPE_COLUMN_NAMES:
+    setattr(GenotypesTable, _name, _ColumnAttribute(_name))
@@ -0,0 +1,308 @@
+"""
+Streaming importers that fill a GenotypesTable from genotyping exports.
+
+The input file is read in chunks of rows with the C parser of pandas, so only one chunk of the file is held in
+memory at a time. The alleles of each chunk are deduplicated against the alleles table, and new alleles and
+genotypes are added with AllelesTable.add_alleles and GenotypesTable.add_genotypes. With match='normalized', symbols
+that match an allele of the table after normalization, or a synonym, are added as that allele, and the new alleles
+that are close to existing ones are reported in ImportProgress.near_misses.
+"""
+import gzip
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .genotypes_table import GenotypesTable
+from .symbol_index import normalize_symbol
+
+
+class ImportProgress:
+    """The progress of a streaming import. An instance is passed to the progress callback after each chunk."""
+
+    def __init__(self, total_bytes=None):
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.records = 0
+        self.genotypes = 0
+        self.alleles = 0
+        self.skipped = 0
+        self.near_misses = dict()  # new allele symbol -> the closest symbols of the alleles that existed before it
+        self.elapsed = 0.0
+        self.__start = time.perf_counter()
+
+    def _update(self, bytes_read, records, genotypes, alleles, near_misses):
+        self.bytes_read = bytes_read
+        self.near_misses.update(near_misses)
+        self.records += records
+        self.genotypes += genotypes
+        self.alleles += alleles
+        self.skipped += records - genotypes
+        self.elapsed = time.perf_counter() - self.__start
+
+    @property
+    def fraction(self):
+        """The fraction of the input that was read, or None if the size of the input is not known."""
+        if not self.total_bytes:
+            return None
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    @property
+    def records_per_second(self):
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_read / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return ('%s(records=%d, genotypes=%d, alleles=%d, skipped=%d, bytes_read=%d, %.0f records/s, %.1f MB/s)'
+                % (self.__class__.__name__, self.records, self.genotypes, self.alleles, self.skipped,
+                   self.bytes_read, self.records_per_second, self.bytes_per_second / 1e6))
+
+
+class _ChunkWriter:
+    """Add chunks of genotypes given by allele symbol to a GenotypesTable, adding new alleles as needed."""
+
+    def __init__(self, genotypes_table, match='exact'):
+        self.table = genotypes_table
+        self.match = match
+        self.near_misses = dict()
+        self.symbol_index = dict()
+        for i, symbol in enumerate(_arrays.allele_symbols(genotypes_table.alleles_table)):
+            self.symbol_index.setdefault(symbol, i)
+
+    def write(self, loci, alleles):
+        """
+        Add genotypes with the given loci and allele symbols, one array of symbols per allele column. Return the
+        number of new alleles. The near-misses of the new alleles are kept in self.near_misses until the next
+        chunk.
+        """
+        self.near_misses = dict()
+        if len(loci) == 0:
+            return 0
+        inverse, uniques = pd.factorize(np.concatenate(alleles))
+        new = [s for s in uniques if s not in self.symbol_index]
+        aliases = dict()
+        if new and self.match == 'normalized':
+            new, aliases = self.__resolve_normalized(new)
+        if new:
+            start = len(self.table.alleles_table)
+            self.table.add_alleles(symbol=new)
+            self.symbol_index.update(zip(new, range(start, start + len(new))))
+        self.symbol_index.update((symbol, self.symbol_index[first]) for symbol, first in aliases.items())
+        codes = np.array([self.symbol_index[s] for s in uniques], dtype=np.int64)[inverse].reshape(len(alleles), -1)
+        columns = dict(zip(('allele1', 'allele2', 'allele3'), (c.tolist() for c in codes)))
+        self.table.add_genotypes(locus=list(loci), **columns)
+        return len(new)
+
+    def __resolve_normalized(self, symbols):
+        """
+        Add the given symbols that match an allele after normalization to the symbol index. Return the symbols of
+        the new alleles, one per normalized symbol, and a dict from the other symbols to the new symbol they match.
+        """
+        indices, near_misses = self.table.alleles_table.resolve_alleles(symbols, match='normalized')
+        new = dict()  # normalized symbol -> symbols
+        for symbol, index in zip(symbols, indices):
+            if index is not None:
+                self.symbol_index[symbol] = index
+            else:
+                new.setdefault(normalize_symbol(symbol), []).append(symbol)
+        aliases = dict()
+        for first, *others in new.values():
+            if near_misses[first]:
+                self.near_misses[first] = near_misses[first]
+            aliases.update((symbol, first) for symbol in others)
+        return [first for first, *_ in new.values()], aliases
+
+
+def _open(path):
+    """Open the file in binary mode, decompressing it if it is gzipped. Return the file and its size in bytes."""
+    with open(path, 'rb') as f:
+        gzipped = f.read(2) == b'\x1f\x8b'
+    if gzipped:
+        return gzip.open(path, 'rb'), None  # only the uncompressed position is known while reading
+    f = open(path, 'rb')
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(0)
+    return f, size
+
+
+_import_args = (
+    {'name': 'chunk_size', 'type': int, 'doc': 'the number of records read and added at a time', 'default': 100000},
+    {'name': 'progress', 'type': Callable,
+     'doc': 'a function called with the ImportProgress after each chunk', 'default': None},
+    {'name': 'match', 'type': str, 'enum': ('exact', 'normalized'),
+     'doc': ("how allele symbols are matched to the alleles table: 'exact', or 'normalized' to also match symbols that "
+             "differ only in case, punctuation or whitespace, and synonyms added with "
+             "AllelesTable.add_allele_synonyms"),
+     'default': 'exact'},
+)
+
+
+@docval({'name': 'genotypes_table', 'type': GenotypesTable, 'doc': 'the table to add the genotypes to'},
+        {'name': 'path', 'type': str, 'doc': 'the path of the delimited text file, optionally gzipped'},
+        {'name': 'locus_column', 'type': str, 'doc': 'the name of the column of loci', 'default': 'locus'},
+        {'name': 'allele_columns', 'type': (list, tuple),
+         'doc': 'the names of the two or three columns of allele symbols', 'default': ('allele1', 'allele2')},
+        {'name': 'delimiter', 'type': str,
+         'doc': "the column delimiter. Defaults to ',' for .csv files and tab otherwise", 'default': None},
+        {'name': 'subject_column', 'type': str,
+         'doc': 'the name of the column of subject IDs, for files with the genotypes of many subjects',
+         'default': None},
+        {'name': 'subject_id', 'type': str,
+         'doc': 'the ID of the subject whose genotypes are imported. Requires subject_column', 'default': None},
+        *_import_args,
+        returns='the progress of the import after the last chunk', rtype=ImportProgress, is_method=False)
+def import_tabular_genotypes(**kwargs):
+    """
+    Import genotypes from a delimited text file with a header row and one genotype per row, such as a PLINK-like
+    export.
+
+    Rows with a missing locus or allele are skipped and counted in ImportProgress.skipped.
+    """
+    (table, path, locus_column, allele_columns, delimiter, subject_column, subject_id, chunk_size, progress,
+     match) = getargs('genotypes_table', 'path', 'locus_column', 'allele_columns', 'delimiter', 'subject_column',
+                      'subject_id', 'chunk_size', 'progress', 'match', kwargs)
+    allele_columns = list(allele_columns)
+    if len(allele_columns) not in (2, 3):
+        raise ValueError("'allele_columns' must have two or three column names.")
+    if (subject_column is None) != (subject_id is None):
+        raise ValueError("'subject_column' and 'subject_id' must be given together.")
+    if delimiter is None:
+        delimiter = ',' if path.lower().endswith(('.csv', '.csv.gz')) else '\t'
+    columns = [locus_column] + allele_columns
+    usecols = columns + ([subject_column] if subject_column is not None else [])
+
+    writer = _ChunkWriter(table, match)
+    f, size = _open(path)
+    stats = ImportProgress(total_bytes=size)
+    with f:
+        reader = pd.read_csv(f, sep=delimiter, usecols=usecols, dtype=str, chunksize=chunk_size,
+                             keep_default_na=False, na_values=[''], encoding='utf-8')
+        for chunk in reader:
+            if subject_column is not None:
+                chunk = chunk[chunk[subject_column] == subject_id]
+            records = len(chunk)
+            chunk = chunk.dropna(subset=columns)
+            new = writer.write(chunk[locus_column].to_numpy(), [chunk[c].to_numpy() for c in allele_columns])
+            stats._update(f.tell(), records, len(chunk), new, writer.near_misses)
+            if progress is not None:
+                progress(stats)
+    return stats
+
+
+_VCF_COLUMNS = ('CHROM', 'POS', 'ID', 'REF', 'ALT', 'QUAL', 'FILTER', 'INFO', 'FORMAT')
+
+
+def _read_vcf_header(f):
+    """Read the meta-information lines and the header line of a VCF file. Return the number of lines read and the
+    column names given by the header line."""
+    for n, line in enumerate(f, start=1):
+        if not line.startswith(b'##'):
+            if not line.startswith(b'#CHROM'):
+                break
+            return n, line[1:].decode('utf-8').rstrip('\r\n').split('\t')
+    raise ValueError("VCF file has no '#CHROM' header line.")
+
+
+def _parse_vcf_call(ref, alt, call):
+    """Return the allele symbols of a VCF genotype call as a tuple, or None if the call is missing or malformed."""
+    numbers = call.split(':', 1)[0].replace('|', '/').split('/')
+    if len(numbers) not in (2, 3) or not all(n.isdigit() for n in numbers):
+        return None
+    alleles = [ref] + alt.split(',')
+    if any(int(n) >= len(alleles) for n in numbers):
+        return None
+    return tuple(alleles[int(n)].strip('<>') for n in numbers)  # symbolic alleles are written as, e.g., <Ai14>
+
+
+def _vcf_genotypes(chunk, sample, ploidy):
+    """
+    Return the loci and the allele symbols of the called genotypes of the sample in the given chunk of VCF records,
+    as an array of loci and a list of one array of symbols per allele column, and the ploidy of the genotypes.
+    Records with a missing or malformed call, or whose ploidy is not the given ploidy, are left out. If the ploidy is
+    None, it is that of the first called record.
+
+    REF, ALT and the calls repeat across records, so each distinct combination of the three is parsed only once.
+    """
+    columns = [chunk[name].to_numpy(dtype=object) for name in ('REF', 'ALT', sample)]
+    key_codes = np.zeros(len(chunk), dtype=np.int64)
+    for values in columns:
+        codes, uniques = pd.factorize(values)
+        key_codes, _ = pd.factorize(key_codes * len(uniques) + codes)
+    # the first record of each distinct combination, in the order of the records
+    first = np.zeros(key_codes.max() + 1 if len(chunk) else 0, dtype=np.int64)
+    first[key_codes[::-1]] = np.arange(len(chunk) - 1, -1, -1)
+    parsed = [_parse_vcf_call(*(values[i] for values in columns)) for i in first]
+
+    ploidies = np.array([0 if p is None else len(p) for p in parsed], dtype=np.int64)
+    if ploidy is None:
+        called = np.flatnonzero(ploidies > 0)
+        ploidy = int(ploidies[called[0]]) if len(called) else None
+    n = ploidy or 2
+    symbols = np.empty((len(parsed), n), dtype=object)
+    for i in np.flatnonzero(ploidies == ploidy):
+        symbols[i] = parsed[i]
+    rows = np.flatnonzero(ploidies[key_codes] == ploidy)
+
+    loci = chunk['ID'].to_numpy(dtype=object)[rows]
+    no_id = loci == '.'
+    if no_id.any():
+        records = chunk.iloc[rows[no_id]]
+        loci[no_id] = (records['CHROM'] + ':' + records['POS']).to_numpy(dtype=object)
+    symbols = symbols[key_codes[rows]]
+    return loci, [symbols[:, i] for i in range(n)], ploidy
+
+
+@docval({'name': 'genotypes_table', 'type': GenotypesTable, 'doc': 'the table to add the genotypes to'},
+        {'name': 'path', 'type': str, 'doc': 'the path of the VCF file, optionally gzipped'},
+        {'name': 'sample', 'type': str,
+         'doc': 'the name of the sample column whose genotypes are imported. Defaults to the first sample',
+         'default': None},
+        *_import_args,
+        returns='the progress of the import after the last chunk', rtype=ImportProgress, is_method=False)
+def import_vcf_genotypes(**kwargs):
+    """
+    Import the genotypes of one sample from a VCF file.
+
+    The locus of each record is its ID, or CHROM:POS if the record has no ID. The alleles of the GT field of the
+    sample are added by their REF or ALT sequence, or by name for symbolic ALT alleles such as <Ai14>. Records with
+    a missing call or a ploidy other than two or three are skipped and counted in ImportProgress.skipped.
+
+    A GenotypesTable has either two or three alleles per genotype, so the genotypes are imported with the ploidy of
+    the table if it has genotypes, or else that of the first called record. Records of the other ploidy are skipped
+    and counted in ImportProgress.skipped as well.
+    """
+    table, path, sample, chunk_size, progress, match = getargs('genotypes_table', 'path', 'sample', 'chunk_size',
+                                                               'progress', 'match', kwargs)
+    f, size = _open(path)
+    with f:
+        num_header_lines, names = _read_vcf_header(f)
+        samples = names[len(_VCF_COLUMNS):]
+        if sample is None:
+            if not samples:
+                raise ValueError("VCF file '%s' has no samples." % path)
+            sample = samples[0]
+        elif sample not in samples:
+            raise ValueError("Sample '%s' not found in VCF file '%s'." % (sample, path))
+        f.seek(0)
+
+        writer = _ChunkWriter(table, match)
+        stats = ImportProgress(total_bytes=size)
+        ploidy = (3 if 'allele3' in table else 2) if len(table) else None
+        reader = pd.read_csv(f, sep='\t', header=None, names=names, skiprows=num_header_lines,
+                             usecols=['CHROM', 'POS', 'ID', 'REF', 'ALT', sample], dtype=str, chunksize=chunk_size,
+                             keep_default_na=False, encoding='utf-8')
+        for chunk in reader:
+            loci, alleles, ploidy = _vcf_genotypes(chunk, sample, ploidy)
+            new = writer.write(loci, alleles)
+            stats._update(f.tell(), len(chunk), len(loci), new, writer.near_misses)
+            if progress is not None:
+                progress(stats)
+    return stats
@@ -0,0 +1,2 @@
+from . import genotypes_table as __genotypes_table  # noqa: F401
+from . import genotype_subject as __genotype_subject  # noqa: F401
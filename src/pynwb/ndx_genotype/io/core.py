@@ -0,0 +1,88 @@
+import numpy as np
+
+from hdmf.build import ConstructError, GroupBuilder, ObjectMapper
+from hdmf.utils import docval, get_docval, getargs
+
+
+class PrecomputedConstructMixin:
+    """
+    Mixin for ObjectMappers that constructs containers from builders using maps from builder attribute, dataset and
+    group names to constructor arguments that are computed once per spec.
+
+    The generic ObjectMapper.construct resolves every sub-builder against the spec and the namespace type hierarchy
+    and looks up the docval arguments of the container class on every call. The types in this extension have a
+    fixed layout, so the sub-builders can instead be looked up directly by name.
+    """
+
+    # cache of construct maps and constructor arguments, shared by all mappers created from the same spec
+    __construct_maps = dict()
+    __init_args = dict()
+
+    def _get_construct_maps(self):
+        """Return the (attribute, dataset, group) maps from builder name to constructor argument for this spec."""
+        maps = self.__construct_maps.get(self.spec)
+        if maps is None:
+            attrs, datasets, groups = dict(), dict(), dict()
+            for subspecs, ret in ((self.spec.attributes, attrs), (self.spec.datasets, datasets),
+                                  (self.spec.groups, groups)):
+                for subspec in subspecs:
+                    carg = self.get_const_arg(subspec)
+                    if subspec.name is not None and carg is not None:
+                        ret[subspec.name] = (carg, subspec)
+            maps = self.__construct_maps[self.spec] = (attrs, datasets, groups)
+        return maps
+
+    @classmethod
+    def _get_init_args(cls, container_cls):
+        """Return the set of the names of the docval arguments of the constructor of the given container class."""
+        ret = cls.__init_args.get(container_cls)
+        if ret is None:
+            ret = cls.__init_args[container_cls] = frozenset(a['name'] for a in get_docval(container_cls.__init__))
+        return ret
+
+    def _construct_extra_args(self, builder, manager, init_args, kwargs):
+        """Add constructor arguments that are not mapped to a named sub-builder. Override in subclasses."""
+        pass
+
+    @docval(*get_docval(ObjectMapper.construct))
+    def construct(self, **kwargs):
+        ''' Construct an AbstractContainer from the given Builder '''
+        builder, manager, parent = getargs('builder', 'manager', 'parent', kwargs)
+        cls = manager.get_cls(builder)
+        init_args = self._get_init_args(cls)
+        attrs, datasets, groups = self._get_construct_maps()
+        kwargs = dict()
+        for name, value in builder.attributes.items():
+            carg = attrs.get(name)
+            if carg is not None and carg[0] in init_args:
+                kwargs[carg[0]] = value
+        if isinstance(builder, GroupBuilder):
+            for name, sub_builder in builder.datasets.items():
+                carg = datasets.get(name)
+                if carg is None or carg[0] not in init_args:
+                    continue
+                carg, subspec = carg
+                if subspec.data_type_def is not None or subspec.data_type_inc is not None:
+                    kwargs[carg] = manager.construct(sub_builder)
+                else:
+                    data = sub_builder.data
+                    if subspec.shape is None and getattr(data, 'shape', None) == (1,) and type(data[0]) is not np.void:
+                        data = data[0]  # read a scalar dataset that was written as a 1-element dataset
+                    kwargs[carg] = data
+            for name, sub_builder in builder.groups.items():
+                carg = groups.get(name)
+                if carg is not None and carg[0] in init_args:
+                    kwargs[carg[0]] = manager.construct(sub_builder)
+        self._construct_extra_args(builder, manager, init_args, kwargs)
+        for carg, func in self.constructor_args.items():
+            if carg in init_args:
+                value = func(self, builder, manager)
+                if value is not None:
+                    kwargs[carg] = value
+        try:
+            obj = self.__new_container__(cls, builder.source, parent, builder.attributes.get(self.spec.id_key()),
+                                         **kwargs)
+        except Exception as ex:
+            msg = 'Could not construct %s object due to: %s' % (cls.__name__, ex)
+            raise ConstructError(builder, msg) from ex
+        return obj
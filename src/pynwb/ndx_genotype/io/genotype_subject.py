@@ -0,0 +1,10 @@
+from pynwb import register_map
+from pynwb.io.file import SubjectMap
+
+from .core import PrecomputedConstructMixin
+from ..genotype_subject import GenotypeSubject
+
+
+@register_map(GenotypeSubject)
+class GenotypeSubjectMap(PrecomputedConstructMixin, SubjectMap):
+    pass
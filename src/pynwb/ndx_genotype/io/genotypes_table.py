@@ -0,0 +1,233 @@
+import os
+
+import numpy as np
+
+from hdmf.build import ObjectMapper
+from hdmf.common.io.table import DynamicTableMap
+from hdmf.common.table import DynamicTableRegion, VectorData, VectorIndex
+from hdmf.utils import docval, get_docval, getargs
+from pynwb import register_map
+
+from .core import PrecomputedConstructMixin
+from .. import _arrays
+from .._spec_columns import ALLELES_TABLE_COLUMNS
+from ..catalogue import _is_external, open_allele_catalogue
+from ..genotypes_table import GenotypesTable, AllelesTable, _ALLELE_COLUMN_NAMES, _RAGGED_ALLELE_COLUMNS
+from ..summary import GenotypesSummary, SUMMARY_ATTRIBUTES, can_summarize
+
+_COLUMN_DESCRIPTIONS = {c['name']: c['description'] for c in ALLELES_TABLE_COLUMNS}
+_SPARSE_SUFFIXES = ('_sparse_values', '_sparse_index', '_rows')
+_ALLELE_REGIONS = ('allele1', 'allele2', 'allele3')
+
+
+class GenotypeDynamicTableMap(PrecomputedConstructMixin, DynamicTableMap):
+    """
+    Base ObjectMapper for the tables of this extension.
+
+    The column datasets defined in the spec are looked up by name when building, and every typed dataset other than
+    the row IDs is passed as a column when constructing.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self._column_names = frozenset(s.name for s in spec.datasets
+                                       if s.name not in (None, 'id') and s.data_type_inc is not None)
+
+    def get_attr_value(self, spec, container, manager):
+        ''' Get the value of the attribute corresponding to this spec from the given container '''
+        # columns defined in the spec do not need the generic attribute lookup of DynamicTableMap
+        if spec.name in self._column_names:
+            if spec.name not in container:
+                return None
+            attr_value = container[spec.name]
+            if isinstance(attr_value, VectorIndex) and spec.data_type_inc != 'VectorIndex':
+                attr_value = attr_value.target
+            if isinstance(attr_value, DynamicTableRegion) and attr_value.table is None:
+                msg = "empty or missing table for DynamicTableRegion '%s' in DynamicTable '%s'" % \
+                      (attr_value.name, container.name)
+                raise ValueError(msg)
+            return attr_value
+        return super().get_attr_value(spec, container, manager)
+
+    def _construct_extra_args(self, builder, manager, init_args, kwargs):
+        columns = list()
+        for name, sub_builder in builder.datasets.items():
+            if name != 'id' and manager.get_builder_dt(sub_builder) is not None:
+                columns.append(manager.construct(sub_builder))
+        if columns:
+            kwargs['columns'] = columns
+
+
+@register_map(AllelesTable)
+class AllelesTableMap(GenotypeDynamicTableMap):
+    """
+    The columns in AllelesTable.sparse_columns are written sparsely when few rows have values, so that it is smaller
+    that way: the values of the column, the end offsets of the rows that have values and the indices of these rows
+    are written to the '<column>_sparse_values', '<column>_sparse_index' and '<column>_rows' datasets, and the column
+    is left out of the regular columns. When read, the column is rebuilt as a regular ragged column of all rows.
+    """
+
+    # the datasets of the sparse columns, and the position of their data in the tuples returned by _sparse_columns
+    __sparse_datasets = {name + suffix: (name, i) for name in _RAGGED_ALLELE_COLUMNS
+                         for i, suffix in enumerate(_SPARSE_SUFFIXES)}
+    # the datasets of the regular ragged columns
+    __ragged_datasets = dict([(name, name) for name in _RAGGED_ALLELE_COLUMNS] +
+                             [(name + '_index', name) for name in _RAGGED_ALLELE_COLUMNS])
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.__sparse = dict()  # the sparse columns of the tables being built, by id of the table
+
+    @docval(*get_docval(ObjectMapper.build))
+    def build(self, **kwargs):
+        container = getargs('container', kwargs)
+        self.__sparse[id(container)] = _sparse_columns(container)
+        try:
+            return super().build(**kwargs)
+        finally:
+            del self.__sparse[id(container)]
+
+    def get_attr_value(self, spec, container, manager):
+        sparse = self.__sparse.get(id(container), dict())
+        if spec.name in self.__sparse_datasets:
+            name, i = self.__sparse_datasets[spec.name]
+            return sparse[name][i] if name in sparse else None
+        if self.__ragged_datasets.get(spec.name) in sparse:
+            return None
+        if spec.name == 'colnames' and sparse:
+            return tuple(name for name in container.colnames if name not in sparse)
+        attr_value = super().get_attr_value(spec, container, manager)
+        if spec.name is None and sparse and attr_value is not None:
+            # the columns, which are also built from the spec of the VectorData of DynamicTable
+            attr_value = [c for c in attr_value if self.__ragged_datasets.get(c.name) not in sparse]
+        return attr_value
+
+    @docval(*get_docval(ObjectMapper.construct))
+    def construct(self, **kwargs):
+        builder = getargs('builder', kwargs)
+        alleles_table = super().construct(**kwargs)
+        alleles_table.sparse_columns = [name for name in _RAGGED_ALLELE_COLUMNS if name + '_rows' in builder.datasets]
+        return alleles_table
+
+    def _construct_extra_args(self, builder, manager, init_args, kwargs):
+        super()._construct_extra_args(builder, manager, init_args, kwargs)
+        sparse = [name for name in _RAGGED_ALLELE_COLUMNS if name + '_rows' in builder.datasets]
+        if not sparse:
+            return
+        num_rows = len(builder.datasets['id'].data)
+        columns = kwargs.setdefault('columns', list())
+        for name in sparse:
+            values, offsets, rows = (builder.datasets[name + suffix].data for suffix in _SPARSE_SUFFIXES)
+            target = VectorData(name=name, description=_COLUMN_DESCRIPTIONS[name],
+                                data=_arrays.decode_strings(values).tolist())
+            columns.append(target)
+            columns.append(VectorIndex(name=name + '_index', data=_expand_sparse_index(offsets, rows, num_rows),
+                                       target=target))
+        # list the sparse columns in the order of the columns of the spec
+        order = {name: i for i, name in enumerate(_ALLELE_COLUMN_NAMES)}
+        kwargs['colnames'] = sorted(list(kwargs.get('colnames', ())) + sparse,
+                                    key=lambda name: order.get(name, len(order)))
+
+
+def _sparse_columns(alleles_table):
+    """
+    Return the values, the sparse index and the rows of each column of the given table that is to be written
+    sparsely and is smaller that way, by column name.
+    """
+    columns = dict()
+    for name in alleles_table.sparse_columns:
+        if name not in alleles_table:
+            continue
+        index = alleles_table[name]
+        if not isinstance(index.data, (list, np.ndarray)) or not isinstance(index.target.data, (list, np.ndarray)):
+            continue  # e.g., data wrapped in H5DataIO or read from a file, which are written as given
+        offsets = np.asarray(index.data)
+        rows = np.flatnonzero(np.diff(offsets, prepend=0))
+        rows = rows.astype(np.min_scalar_type(max(len(offsets) - 1, 0)))  # the smallest unsigned integer type
+        sparse_index = offsets[rows]
+        if len(offsets) == 0 or rows.nbytes + sparse_index.nbytes >= offsets.nbytes:
+            continue
+        columns[name] = (list(index.target.data), sparse_index, rows)
+    return columns
+
+
+def _expand_sparse_index(offsets, rows, num_rows):
+    """Return the index of all rows of a ragged column, as a list, given the index of the rows that have values."""
+    offsets = np.asarray(offsets[:])
+    counts = np.zeros(num_rows, dtype=np.int64)
+    counts[np.asarray(rows[:], dtype=np.int64)] = np.diff(offsets, prepend=0)
+    return np.cumsum(counts).astype(offsets.dtype).tolist()
+
+
+@register_map(GenotypesTable)
+class GenotypesTableMap(GenotypeDynamicTableMap):
+    """
+    The summary attributes are computed from the table when it is built. They are not read back into the table.
+
+    An alleles table read from an allele catalogue file is written as an external link. HDF5 object references
+    cannot refer to another file, so the allele regions are then written as AlleleIndex datasets of the indices into
+    the alleles table, with the path of the catalogue file instead of the table attribute of a DynamicTableRegion.
+    When read, they are rebuilt as DynamicTableRegions of the alleles_table, which is the cached catalogue of the
+    linked file.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.__summaries = dict()  # the summaries of the tables being built, by id of the table
+
+    @docval(*get_docval(ObjectMapper.build))
+    def build(self, **kwargs):
+        container, manager, source = getargs('container', 'manager', 'source', kwargs)
+        external = _is_external(container.alleles_table, source)
+        if external and manager.get_builder(container.alleles_table) is None:
+            raise ValueError("GenotypesTable '%s' uses the alleles table of the catalogue '%s'. Write it with the io "
+                             "of the catalogue, AlleleCatalogue.io." % (container.name,
+                                                                        container.alleles_table.container_source))
+        self.__summaries[id(container)] = GenotypesSummary.from_table(container) if can_summarize(container) else None
+        try:
+            builder = super().build(**kwargs)
+        finally:
+            del self.__summaries[id(container)]
+        if external:
+            # the references of the regions to the alleles table are set after the table is built
+            catalogue = os.path.relpath(os.path.abspath(container.alleles_table.container_source),
+                                        os.path.dirname(os.path.abspath(source)))
+            manager.queue_ref(lambda: self.__unlink_regions(builder, catalogue))
+        return builder
+
+    @staticmethod
+    def __unlink_regions(builder, catalogue):
+        """
+        Write the allele regions of the given GenotypesTable builder as AlleleIndex datasets of the given catalogue
+        file, without a table attribute.
+        """
+        for name in _ALLELE_REGIONS:
+            if name in builder.datasets:
+                attributes = builder.datasets[name].attributes
+                attributes.pop('table', None)
+                attributes.update({'neurodata_type': 'AlleleIndex', 'namespace': 'ndx-genotype',
+                                   'catalogue': catalogue})
+
+    def _construct_extra_args(self, builder, manager, init_args, kwargs):
+        super()._construct_extra_args(builder, manager, init_args, kwargs)
+        link = builder.links.get('alleles_table')
+        if link is not None:
+            if link.builder.source != builder.source:
+                kwargs['alleles_table'] = open_allele_catalogue(link.builder.source).alleles_table
+                kwargs['columns'] = [_region(column, kwargs['alleles_table']) for column in kwargs['columns']]
+            else:
+                kwargs['alleles_table'] = manager.construct(link.builder)
+
+    def get_attr_value(self, spec, container, manager):
+        if spec.name in SUMMARY_ATTRIBUTES:
+            summary = self.__summaries.get(id(container))
+            return None if summary is None else summary.to_attributes()[spec.name]
+        return super().get_attr_value(spec, container, manager)
+
+
+def _region(column, alleles_table):
+    """Return the given column as a DynamicTableRegion of the given AllelesTable if it is an allele region."""
+    if column.name not in _ALLELE_REGIONS or isinstance(column, DynamicTableRegion):
+        return column
+    return DynamicTableRegion(name=column.name, description=column.description, data=column.data,
+                              table=alleles_table)
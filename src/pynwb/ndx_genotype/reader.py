@@ -0,0 +1,170 @@
+"""
+Partial reads of the genotypes of the subject of NWB files.
+
+NWBHDF5IO.read builds the builders and containers of the whole file, including the acquisition and processing data,
+before the subject can be accessed. The functions here open the HDF5 file directly and read only the GenotypeSubject
+group, i.e., the GenotypeSubject -> GenotypesTable -> AllelesTable subtree, and the rows of the ExternalResources of
+the file that refer to it. The data of the subtree is small, so it is read into memory and the file is closed.
+"""
+from collections import namedtuple
+
+import h5py
+import numpy as np
+from hdmf.build import BuildManager, DatasetBuilder, GroupBuilder
+from hdmf.common.resources import (ExternalResources, KeyTable, ResourceTable, EntityTable, ObjectTable,
+                                   ObjectKeyTable)
+from hdmf.utils import docval, getargs
+from pynwb import get_type_map
+
+
+SUBJECT_PATH = '/general/subject'
+
+SubjectGenotypes = namedtuple('SubjectGenotypes', ('path', 'subject', 'external_resources'))
+SubjectGenotypes.__doc__ = """
+The GenotypeSubject of an NWB file, or None if the subject of the file is not a GenotypeSubject, and an
+ExternalResources with only the rows that refer to the subject and its tables, or None if the file has no
+ExternalResources.
+"""
+
+__type_map = None
+
+
+def _get_type_map():
+    global __type_map
+    if __type_map is None:
+        __type_map = get_type_map()
+    return __type_map
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _neurodata_type(h5obj):
+    return _decode(h5obj.attrs.get('neurodata_type'))
+
+
+class _SubtreeReader:
+    """Read the builders of an HDF5 group and its descendants, with all data in memory."""
+
+    def __init__(self, h5file):
+        self.source = h5file.filename
+        self.built = dict()
+
+    def read(self, h5obj):
+        builder = self.built.get(h5obj.name)
+        if builder is None:
+            if isinstance(h5obj, h5py.Dataset):
+                builder = self.__read_dataset(h5obj)
+            else:
+                builder = self.__read_group(h5obj)
+            self.built[h5obj.name] = builder
+        return builder
+
+    def __read_attrs(self, h5obj):
+        attrs = dict()
+        for k, v in h5obj.attrs.items():
+            if isinstance(v, h5py.Reference):
+                # e.g., the table of a DynamicTableRegion, which is in the subtree
+                v = self.read(h5obj.file[v])
+            attrs[k] = _decode(v)
+        return attrs
+
+    def __read_group(self, h5obj):
+        groups, datasets = dict(), dict()
+        for k, sub_h5obj in h5obj.items():
+            builder = self.read(sub_h5obj)
+            (datasets if isinstance(builder, DatasetBuilder) else groups)[k] = builder
+        return GroupBuilder(h5obj.name.rsplit('/', 1)[-1], groups=groups, datasets=datasets,
+                            attributes=self.__read_attrs(h5obj), source=self.source)
+
+    def __read_dataset(self, h5obj):
+        if h5py.check_string_dtype(h5obj.dtype) is not None:
+            data = h5obj.asstr()[()]
+        else:
+            data = h5obj[()]
+        if isinstance(data, np.ndarray) and data.dtype == object:
+            data = data.tolist()
+        return DatasetBuilder(h5obj.name.rsplit('/', 1)[-1], data=data, dtype=h5obj.dtype, maxshape=h5obj.maxshape,
+                              attributes=self.__read_attrs(h5obj), source=self.source)
+
+
+def _object_ids(container):
+    """Return the object IDs of the given container and all of its descendants."""
+    object_ids = [container.object_id]
+    for child in container.children:
+        object_ids.extend(_object_ids(child))
+    return object_ids
+
+
+def _read_external_resources(group, object_ids):
+    """Return an ExternalResources with only the rows of the given ExternalResources group that refer to the
+    given objects, re-indexed."""
+    objects = group['objects'][()]
+    selected = np.flatnonzero(np.isin([_decode(v) for v in objects['object_id']], object_ids))
+    object_keys = group['object_keys'][()]
+    object_keys = object_keys[np.isin(object_keys['objects_idx'], selected)]
+    keys = np.unique(object_keys['keys_idx'])
+    entities = group['entities'][()]
+    entities = entities[np.isin(entities['keys_idx'], keys)]
+    resources = np.unique(entities['resources_idx'])
+
+    key_data, resource_data = group['keys'][()], group['resources'][()]
+    # the columns of the objects table depend on the version of hdmf, e.g., relative_path is new in hdmf 3.3
+    object_columns = [column['name'] for column in ObjectTable.__columns__]
+    return ExternalResources(
+        name=group.name.rsplit('/', 1)[-1],
+        keys=KeyTable(data=[(_decode(key_data['key'][i]), ) for i in keys]),
+        resources=ResourceTable(data=[(_decode(resource_data['resource'][i]), _decode(resource_data['resource_uri'][i]))
+                                      for i in resources]),
+        entities=EntityTable(data=[(int(k), int(r), _decode(e_id), _decode(e_uri)) for k, r, e_id, e_uri in zip(
+            np.searchsorted(keys, entities['keys_idx']), np.searchsorted(resources, entities['resources_idx']),
+            entities['entity_id'], entities['entity_uri'])]),
+        objects=ObjectTable(data=[tuple(_decode(objects[name][i]) for name in object_columns) for i in selected]),
+        object_keys=ObjectKeyTable(data=[(int(o), int(k)) for o, k in zip(
+            np.searchsorted(selected, object_keys['objects_idx']), np.searchsorted(keys, object_keys['keys_idx']))]),
+    )
+
+
+def _read_subject(f, path, read_er):
+    """Read the GenotypeSubject of the given open h5py.File, like read_genotype_subject."""
+    group = f.get(SUBJECT_PATH)
+    if group is None or _neurodata_type(group) != 'GenotypeSubject':
+        return SubjectGenotypes(path, None, None)
+    subject = BuildManager(_get_type_map()).construct(_SubtreeReader(f).read(group))
+    er = None
+    if read_er:
+        # ERNWBFile stores its ExternalResources in a group at the root of the file
+        for h5obj in f.values():
+            if isinstance(h5obj, h5py.Group) and _neurodata_type(h5obj) == 'ExternalResources':
+                er = _read_external_resources(h5obj, _object_ids(subject))
+                break
+    return SubjectGenotypes(path, subject, er)
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'the path of the NWB file'},
+        {'name': 'external_resources', 'type': bool,
+         'doc': 'read the rows of the ExternalResources of the file that refer to the subject', 'default': True},
+        returns='the subject and its external resources', rtype=SubjectGenotypes, is_method=False)
+def read_genotype_subject(**kwargs):
+    """
+    Read only the GenotypeSubject of an NWB file, with its genotypes and alleles tables, and the rows of the
+    ExternalResources of the file that refer to them. The subject is not attached to an NWBFile.
+    """
+    path, read_er = getargs('path', 'external_resources', kwargs)
+    with h5py.File(path, 'r') as f:
+        return _read_subject(f, path, read_er)
+
+
+@docval({'name': 'paths', 'type': ('array_data', 'data'), 'doc': 'the paths of the NWB files'},
+        {'name': 'external_resources', 'type': bool,
+         'doc': 'read the rows of the ExternalResources of the files that refer to the subjects', 'default': True},
+        is_method=False)
+def read_genotype_subjects(**kwargs):
+    """
+    Read only the GenotypeSubject of each of the given NWB files, like read_genotype_subject. Yield a
+    SubjectGenotypes for each file, in order, as soon as the file is read.
+    """
+    paths, read_er = getargs('paths', 'external_resources', kwargs)
+    for path in paths:
+        yield read_genotype_subject(path, external_resources=read_er)
@@ -0,0 +1,283 @@
+"""
+A persistent, content-addressed cache of external resource records and indexed writes to ExternalResources.
+
+The same resource and entity, e.g., the MGI entry of a gene, are referenced by the genotypes of every subject in a
+cohort. ResourceCache stores each (key, resource, entity) record once in a SQLite database, under the hash of its
+contents, so that the record can be looked up by key instead of being provided again for every file.
+ExternalResourcesIndex adds references to an ExternalResources object, reusing the keys, resources and entities that
+it already referenced instead of looking them up in the tables of the ExternalResources again.
+"""
+import hashlib
+import json
+import sqlite3
+import weakref
+from collections import namedtuple
+
+from hdmf.common.resources import ExternalResources
+from hdmf.container import AbstractContainer
+from hdmf.utils import docval, getargs
+
+
+ResourceRecord = namedtuple('ResourceRecord', ('key', 'resource_name', 'resource_uri', 'entity_id', 'entity_uri'))
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS resources (
+    hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    uri TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entities (
+    hash TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    resource_hash TEXT NOT NULL REFERENCES resources (hash),
+    entity_id TEXT NOT NULL,
+    entity_uri TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_key ON entities (key, resource_hash);
+CREATE INDEX IF NOT EXISTS resources_name ON resources (name);
+'''
+
+_LOOKUP = '''
+SELECT e.key, r.name, r.uri, e.entity_id, e.entity_uri FROM entities e JOIN resources r ON e.resource_hash = r.hash
+WHERE r.name = ? AND e.key IN (%s) ORDER BY e.rowid
+'''
+
+# maximum number of keys per lookup query, below the default SQLite limit of 999 parameters
+_MAX_KEYS = 900
+
+
+def content_hash(*fields):
+    """Return the SHA-256 hex digest of the given str fields."""
+    return hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()
+
+
+class ExternalResourcesIndex:
+    """
+    Indexes of the keys, resources and entities of an ExternalResources object, for adding references without looking
+    them up in the tables of the ExternalResources every time.
+
+    References are added with ExternalResources.add_ref. A key that was referenced through the index is passed to
+    add_ref as its Key, so adding another entity to it does not scan the keys table. A key or resource added to the
+    ExternalResources by other means is looked up with ExternalResources.get_key or get_resource the first time it is
+    referenced through the index. Use ResourceCache.get_index to get the index of an ExternalResources object.
+    """
+
+    def __init__(self, external_resources):
+        self.external_resources = external_resources
+        self.keys = dict()        # (object_id, attribute, key name) -> Key
+        self.resources = dict()   # resource name -> (Resource, resource URI)
+        self.entities = set()     # (keys row, resources row, entity_id)
+
+    def __get_key(self, container, attribute, name):
+        """Return the Key of the given name used by the attribute of the container, if it was added by other means."""
+        er = self.external_resources
+        attribute_object = getattr(container, attribute)
+        if not isinstance(attribute_object, AbstractContainer):
+            return None  # add_ref raises if the key exists
+        try:
+            key = er.get_key(key_name=name, container=attribute_object)
+        except ValueError:
+            return None
+        for i in er.entities.which(keys_idx=key.idx):
+            self.entities.add((key.idx, er.entities['resources_idx', i], er.entities['entity_id', i]))
+        return key
+
+    def __get_resource(self, name):
+        """Return the Resource of the given name and its URI, if it was added by other means."""
+        er = self.external_resources
+        try:
+            resource = er.get_resource(resource_name=name)
+        except ValueError:
+            return None
+        return resource, er.resources['resource_uri', resource.idx]
+
+    def add_ref(self, container, attribute, record):
+        """
+        Add a reference from the given attribute of the container to the entity of the given ResourceRecord. Existing
+        keys, resources and entities are reused. Return the row indices of the key, resource and entity, or None as the
+        entity if it existed.
+        """
+        index = (container.object_id, attribute, record.key)
+        key = self.keys.get(index)
+        if key is None:
+            key = self.__get_key(container, attribute, record.key)
+        resource = self.resources.get(record.resource_name)
+        if resource is None:
+            resource = self.__get_resource(record.resource_name)
+            if resource is not None:
+                self.resources[record.resource_name] = resource
+        if resource is not None and resource[1] != record.resource_uri:
+            raise ValueError("Resource '%s' has URI '%s', not '%s'."
+                             % (record.resource_name, resource[1], record.resource_uri))
+        if key is not None and resource is not None and (key.idx, resource[0].idx, record.entity_id) in self.entities:
+            return key.idx, resource[0].idx, None
+        kwargs = dict(container=container, attribute=attribute, key=record.key if key is None else key,
+                      entity_id=record.entity_id, entity_uri=record.entity_uri)
+        if resource is None:
+            kwargs.update(resource_name=record.resource_name, resource_uri=record.resource_uri)
+        else:
+            kwargs.update(resources_idx=resource[0])
+        key, resources_idx, entity = self.external_resources.add_ref(**kwargs)
+        self.keys[index] = key
+        self.resources.setdefault(record.resource_name, (resources_idx, record.resource_uri))
+        self.entities.add((key.idx, resources_idx.idx, record.entity_id))
+        return key.idx, resources_idx.idx, entity.idx
+
+
+class ResourceCache:
+    """
+    A cache of external resource records stored in a SQLite database.
+
+    Resources and entities are stored under the SHA-256 hash of their contents, so adding the same record again
+    does not store a new copy. Records are looked up by key and resource name. Looked up records are also kept in
+    memory, so repeated references to the same key cost one dict lookup.
+    """
+
+    @docval({'name': 'path', 'type': str,
+             'doc': "the path of the SQLite database file. Defaults to ':memory:', a database that is not persisted",
+             'default': ':memory:'})
+    def __init__(self, **kwargs):
+        self.path = getargs('path', kwargs)
+        self.__conn = sqlite3.connect(self.path)
+        self.__conn.executescript(_SCHEMA)
+        self.__memo = dict()
+        self.__indexes = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return self.__conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+
+    def __insert(self, records):
+        resources, entities = dict(), list()
+        for record in records:
+            record = ResourceRecord(*record)
+            if None in record:
+                raise ValueError("All fields of a resource record must be provided, got %r" % (record, ))
+            resource_hash = content_hash(record.resource_name, record.resource_uri)
+            resources[resource_hash] = (resource_hash, record.resource_name, record.resource_uri)
+            entity_hash = content_hash(record.key, resource_hash, record.entity_id, record.entity_uri)
+            entities.append((entity_hash, record.key, resource_hash, record.entity_id, record.entity_uri))
+        with self.__conn:
+            self.__conn.executemany('INSERT OR IGNORE INTO resources VALUES (?, ?, ?)', resources.values())
+            self.__conn.executemany('INSERT OR IGNORE INTO entities VALUES (?, ?, ?, ?, ?)', entities)
+        return [e[0] for e in entities]
+
+    @docval({'name': 'key', 'type': str, 'doc': 'the name of the key, e.g., the symbol of a locus'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource'},
+            {'name': 'resource_uri', 'type': str, 'doc': 'the URI of the resource'},
+            {'name': 'entity_id', 'type': str, 'doc': 'the identifier of the entity at the resource'},
+            {'name': 'entity_uri', 'type': str, 'doc': 'the URI of the entity'},
+            returns='the content hash of the record', rtype=str)
+    def add(self, **kwargs):
+        """Add a record to the cache."""
+        # the record is not memoized, because an earlier record for the key, which get returns, may be in the file
+        return self.__insert([ResourceRecord(**kwargs)])[0]
+
+    @docval({'name': 'records', 'type': (list, tuple),
+             'doc': 'the records as (key, resource_name, resource_uri, entity_id, entity_uri) tuples'},
+            returns='the content hashes of the records', rtype=list)
+    def add_many(self, **kwargs):
+        """Add many records to the cache in one transaction."""
+        return self.__insert(getargs('records', kwargs))
+
+    @docval({'name': 'key', 'type': str, 'doc': 'the name of the key'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource'},
+            returns='the ResourceRecord, or None if not found', rtype=ResourceRecord)
+    def get(self, **kwargs):
+        """Return the record for the given key at the given resource. If there are several, return the first added."""
+        key, resource_name = getargs('key', 'resource_name', kwargs)
+        return self.get_many(keys=[key], resource_name=resource_name).get(key)
+
+    @docval({'name': 'keys', 'type': ('array_data', 'data'), 'doc': 'the names of the keys'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource'},
+            returns='a dict of the ResourceRecord of each key that was found', rtype=dict)
+    def get_many(self, **kwargs):
+        """Return the records for the given keys at the given resource."""
+        keys, resource_name = getargs('keys', 'resource_name', kwargs)
+        ret = dict()
+        missing = list()
+        for key in dict.fromkeys(keys):
+            record = self.__memo.get((key, resource_name))
+            if record is None:
+                missing.append(key)
+            else:
+                ret[key] = record
+        for start in range(0, len(missing), _MAX_KEYS):
+            batch = missing[start:start + _MAX_KEYS]
+            query = _LOOKUP % ', '.join('?' * len(batch))
+            for row in self.__conn.execute(query, [resource_name] + batch):
+                record = ResourceRecord(*row)
+                if record.key not in ret:
+                    ret[record.key] = self.__memo[(record.key, resource_name)] = record
+        return ret
+
+    @docval({'name': 'external_resources', 'type': ExternalResources, 'doc': 'the ExternalResources to index'},
+            returns='the index of the ExternalResources', rtype=ExternalResourcesIndex)
+    def get_index(self, **kwargs):
+        """Return the ExternalResourcesIndex of the given ExternalResources, creating it on first use."""
+        er = getargs('external_resources', kwargs)
+        index = self.__indexes.get(er)
+        if index is None:
+            index = self.__indexes[er] = ExternalResourcesIndex(er)
+        return index
+
+    @docval({'name': 'external_resources', 'type': ExternalResources,
+             'doc': 'the ExternalResources to add the reference to'},
+            {'name': 'container', 'type': AbstractContainer, 'doc': 'the Container/Data object that uses the key'},
+            {'name': 'attribute', 'type': str, 'doc': 'the attribute of the Container that uses the key'},
+            {'name': 'key', 'type': str, 'doc': 'the name of the key'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource'},
+            {'name': 'resource_uri', 'type': str, 'doc': 'the URI of the resource', 'default': None},
+            {'name': 'entity_id', 'type': str, 'doc': 'the identifier of the entity at the resource', 'default': None},
+            {'name': 'entity_uri', 'type': str, 'doc': 'the URI of the entity', 'default': None},
+            returns='the row indices of the key, the resource, and the entity, or None if the entity existed',
+            rtype=tuple)
+    def add_ref(self, **kwargs):
+        """
+        Add a reference to an external resource to the ExternalResources, and add the record to the cache.
+
+        If resource_uri, entity_id and entity_uri are not provided, they are looked up in the cache by key and
+        resource name.
+        """
+        er, container, attribute = getargs('external_resources', 'container', 'attribute', kwargs)
+        key, resource_name, resource_uri, entity_id, entity_uri = getargs(
+            'key', 'resource_name', 'resource_uri', 'entity_id', 'entity_uri', kwargs)
+        if resource_uri is None and entity_id is None and entity_uri is None:
+            record = self.get(key=key, resource_name=resource_name)
+            if record is None:
+                raise ValueError("No record for key '%s' and resource '%s' in the resource cache."
+                                 % (key, resource_name))
+        else:
+            record = ResourceRecord(key, resource_name, resource_uri, entity_id, entity_uri)
+            self.add(*record)
+        return self.get_index(er).add_ref(container, attribute, record)
+
+    @docval({'name': 'external_resources', 'type': ExternalResources,
+             'doc': 'the ExternalResources to add the references to'},
+            {'name': 'container', 'type': AbstractContainer, 'doc': 'the Container/Data object that uses the keys'},
+            {'name': 'attribute', 'type': str, 'doc': 'the attribute of the Container that uses the keys'},
+            {'name': 'keys', 'type': ('array_data', 'data'), 'doc': 'the names of the keys'},
+            {'name': 'resource_name', 'type': str, 'doc': 'the name of the resource'},
+            returns='the keys that were not found in the cache', rtype=list)
+    def add_refs(self, **kwargs):
+        """
+        Add references for many keys to the ExternalResources, using the records of the cache. Duplicate keys are
+        referenced once.
+        """
+        er, container, attribute, keys, resource_name = getargs('external_resources', 'container', 'attribute', 'keys',
+                                                                'resource_name', kwargs)
+        keys = list(dict.fromkeys(keys))
+        records = self.get_many(keys=keys, resource_name=resource_name)
+        index = self.get_index(er)
+        for key in keys:
+            if key in records:
+                index.add_ref(container, attribute, records[key])
+        return [key for key in keys if key not in records]
+
+    def close(self):
+        self.__conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,92 @@
+"""
+Compact serialization of genotype tables, for sending them between processes or keeping them in caches.
+
+AllelesTable, GenotypesTable and GenotypeSubject are pickled as the state returned by the functions here: the scalar
+attributes and the columns as NumPy arrays, with strings as one UTF-8 buffer and end offsets, and loci as codes into
+the distinct loci. The hdmf container graph, i.e., parents, object IDs and the state of the columns, is not pickled,
+and unpickling creates new tables with the same contents. With pickle protocol 5 and a buffer_callback, the arrays
+are passed out of band without being copied into the pickle, e.g., to multiprocessing shared memory.
+"""
+import pickle
+
+import numpy as np
+
+from . import _arrays
+
+
+def encode_strings(strings):
+    """Return the given strings as a uint8 array of their UTF-8 encoding and an int64 array of their end offsets."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(buffer, offsets):
+    """Return the list of strings encoded with encode_strings."""
+    data = np.asarray(buffer, dtype=np.uint8).tobytes()
+    offsets = np.asarray(offsets, dtype=np.int64).tolist()
+    return [data[start:end].decode('utf-8') for start, end in zip([0] + offsets[:-1], offsets)]
+
+
+def _check_columns(table, names):
+    """Raise a TypeError if the table has columns other than the given ones, which are not serialized."""
+    other = [name for name in table.colnames if name not in names]
+    if other:
+        raise TypeError("Cannot pickle %s '%s' with columns %s that are not defined in the spec."
+                        % (table.__class__.__name__, table.name, other))
+
+
+def alleles_table_state(alleles_table, ragged_columns):
+    """Return the state of the given AllelesTable as a dict of scalars and NumPy arrays."""
+    _check_columns(alleles_table, ('symbol', ) + tuple(ragged_columns))
+    columns = dict()
+    for name in ragged_columns:
+        ragged = _arrays.ragged_column(alleles_table, name)
+        if ragged is not None:
+            buffer, value_offsets = encode_strings(ragged[0].tolist())
+            columns[name] = (alleles_table[name].target.description, buffer, value_offsets, ragged[1])
+    return {
+        'name': alleles_table.name,
+        'description': alleles_table.description,
+        'id': _arrays.ids(alleles_table),
+        'symbol': (alleles_table['symbol'].description, ) + encode_strings(_arrays.allele_symbols(alleles_table)),
+        'columns': columns,
+        'sparse_columns': sorted(alleles_table.sparse_columns),
+    }
+
+
+def genotypes_table_state(genotypes_table):
+    """
+    Return the state of the given GenotypesTable, except its alleles table, as a dict of scalars and NumPy arrays.
+    """
+    allele_columns = tuple(name for name in ('allele1', 'allele2', 'allele3') if name in genotypes_table)
+    _check_columns(genotypes_table, ('locus', ) + allele_columns)
+    loci, locus_codes = np.unique(_arrays.loci(genotypes_table).astype(str), return_inverse=True)
+    return {
+        'name': genotypes_table.name,
+        'description': genotypes_table.description,
+        'process': genotypes_table.process,
+        'process_url': genotypes_table.process_url,
+        'assembly': genotypes_table.assembly,
+        'annotation': genotypes_table.annotation,
+        'sorted_by': genotypes_table.sorted_by,
+        'id': _arrays.ids(genotypes_table),
+        'locus': ((genotypes_table['locus'].description if 'locus' in genotypes_table else None, )
+                  + encode_strings(loci.tolist()) + (locus_codes.reshape(-1).astype(np.int32), )),
+        'alleles': {name: (genotypes_table[name].description, _arrays.column_values(genotypes_table, name)
+                           .astype(np.int64)) for name in allele_columns},
+    }
+
+
+def to_bytes(obj, buffer_callback=None):
+    """
+    Serialize the given AllelesTable, GenotypesTable or GenotypeSubject, or a list of them, with pickle protocol 5.
+    If buffer_callback is given, e.g., list.append, the column arrays are passed to it as out-of-band PickleBuffers
+    instead of being copied into the returned bytes, and must be passed to from_bytes in the same order.
+    """
+    return pickle.dumps(obj, protocol=5, buffer_callback=buffer_callback)
+
+
+def from_bytes(data, buffers=None):
+    """Deserialize the tables or subjects serialized with to_bytes, given the out-of-band buffers if any."""
+    return pickle.loads(data, buffers=buffers)
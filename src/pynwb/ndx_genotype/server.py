@@ -0,0 +1,402 @@
+"""
+A local query service for the genotypes of many NWB files, for tools that ask the same questions repeatedly.
+
+    server = GenotypeQueryServer()
+    await server.start(port=8765)
+    async with await GenotypeQueryClient.connect(port=8765) as client:
+        rows = await client.genotypes(paths, loci=['Pvalb'], alleles=['Ai14'])
+
+or `ndx-genotype serve --port 8765` from the command line. The server keeps an LRU pool of open HDF5 files and an LRU
+cache of the GenotypesSnapshot of the subject of each file, which is read again when the modification time or the
+size of the file changes, so that a repeated query is answered without reading the files. Requests and responses are
+JSON objects, one per line, over a TCP socket on the loopback interface or a Unix socket.
+
+HDF5 may not allow a file that is open for reading to be rewritten in place. Use GenotypeQueryClient.invalidate to
+close the files before rewriting them, or replace them with os.replace.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+from hdmf.utils import docval, getargs
+
+from .reader import _read_subject
+
+
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_OPEN_FILES = 16
+MAX_CACHED_FILES = 1024
+STREAM_LIMIT = 2 ** 26  # the maximum length of a request or response line, in bytes
+
+GENOTYPE_COLUMNS = ('file', 'subject_id', 'locus', 'allele1', 'allele2', 'allele3')
+_QUERY_OPS = ('genotypes', 'subjects', 'alleles')
+
+
+def _stamp(path):
+    """Return the modification time and the size of a file, which change when the file is rewritten."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _is_loopback(host):
+    """Return whether a host is 'localhost' or a loopback IP address."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _genotype_rows(path, subject_id, snapshot, rows):
+    """Return the given rows of a GenotypesSnapshot as lists of the values of GENOTYPE_COLUMNS."""
+    def decode(strings, indices):
+        # decode only the distinct strings of the rows. Index -1, i.e., a missing allele, is None
+        distinct, inverse = np.unique(indices, return_inverse=True)
+        values = np.array([None if i < 0 else strings[int(i)] for i in distinct] + [None], dtype=object)
+        return values[inverse.reshape(indices.shape)] if len(distinct) else values[:0]
+
+    loci = decode(snapshot.loci, snapshot.locus_codes[rows])
+    alleles = decode(snapshot.alleles_table.symbol, snapshot.allele_indices[rows]).reshape(-1, 3)
+    return [[path, subject_id, locus, allele1, allele2, allele3]
+            for locus, (allele1, allele2, allele3) in zip(loci.tolist(), alleles.tolist())]
+
+
+class _FilePool:
+    """An LRU pool of open, read-only h5py.Files, which are reopened when the file changes."""
+
+    def __init__(self, max_open):
+        self.max_open = max_open
+        self.num_opened = 0
+        self.__files = OrderedDict()  # path -> (stamp, h5py.File), least recently used first
+
+    def __len__(self):
+        return len(self.__files)
+
+    def get(self, path, stamp):
+        entry = self.__files.pop(path, None)
+        if entry is not None and entry[0] != stamp:
+            entry[1].close()
+            entry = None
+        if entry is None:
+            entry = (stamp, h5py.File(path, 'r'))
+            self.num_opened += 1
+        self.__files[path] = entry
+        while len(self.__files) > self.max_open:
+            self.__files.popitem(last=False)[1][1].close()
+        return entry[1]
+
+    def discard(self, path):
+        entry = self.__files.pop(path, None)
+        if entry is not None:
+            entry[1].close()
+
+    def close(self):
+        for _, f in self.__files.values():
+            f.close()
+        self.__files.clear()
+
+
+class GenotypeQueryServer:
+    """
+    A server that answers queries for the genotypes of the subjects of NWB files, given by path, from a cache of
+    their contents.
+
+    The requests are JSON objects with an 'op' and its parameters:
+
+    - {"op": "genotypes", "paths": [...], "loci": [...], "alleles": [...]} returns {"rows": [...]}, the
+      genotypes of the files at any of the loci with any of the alleles, as lists of the values of
+      GENOTYPE_COLUMNS. Empty loci or alleles match any.
+    - {"op": "subjects", "paths": [...]} returns {"subjects": [...]}, a [path, subject_id, number of genotypes] list
+      for each file whose subject is a GenotypeSubject with a genotypes table.
+    - {"op": "alleles", "paths": [...]} returns {"alleles": [...]}, a [path, allele symbols] list for each file.
+    - {"op": "invalidate", "paths": [...]} closes the files and drops their cached contents.
+    - {"op": "stats"} returns the numbers of requests, cache hits and misses, and open files.
+
+    A failed request returns {"error": message}. Files are read by one worker thread, and cached contents are
+    returned without waiting for reads of other files.
+    """
+
+    @docval({'name': 'max_open_files', 'type': int, 'doc': 'the maximum number of open files',
+             'default': MAX_OPEN_FILES},
+            {'name': 'max_cached_files', 'type': int, 'doc': 'the maximum number of files whose contents are cached',
+             'default': MAX_CACHED_FILES})
+    def __init__(self, **kwargs):
+        max_open_files, max_cached_files = getargs('max_open_files', 'max_cached_files', kwargs)
+        self.max_cached_files = max_cached_files
+        self.__pool = _FilePool(max_open_files)
+        self.__cache = OrderedDict()  # abspath -> (stamp, subject_id, snapshot), least recently used first
+        self.__cache_lock = threading.Lock()
+        self.__read_lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ndx-genotype-read')
+        self.__server = None
+        self.__counts = dict(requests=0, hits=0, misses=0)
+
+    @property
+    def address(self):
+        """The (host, port) of the TCP socket or the path of the Unix socket that the server listens on."""
+        if self.__server is None:
+            return None
+        return self.__server.sockets[0].getsockname()
+
+    async def start(self, host=HOST, port=PORT, path=None, allow_remote=False):
+        """
+        Start listening on the given TCP host and port, or on the Unix socket at *path* if given. Port 0 selects a free
+        port, which is given by the address property. The server has no authentication and reads any file that a
+        client names, so the host must be a loopback address unless *allow_remote* is True.
+        """
+        if path is None and not allow_remote and not _is_loopback(host):
+            raise ValueError("Host '%s' is not a loopback address. Use allow_remote=True to listen on it." % host)
+        if path is not None:
+            self.__server = await asyncio.start_unix_server(self.__serve, path=path, limit=STREAM_LIMIT)
+        else:
+            self.__server = await asyncio.start_server(self.__serve, host=host, port=port, limit=STREAM_LIMIT)
+
+    async def serve_forever(self):
+        await self.__server.serve_forever()
+
+    async def close(self):
+        """Stop listening, and close the open files."""
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        self.__executor.shutdown()
+        with self.__read_lock:
+            self.__pool.close()
+
+    async def __serve(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = self.__handle_cached(request)
+                    if response is None:
+                        response = await loop.run_in_executor(self.__executor, self.__handle, request)
+                except Exception as e:
+                    response = {'error': '%s: %s' % (type(e).__name__, e)}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def __cached(self, path):
+        """Return the cached (subject_id, snapshot) of a file if it has not changed, or None."""
+        stamp = _stamp(path)
+        with self.__cache_lock:
+            entry = self.__cache.get(path)
+            if entry is None or entry[0] != stamp:
+                return None
+            self.__cache.move_to_end(path)
+            return entry[1:]
+
+    def __load(self, path):
+        """Return the (subject_id, snapshot) of a file, reading the file if it is not cached or has changed."""
+        ret = self.__cached(path)
+        if ret is not None:
+            with self.__cache_lock:
+                self.__counts['hits'] += 1
+            return ret
+        with self.__read_lock:
+            stamp = _stamp(path)
+            subject = _read_subject(self.__pool.get(path, stamp), path, False).subject
+        if subject is None or subject.genotypes_table is None:
+            ret = (None, None)
+        else:
+            ret = (subject.subject_id, subject.genotypes_table.freeze())
+        with self.__cache_lock:
+            self.__counts['misses'] += 1
+            self.__cache[path] = (stamp, ) + ret
+            self.__cache.move_to_end(path)
+            while len(self.__cache) > self.max_cached_files:
+                self.__cache.popitem(last=False)
+        return ret
+
+    def __handle_cached(self, request):
+        """
+        Answer a request in the event loop if it needs no file reads, or return None. A query is answered from the
+        cached contents of its files if all of them are cached and unchanged, and is otherwise left to the worker.
+        """
+        op = request.get('op')
+        if op == 'stats':
+            return self.__handle(request)
+        if op not in _QUERY_OPS:
+            return None
+        paths = list(request.get('paths', ()))
+        entries = list()
+        for path in paths:
+            entry = self.__cached(os.path.abspath(path))
+            if entry is None:
+                return None
+            entries.append(entry)
+        with self.__cache_lock:
+            self.__counts['requests'] += 1
+            self.__counts['hits'] += len(entries)
+        return self.__answer(request, paths, entries)
+
+    def __handle(self, request):
+        op = request.get('op')
+        with self.__cache_lock:
+            self.__counts['requests'] += 1
+        if op == 'stats':
+            with self.__cache_lock:
+                return dict(self.__counts, cached_files=len(self.__cache), open_files=len(self.__pool),
+                            opened_files=self.__pool.num_opened)
+        paths = list(request.get('paths', ()))
+        if op == 'invalidate':
+            with self.__read_lock, self.__cache_lock:
+                for path in paths:
+                    self.__pool.discard(os.path.abspath(path))
+                    self.__cache.pop(os.path.abspath(path), None)
+            return {'invalidated': len(paths)}
+        if op not in _QUERY_OPS:
+            raise ValueError("Unknown op '%s'." % op)
+        return self.__answer(request, paths, [self.__load(os.path.abspath(path)) for path in paths])
+
+    @staticmethod
+    def __answer(request, paths, entries):
+        """Answer a query from the (subject_id, snapshot) of each of its files."""
+        op = request['op']
+        ret = list()
+        for path, (subject_id, snapshot) in zip(paths, entries):
+            if snapshot is None:
+                continue
+            if op == 'subjects':
+                ret.append([path, subject_id, len(snapshot)])
+            elif op == 'alleles':
+                ret.append([path, snapshot.alleles_table.symbol.tolist()])
+            else:
+                ret.extend(_genotype_rows(path, subject_id, snapshot,
+                                          snapshot.find_rows(request.get('loci', ()), request.get('alleles', ()))))
+        return {op if op != 'genotypes' else 'rows': ret}
+
+
+class GenotypeQueryClient:
+    """A connection to a GenotypeQueryServer. Create one with GenotypeQueryClient.connect."""
+
+    def __init__(self, reader, writer):
+        self.__reader = reader
+        self.__writer = writer
+        self.__lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT, path=None):
+        """Connect to the server on the given TCP host and port, or on the Unix socket at *path* if given."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=STREAM_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+        return cls(reader, writer)
+
+    async def request(self, op, **params):
+        """Send a request and return the response. Raise a RuntimeError if the request failed."""
+        async with self.__lock:
+            self.__writer.write(json.dumps(dict(params, op=op)).encode('utf-8') + b'\n')
+            await self.__writer.drain()
+            line = await self.__reader.readline()
+        if not line:
+            raise ConnectionError('The server closed the connection.')
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def genotypes(self, paths, loci=(), alleles=()):
+        """
+        Return the genotypes of the given files at any of the given loci with any of the given alleles, as lists of
+        the values of GENOTYPE_COLUMNS.
+        """
+        return (await self.request('genotypes', paths=list(paths), loci=list(loci), alleles=list(alleles)))['rows']
+
+    async def subjects(self, paths):
+        """Return a [path, subject_id, number of genotypes] list for each of the given files that has genotypes."""
+        return (await self.request('subjects', paths=list(paths)))['subjects']
+
+    async def alleles(self, paths):
+        """Return a [path, allele symbols] list for each of the given files that has genotypes."""
+        return (await self.request('alleles', paths=list(paths)))['alleles']
+
+    async def invalidate(self, paths):
+        """Close the given files in the server and drop their cached contents."""
+        await self.request('invalidate', paths=list(paths))
+
+    async def stats(self):
+        return await self.request('stats')
+
+    async def close(self):
+        self.__writer.close()
+        await self.__writer.wait_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+async def _load_test(paths, clients, requests, loci, alleles):
+    server = GenotypeQueryServer()
+    await server.start(host=HOST, port=0)
+    host, port = server.address[:2]
+    latencies = list()
+
+    async def run_client():
+        async with await GenotypeQueryClient.connect(host, port) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                await client.genotypes(paths, loci=loci, alleles=alleles)
+                latencies.append(time.perf_counter() - start)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[run_client() for _ in range(clients)])
+        seconds = time.perf_counter() - start
+        async with await GenotypeQueryClient.connect(host, port) as client:
+            stats = await client.stats()
+    finally:
+        await server.close()
+    return seconds, latencies, stats
+
+
+@docval({'name': 'paths', 'type': ('array_data', 'data'), 'doc': 'the paths of the NWB files to query'},
+        {'name': 'clients', 'type': int, 'doc': 'the number of concurrent clients', 'default': 8},
+        {'name': 'requests', 'type': int, 'doc': 'the number of requests of each client', 'default': 50},
+        {'name': 'loci', 'type': ('array_data', 'data'), 'doc': 'the loci of the query', 'default': ()},
+        {'name': 'alleles', 'type': ('array_data', 'data'), 'doc': 'the allele symbols of the query', 'default': ()},
+        returns='the throughput and latencies', rtype=dict, is_method=False)
+def run_load_test(**kwargs):
+    """
+    Measure the throughput and latency of a GenotypeQueryServer under concurrent clients. A server is started on a
+    free port of the loopback interface, and each client sends the same genotypes query for the given files. The
+    first query reads the files, and the rest are answered from the cache. Return the number of requests, the
+    seconds taken, the requests per second, the mean, median, 95th and 99th percentile and maximum latencies in
+    milliseconds, and the numbers of files read from the cache and from disk.
+    """
+    paths, clients, requests, loci, alleles = getargs('paths', 'clients', 'requests', 'loci', 'alleles', kwargs)
+    seconds, latencies, stats = asyncio.run(_load_test(list(paths), clients, requests, list(loci), list(alleles)))
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'seconds': seconds,
+        'requests_per_second': len(latencies) / seconds,
+        'latency_mean_ms': float(latencies.mean()),
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+        'latency_max_ms': float(latencies.max()),
+        'cache_hits': stats['hits'],
+        'cache_misses': stats['misses'],
+    }
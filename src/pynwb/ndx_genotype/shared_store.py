@@ -0,0 +1,234 @@
+"""
+A flat, memory-mappable binary layout for the genotypes of a cohort of subjects.
+
+The store is a single file made of a fixed header, a JSON table of contents and a sequence of 64-byte aligned
+arrays. Worker processes that open the same store with GenotypeStore share one page-cached copy of the file instead
+of each deserializing their own copy of the tables.
+"""
+import json
+import struct
+from collections import Counter
+
+import numpy as np
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .snapshot import StringArray
+
+
+MAGIC = b'NDXGTST1'
+_HEADER = struct.Struct('<8sQ')  # magic, length of the JSON table of contents
+_ALIGNMENT = 64
+
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK64 = 0xffffffffffffffff
+
+
+def fnv1a_64(data):
+    """Return the 64-bit FNV-1a hash of the given bytes."""
+    h = _FNV_OFFSET
+    for b in data:
+        h = ((h ^ b) * _FNV_PRIME) & _MASK64
+    return h
+
+
+def _build_hash_table(strings):
+    """
+    Build an open addressing hash table with linear probing over the given distinct strings. Each slot holds the
+    position of a string in *strings*, or -1 for an empty slot.
+    """
+    size = 1
+    while size < 2 * max(len(strings), 1):
+        size <<= 1
+    table = np.full(size, -1, dtype=np.int64)
+    for i, s in enumerate(strings):
+        slot = fnv1a_64(s.encode('utf-8')) & (size - 1)
+        while table[slot] >= 0:
+            slot = (slot + 1) & (size - 1)
+        table[slot] = i
+    return table
+
+
+def _lookup(hash_table, strings, value):
+    """Return the position of *value* in the StringArray *strings* using *hash_table*, or None if not found."""
+    size = len(hash_table)
+    slot = fnv1a_64(value.encode('utf-8')) & (size - 1)
+    while True:
+        i = hash_table[slot]
+        if i < 0:
+            return None
+        if strings[i] == value:
+            return int(i)
+        slot = (slot + 1) & (size - 1)
+
+
+def _string_arrays(name, strings):
+    s = StringArray.from_strings(strings)
+    return {name + '_buffer': s.buffer, name + '_offsets': s.offsets}
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'The path of the file to write.'},
+        {'name': 'genotypes_tables', 'type': (list, tuple), 'doc': 'The GenotypesTables, one per subject.'},
+        {'name': 'subject_ids', 'type': (list, tuple), 'doc': 'The ID of the subject of each table.'},
+        is_method=False)
+def write_genotype_store(**kwargs):
+    """
+    Write the genotypes of the given subjects to a memory-mappable genotype store.
+
+    The alleles of all tables are deduplicated by symbol into one allele catalogue, and the loci into one list of
+    distinct loci. Genotype rows refer to both by integer code.
+    """
+    path, tables, subject_ids = getargs('path', 'genotypes_tables', 'subject_ids', kwargs)
+    if len(subject_ids) != len(tables):
+        raise ValueError("'subject_ids' must have the same length as 'genotypes_tables'.")
+    subject_ids = [str(s) for s in subject_ids]
+    duplicates = [s for s, n in Counter(subject_ids).items() if n > 1]
+    if duplicates:
+        raise ValueError("'subject_ids' must be unique, got duplicate IDs %s." % duplicates)
+
+    symbol_codes, locus_codes = dict(), dict()
+    row_locus_codes, row_allele_codes, lengths = list(), list(), list()
+    for table in tables:
+        table_symbols = _arrays.allele_symbols(table.alleles_table)
+        remap = np.empty(len(table_symbols) + 1, dtype=np.int32)
+        remap[-1] = -1  # missing alleles have index -1, which maps to the last element
+        for i, s in enumerate(table_symbols):
+            remap[i] = symbol_codes.setdefault(s, len(symbol_codes))
+        row_allele_codes.append(remap[_arrays.allele_indices(table)])
+        table_loci = _arrays.loci(table)
+        row_locus_codes.append(np.array([locus_codes.setdefault(s, len(locus_codes)) for s in table_loci],
+                                        dtype=np.int32))
+        lengths.append(len(table_loci))
+    symbols, loci = list(symbol_codes), list(locus_codes)
+
+    arrays = dict()
+    arrays['subject_offsets'] = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+    arrays['locus_codes'] = (np.concatenate(row_locus_codes) if row_locus_codes
+                             else np.empty(0, dtype=np.int32))
+    arrays['allele_codes'] = (np.concatenate(row_allele_codes) if row_allele_codes
+                              else np.empty((0, 3), dtype=np.int32))
+    arrays.update(_string_arrays('subject_id', subject_ids))
+    arrays.update(_string_arrays('locus', loci))
+    arrays.update(_string_arrays('symbol', symbols))
+    arrays['subject_id_hash'] = _build_hash_table(subject_ids)
+    arrays['locus_hash'] = _build_hash_table(loci)
+    arrays['symbol_hash'] = _build_hash_table(symbols)
+
+    # lay out the arrays after the header and table of contents, each aligned to _ALIGNMENT bytes
+    def align(n):
+        return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+    toc = {name: {'dtype': arr.dtype.str, 'shape': list(arr.shape)} for name, arr in arrays.items()}
+    # the offsets depend on the size of the table of contents, so reserve space for the offsets first
+    toc_size = align(_HEADER.size + len(json.dumps({n: dict(v, offset=2 ** 63) for n, v in toc.items()}))) \
+        - _HEADER.size
+    offset = _HEADER.size + toc_size
+    for name, arr in arrays.items():
+        toc[name]['offset'] = offset
+        offset = align(offset + arr.nbytes)
+    toc_bytes = json.dumps(toc).encode('utf-8').ljust(toc_size)
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, toc_size))
+        f.write(toc_bytes)
+        for name, arr in arrays.items():
+            f.seek(toc[name]['offset'])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.truncate(offset)
+
+
+class GenotypeStore:
+    """
+    A read-only view of a genotype store written by write_genotype_store.
+
+    The file is opened with numpy.memmap, and all arrays are views into the mapping, so opening a store does not
+    read or copy its contents.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, toc_size = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError("'%s' is not a genotype store." % path)
+            toc = json.loads(f.read(toc_size).decode('utf-8'))
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r')
+        self.arrays = dict()
+        for name, entry in toc.items():
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape'], dtype=np.int64))
+            arr = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=entry['offset'])
+            self.arrays[name] = arr.reshape(entry['shape'])
+        self.subject_ids = StringArray(self.arrays['subject_id_buffer'], self.arrays['subject_id_offsets'])
+        self.loci = StringArray(self.arrays['locus_buffer'], self.arrays['locus_offsets'])
+        self.symbols = StringArray(self.arrays['symbol_buffer'], self.arrays['symbol_offsets'])
+        self.subject_offsets = self.arrays['subject_offsets']
+        self.locus_codes = self.arrays['locus_codes']
+        self.allele_codes = self.arrays['allele_codes']
+
+    @property
+    def num_subjects(self):
+        return len(self.subject_ids)
+
+    def get_subject_index(self, subject_id):
+        """Return the position of the subject with the given ID, or None if not found."""
+        return _lookup(self.arrays['subject_id_hash'], self.subject_ids, str(subject_id))
+
+    def get_locus_code(self, locus):
+        """Return the code of the given locus, or None if not found."""
+        return _lookup(self.arrays['locus_hash'], self.loci, locus)
+
+    def get_symbol_code(self, symbol):
+        """Return the code of the given allele symbol in the allele catalogue of the store, or None if not found."""
+        return _lookup(self.arrays['symbol_hash'], self.symbols, symbol)
+
+    def get_genotypes(self, subject_id):
+        """Return the genotypes of the given subject as a list of dicts of the locus and allele symbols."""
+        index = self.get_subject_index(subject_id)
+        if index is None:
+            raise KeyError(subject_id)
+        start, end = self.subject_offsets[index], self.subject_offsets[index + 1]
+        ret = list()
+        for locus_code, codes in zip(self.locus_codes[start:end], self.allele_codes[start:end]):
+            row = {'locus': self.loci[locus_code]}
+            for name, code in zip(('allele1', 'allele2', 'allele3'), codes):
+                if code >= 0:
+                    row[name] = self.symbols[code]
+            ret.append(row)
+        return ret
+
+    def __subjects_of_rows(self, rows):
+        subjects = np.searchsorted(self.subject_offsets, rows, side='right') - 1
+        return [self.subject_ids[i] for i in np.unique(subjects)]
+
+    def subjects_with_allele(self, symbol):
+        """Return the IDs of the subjects that have the given allele in any genotype."""
+        code = self.get_symbol_code(symbol)
+        if code is None:
+            return list()
+        return self.__subjects_of_rows(np.flatnonzero((self.allele_codes == code).any(axis=1)))
+
+    def subjects_with_locus(self, locus):
+        """Return the IDs of the subjects that have a genotype for the given locus."""
+        code = self.get_locus_code(locus)
+        if code is None:
+            return list()
+        return self.__subjects_of_rows(np.flatnonzero(self.locus_codes == code))
+
+    def close(self):
+        """
+        Release the references of this store to the memory mapping. The file is unmapped once no arrays obtained
+        from this store remain.
+        """
+        self.arrays = dict()
+        self.subject_ids = self.loci = self.symbols = None
+        self.subject_offsets = self.locus_codes = self.allele_codes = None
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
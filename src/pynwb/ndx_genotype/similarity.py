@@ -0,0 +1,251 @@
+"""
+Approximate similarity search over the genotypes of many subjects with MinHash signatures and locality-sensitive
+hashing (LSH).
+
+The genotype of a subject is taken as the set of its (locus, allele symbol) pairs. Its MinHash signature holds, for
+each of num_perm hash functions, the minimum hash of the items of the set, and the fraction of equal values in the
+signatures of two subjects estimates the Jaccard similarity of their sets. A MinHashIndex splits the signatures into
+bands and puts the subjects with equal bands in the same bucket, so that a query only compares its signature with the
+subjects that share a bucket with it, which are likely to be similar, instead of with every subject.
+"""
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .genotype_subject import GenotypeSubject
+from .reader import read_genotype_subjects
+
+
+NUM_PERM = 128
+NUM_BANDS = 32
+SEED = 1
+
+# a fixed key, so that the hashes of an item are the same in every process
+_HASH_KEY = 'ndx-genotype-mh1'
+_EMPTY = np.iinfo(np.uint64).max
+
+
+def _genotype_items(genotypes_table):
+    """Return the distinct (locus, allele symbol) pairs of the given GenotypesTable, as strings."""
+    if len(genotypes_table) == 0:
+        return np.empty(0, dtype=object)
+    loci = _arrays.loci(genotypes_table)
+    symbols = _arrays.allele_symbols(genotypes_table.alleles_table)
+    indices = _arrays.allele_indices(genotypes_table)
+    rows, columns = np.nonzero(indices >= 0)
+    items = pd.unique(np.char.add(np.char.add(loci[rows].astype(str), '\x1f'),
+                                  symbols[indices[rows, columns]].astype(str)))
+    return items.astype(object)
+
+
+def _permutations(num_perm, seed):
+    """Return the (odd multiplier, xor mask) pairs of the num_perm hash functions of the given seed."""
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(0, _EMPTY, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    masks = rng.integers(0, _EMPTY, size=num_perm, dtype=np.uint64, endpoint=True)
+    return multipliers, masks
+
+
+def _signature(items, permutations):
+    """Return the MinHash signature of the given strings under the given hash functions."""
+    multipliers, masks = permutations
+    if not len(items):
+        return np.full(len(multipliers), _EMPTY, dtype=np.uint64)
+    hashes = pd.util.hash_array(np.asarray(items, dtype=object), hash_key=_HASH_KEY, categorize=False)
+    with np.errstate(over='ignore'):
+        values = (hashes[:, None] ^ masks[None, :]) * multipliers[None, :]
+    values ^= values >> np.uint64(29)
+    return values.min(axis=0)
+
+
+class MinHashIndex:
+    """
+    An LSH index of the MinHash signatures of the genotypes of subjects, for finding the subjects with the most
+    similar genotypes to a given one.
+
+    Subjects are added incrementally with add, add_subject or add_files. The index can be saved to and loaded from a
+    NumPy .npz file. Indices can only be compared if they have the same num_perm and seed.
+    """
+
+    @docval({'name': 'num_perm', 'type': int, 'doc': 'the number of hash functions of the signatures',
+             'default': NUM_PERM},
+            {'name': 'num_bands', 'type': int,
+             'doc': ('the number of LSH bands, which must divide num_perm. More bands find less similar candidates '
+                     'and compare more of them.'),
+             'default': NUM_BANDS},
+            {'name': 'seed', 'type': int, 'doc': 'the seed of the hash functions', 'default': SEED})
+    def __init__(self, **kwargs):
+        num_perm, num_bands, seed = getargs('num_perm', 'num_bands', 'seed', kwargs)
+        if num_perm < 1 or num_bands < 1 or num_perm % num_bands != 0:
+            raise ValueError("'num_bands' must divide 'num_perm', got %d and %d." % (num_bands, num_perm))
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.seed = seed
+        self.__permutations = _permutations(num_perm, seed)
+        self.__subject_ids = list()
+        self.__subject_index = dict()
+        self.__signatures = np.empty((16, num_perm), dtype=np.uint64)
+        self.__buckets = [dict() for _ in range(num_bands)]
+
+    def __len__(self):
+        return len(self.__subject_ids)
+
+    def __contains__(self, subject_id):
+        return subject_id in self.__subject_index
+
+    def __repr__(self):
+        return '%s(%d subjects, num_perm=%d, num_bands=%d)' % (self.__class__.__name__, len(self), self.num_perm,
+                                                               self.num_bands)
+
+    @property
+    def subject_ids(self):
+        return list(self.__subject_ids)
+
+    @property
+    def signatures(self):
+        """The (subjects, num_perm) array of the signatures of the subjects, in the order they were added."""
+        return self.__signatures[:len(self)]
+
+    def __bands(self, signature):
+        return [band.tobytes() for band in signature.reshape(self.num_bands, -1)]
+
+    @docval({'name': 'genotypes_table', 'type': 'GenotypesTable', 'doc': 'the genotypes table of a subject'},
+            returns='the MinHash signature of the table', rtype=np.ndarray)
+    def signature(self, **kwargs):
+        """Return the MinHash signature of the (locus, allele symbol) pairs of the given GenotypesTable."""
+        genotypes_table = getargs('genotypes_table', kwargs)
+        return _signature(_genotype_items(genotypes_table), self.__permutations)
+
+    def _add_signature(self, subject_id, signature):
+        if subject_id in self.__subject_index:
+            raise ValueError("Subject '%s' is already in the index." % subject_id)
+        row = len(self)
+        if row == len(self.__signatures):
+            signatures = np.empty((2 * row, self.num_perm), dtype=np.uint64)
+            signatures[:row] = self.__signatures
+            self.__signatures = signatures
+        self.__signatures[row] = signature
+        self.__subject_ids.append(subject_id)
+        self.__subject_index[subject_id] = row
+        for buckets, band in zip(self.__buckets, self.__bands(signature)):
+            buckets.setdefault(band, list()).append(row)
+
+    @docval({'name': 'subject_id', 'type': str, 'doc': 'the ID of the subject'},
+            {'name': 'genotypes_table', 'type': 'GenotypesTable', 'doc': 'the genotypes table of the subject'})
+    def add(self, **kwargs):
+        """Add a subject, given its ID and its genotypes table, to the index."""
+        subject_id, genotypes_table = getargs('subject_id', 'genotypes_table', kwargs)
+        self._add_signature(subject_id, self.signature(genotypes_table))
+
+    @docval({'name': 'subject', 'type': GenotypeSubject, 'doc': 'the subject to add'})
+    def add_subject(self, **kwargs):
+        """Add a GenotypeSubject to the index, by its subject_id."""
+        subject = getargs('subject', kwargs)
+        if subject.genotypes_table is None or subject.subject_id is None:
+            raise ValueError("The subject must have a subject_id and a GenotypesTable.")
+        self.add(subject.subject_id, subject.genotypes_table)
+
+    @docval({'name': 'paths', 'type': ('array_data', 'data'), 'doc': 'the paths of the NWB files'})
+    def add_files(self, **kwargs):
+        """
+        Add the GenotypeSubjects of the given NWB files to the index, reading only the subject of each file. Files
+        whose subject is not a GenotypeSubject are skipped.
+        """
+        paths = getargs('paths', kwargs)
+        for read in read_genotype_subjects(paths, external_resources=False):
+            if read.subject is not None:
+                self.add_subject(read.subject)
+
+    @classmethod
+    @docval({'name': 'subjects', 'type': (list, tuple), 'doc': 'the GenotypeSubjects to index'},
+            allow_extra=True)
+    def from_genotype_subjects(cls, **kwargs):
+        """Build an index of the given GenotypeSubjects. Other keyword arguments are passed to MinHashIndex."""
+        subjects = kwargs.pop('subjects')
+        ret = cls(**kwargs)
+        for subject in subjects:
+            ret.add_subject(subject)
+        return ret
+
+    @classmethod
+    @docval({'name': 'paths', 'type': ('array_data', 'data'), 'doc': 'the paths of the NWB files'},
+            allow_extra=True)
+    def from_files(cls, **kwargs):
+        """
+        Build an index of the GenotypeSubjects of the given NWB files. Other keyword arguments are passed to
+        MinHashIndex.
+        """
+        paths = kwargs.pop('paths')
+        ret = cls(**kwargs)
+        ret.add_files(paths)
+        return ret
+
+    def __query_signature(self, query):
+        if isinstance(query, str):
+            row = self.__subject_index.get(query)
+            if row is None:
+                raise KeyError("Subject '%s' is not in the index." % query)
+            return self.__signatures[row]
+        if isinstance(query, GenotypeSubject):
+            query = query.genotypes_table
+        return self.signature(query)
+
+    @docval({'name': 'subject1', 'type': (str, GenotypeSubject, 'GenotypesTable'),
+             'doc': 'the ID of a subject in the index, a GenotypeSubject, or a GenotypesTable'},
+            {'name': 'subject2', 'type': (str, GenotypeSubject, 'GenotypesTable'),
+             'doc': 'the ID of a subject in the index, a GenotypeSubject, or a GenotypesTable'},
+            returns='the estimated Jaccard similarity of the genotypes of the subjects', rtype=float)
+    def jaccard(self, **kwargs):
+        """Estimate the Jaccard similarity of the (locus, allele symbol) pairs of two subjects from their signatures."""
+        subject1, subject2 = getargs('subject1', 'subject2', kwargs)
+        return float(np.mean(self.__query_signature(subject1) == self.__query_signature(subject2)))
+
+    @docval({'name': 'query', 'type': (str, GenotypeSubject, 'GenotypesTable'),
+             'doc': 'the ID of a subject in the index, a GenotypeSubject, or a GenotypesTable'},
+            {'name': 'k', 'type': int, 'doc': 'the maximum number of subjects to return', 'default': 10},
+            {'name': 'min_similarity', 'type': float, 'doc': 'the minimum estimated Jaccard similarity',
+             'default': 0.0},
+            returns='the IDs of the most similar subjects and their estimated Jaccard similarities', rtype=list)
+    def query(self, **kwargs):
+        """
+        Return the IDs and estimated Jaccard similarities of the k subjects in the index with the most similar
+        genotypes to the query, as a list of (subject_id, similarity) tuples, most similar first. Only the subjects
+        that share an LSH bucket with the query are compared, so subjects with low similarity may be missed. A query
+        by the ID of a subject, or by a GenotypeSubject with the ID of a subject in the index, excludes that subject.
+        """
+        query, k, min_similarity = getargs('query', 'k', 'min_similarity', kwargs)
+        signature = self.__query_signature(query)
+        candidates = set()
+        for buckets, band in zip(self.__buckets, self.__bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        exclude = query if isinstance(query, str) else getattr(query, 'subject_id', None)
+        candidates.discard(self.__subject_index.get(exclude))
+        if not candidates:
+            return list()
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = (self.__signatures[rows] == signature).mean(axis=1)
+        # most similar first, then in the order the subjects were added
+        order = np.lexsort((rows, -similarities))[:k]
+        return [(self.__subject_ids[rows[i]], float(similarities[i])) for i in order
+                if similarities[i] >= min_similarity]
+
+    def save(self, path):
+        """Save this index to the given path as a NumPy .npz file."""
+        np.savez_compressed(
+            path,
+            subject_ids=np.asarray(self.__subject_ids, dtype=str),
+            signatures=self.signatures,
+            params=np.array([self.num_perm, self.num_bands, self.seed], dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with MinHashIndex.save. The LSH buckets are rebuilt from the signatures."""
+        with np.load(path, allow_pickle=False) as f:
+            num_perm, num_bands, seed = f['params'].tolist()
+            ret = cls(num_perm=num_perm, num_bands=num_bands, seed=seed)
+            for subject_id, signature in zip(f['subject_ids'].tolist(), f['signatures']):
+                ret._add_signature(subject_id, signature)
+        return ret
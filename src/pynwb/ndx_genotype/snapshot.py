@@ -0,0 +1,284 @@
+import numpy as np
+import pandas as pd
+
+from . import _arrays
+
+
+def _read_only(arr):
+    arr = np.ascontiguousarray(arr)
+    arr.flags.writeable = False
+    return arr
+
+
+class _Frozen:
+    """Base class for immutable objects that define __slots__."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'%s' object is read-only" % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("'%s' object is read-only" % self.__class__.__name__)
+
+    def _init_slot(self, name, value):
+        object.__setattr__(self, name, value)
+
+
+class StringArray(_Frozen):
+    """
+    An immutable array of strings stored as one UTF-8 encoded buffer and the end offset of each string in it.
+
+    The string at position i is ``buffer[offsets[i-1]:offsets[i]]``, with an implicit start offset of 0.
+    """
+
+    __slots__ = ('buffer', 'offsets')
+
+    def __init__(self, buffer, offsets):
+        self._init_slot('buffer', _read_only(np.asarray(buffer, dtype=np.uint8)))
+        self._init_slot('offsets', _read_only(np.asarray(offsets, dtype=np.int64)))
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Create a StringArray from an iterable of str."""
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        start = 0 if i == 0 else self.offsets[i - 1]
+        return self.buffer[start:self.offsets[i]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self):
+        return list(self)
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+
+class RaggedStringArray(_Frozen):
+    """An immutable array of lists of strings, stored as a StringArray of all values and the end offset of each row."""
+
+    __slots__ = ('values', 'offsets')
+
+    def __init__(self, values, offsets):
+        self._init_slot('values', values)
+        self._init_slot('offsets', _read_only(np.asarray(offsets, dtype=np.int64)))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        start = 0 if i == 0 else self.offsets[i - 1]
+        return [self.values[j] for j in range(start, self.offsets[i])]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.offsets.nbytes
+
+
+class AllelesSnapshot(_Frozen):
+    """
+    An immutable, array-backed copy of the contents of an AllelesTable.
+
+    Create one with AllelesTable.freeze().
+    """
+
+    __slots__ = ('name', 'description', 'symbol', 'columns', 'ids', '_symbol_index')
+
+    optional_columns = ('recombinase', 'reporter', 'promoter', 'recombinase_recognition_site')
+
+    def __init__(self, name, description, symbol, columns, ids=None):
+        self._init_slot('name', name)
+        self._init_slot('description', description)
+        self._init_slot('symbol', symbol)
+        self._init_slot('columns', columns)
+        self._init_slot('ids', _read_only(np.arange(len(symbol)) if ids is None else np.asarray(ids, dtype=np.int64)))
+        index = dict()
+        for i, s in enumerate(symbol):
+            index.setdefault(s, i)  # use the first match, like AllelesTable.get_allele_index
+        self._init_slot('_symbol_index', index)
+
+    @classmethod
+    def from_table(cls, alleles_table):
+        """Create an AllelesSnapshot from the given AllelesTable."""
+        columns = dict()
+        for name in cls.optional_columns:
+            ragged = _arrays.ragged_column(alleles_table, name)
+            if ragged is not None:
+                columns[name] = RaggedStringArray(StringArray.from_strings(ragged[0]), ragged[1])
+        return cls(
+            name=alleles_table.name,
+            description=alleles_table.description,
+            symbol=StringArray.from_strings(_arrays.allele_symbols(alleles_table)),
+            columns=columns,
+            ids=_arrays.ids(alleles_table),
+        )
+
+    @property
+    def colnames(self):
+        return ('symbol', ) + tuple(c for c in self.optional_columns if c in self.columns)
+
+    def __len__(self):
+        return len(self.symbol)
+
+    def __getitem__(self, key):
+        """Return the row at the given integer index as a dict, or the values of the column with the given name."""
+        if isinstance(key, str):
+            if key == 'symbol':
+                return self.symbol.tolist()
+            return [self.columns[key][i] for i in range(len(self))]
+        row = {'symbol': self.symbol[key]}
+        for name, column in self.columns.items():
+            row[name] = column[key]
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_allele_index(self, symbol):
+        """Return the index of the allele with the given symbol, or None if not found."""
+        return self._symbol_index.get(symbol)
+
+    def to_dataframe(self):
+        data = {name: self[name] for name in self.colnames}
+        return pd.DataFrame(data, index=pd.Index(name='id', data=self.ids))
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the arrays of this snapshot."""
+        return self.symbol.nbytes + self.ids.nbytes + sum(c.nbytes for c in self.columns.values())
+
+
+class GenotypesSnapshot(_Frozen):
+    """
+    An immutable, array-backed copy of the contents of a GenotypesTable and its AllelesTable.
+
+    The loci are stored as integer codes into a StringArray of the distinct loci, and the allele1, allele2 and
+    allele3 columns as one (n, 3) integer array of row indices into the alleles, with -1 for missing alleles. The
+    row IDs and whether there is an allele3 column are those of the table, and default to the row indices and to
+    whether all rows have an allele3. Create one with GenotypesTable.freeze().
+    """
+
+    __slots__ = ('name', 'description', 'process', 'process_url', 'assembly', 'annotation',
+                 'loci', 'locus_codes', 'allele_indices', 'alleles_table', 'ids', 'colnames', '_locus_index')
+
+    allele_columns = ('allele1', 'allele2', 'allele3')
+
+    def __init__(self, name, description, loci, locus_codes, allele_indices, alleles_table,
+                 process=None, process_url=None, assembly=None, annotation=None, ids=None, allele3=None):
+        self._init_slot('name', name)
+        self._init_slot('description', description)
+        self._init_slot('process', process)
+        self._init_slot('process_url', process_url)
+        self._init_slot('assembly', assembly)
+        self._init_slot('annotation', annotation)
+        self._init_slot('loci', loci)
+        self._init_slot('locus_codes', _read_only(np.asarray(locus_codes, dtype=np.int32)))
+        self._init_slot('allele_indices', _read_only(np.asarray(allele_indices, dtype=np.int32).reshape(-1, 3)))
+        self._init_slot('alleles_table', alleles_table)
+        num_rows = len(self.locus_codes)
+        self._init_slot('ids', _read_only(np.arange(num_rows) if ids is None else np.asarray(ids, dtype=np.int64)))
+        if allele3 is None:
+            allele3 = num_rows > 0 and bool((self.allele_indices[:, 2] >= 0).all())
+        self._init_slot('colnames', ('locus', ) + self.allele_columns[:3 if allele3 else 2])
+        self._init_slot('_locus_index', {s: i for i, s in enumerate(loci)})
+
+    @classmethod
+    def from_table(cls, genotypes_table):
+        """Create a GenotypesSnapshot from the given GenotypesTable."""
+        loci, locus_codes = np.unique(_arrays.loci(genotypes_table).astype(str), return_inverse=True)
+        return cls(
+            name=genotypes_table.name,
+            description=genotypes_table.description,
+            loci=StringArray.from_strings(loci.tolist()),
+            locus_codes=locus_codes.reshape(-1),
+            allele_indices=_arrays.allele_indices(genotypes_table),
+            alleles_table=AllelesSnapshot.from_table(genotypes_table.alleles_table),
+            process=genotypes_table.process,
+            process_url=genotypes_table.process_url,
+            assembly=genotypes_table.assembly,
+            annotation=genotypes_table.annotation,
+            ids=_arrays.ids(genotypes_table),
+            allele3='allele3' in genotypes_table,
+        )
+
+    def __len__(self):
+        return len(self.locus_codes)
+
+    def __get_symbol(self, index):
+        return None if index < 0 else self.alleles_table.symbol[index]
+
+    def __getitem__(self, key):
+        """
+        Return the row at the given integer index as a dict of the locus and allele symbols, or the values of the
+        column with the given name. Allele columns are returned as allele indices.
+        """
+        if isinstance(key, str):
+            if key not in self.colnames:
+                raise KeyError(key)
+            if key == 'locus':
+                return [self.loci[c] for c in self.locus_codes]
+            return self.allele_indices[:, self.allele_columns.index(key)].tolist()
+        row = {'locus': self.loci[self.locus_codes[key]]}
+        for i, name in enumerate(self.colnames[1:]):
+            row[name] = self.__get_symbol(self.allele_indices[key, i])
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_allele_index(self, symbol):
+        """Return the index of the allele with the given symbol from the alleles table, or None if not found."""
+        return self.alleles_table.get_allele_index(symbol)
+
+    def get_locus_rows(self, locus):
+        """Return the indices of the rows with the given locus."""
+        code = self._locus_index.get(locus)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.locus_codes == code)
+
+    def find_rows(self, loci=(), alleles=()):
+        """
+        Return the indices of the rows at any of the given loci with any of the given allele symbols. An empty list of
+        loci or alleles matches any locus or allele.
+        """
+        match = np.ones(len(self), dtype=bool)
+        if loci:
+            match &= np.isin(np.arange(len(self)), np.concatenate([self.get_locus_rows(locus) for locus in loci]))
+        if alleles:
+            indices = [self.get_allele_index(allele) for allele in alleles]
+            match &= np.isin(self.allele_indices, [i for i in indices if i is not None]).any(axis=1)
+        return np.flatnonzero(match)
+
+    def to_dataframe(self, index=False):
+        """
+        Return the contents as a pandas DataFrame. Alleles are given by symbol, or by index into the alleles table if
+        *index* is True.
+        """
+        data = {'locus': self['locus']}
+        for i, name in enumerate(self.colnames[1:]):
+            indices = self.allele_indices[:, i]
+            data[name] = indices.tolist() if index else [self.__get_symbol(j) for j in indices]
+        return pd.DataFrame(data, index=pd.Index(name='id', data=self.ids))
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the arrays of this snapshot."""
+        return (self.loci.nbytes + self.locus_codes.nbytes + self.allele_indices.nbytes + self.ids.nbytes +
+                self.alleles_table.nbytes)
@@ -0,0 +1,176 @@
+"""
+Allele frequencies and genotype distributions over cohorts of subjects.
+
+A GenotypeStatistics accumulates counts from the allele index columns of GenotypesTables and the symbols of their
+AllelesTables with NumPy reductions, without building DataFrames of the tables. Accumulators are mergeable: the
+statistics of a cohort are the sum of the statistics of any partition of its subjects, so that partial results, e.g.,
+from parallel workers over different files, or from the subjects added since the last update, are combined with ``+``.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from .genotype_subject import GenotypeSubject
+from .reader import read_genotype_subjects
+
+
+HOMOZYGOUS = 'homozygous'
+HETEROZYGOUS = 'heterozygous'
+
+
+def _count_rows(*codes):
+    """Return the distinct rows of the given equal-length integer code arrays, as a list of tuples, and their counts."""
+    if not len(codes[0]):
+        return [], []
+    keys = np.stack(codes, axis=1)
+    distinct, counts = np.unique(keys, axis=0, return_counts=True)
+    return [tuple(row) for row in distinct.tolist()], counts.tolist()
+
+
+class GenotypeStatistics:
+    """
+    Counts of the alleles, genotypes and zygosities at each locus over a set of subjects, one GenotypesTable per
+    subject. Add tables with add_table or add_subject, and combine the statistics of disjoint sets of subjects with
+    merge or ``+``.
+
+    A genotype is the sorted tuple of the symbols of the alleles of a row, so that Cre/wt and wt/Cre are the same
+    genotype. A row is homozygous if all of its alleles have the same symbol, and heterozygous otherwise.
+    """
+
+    def __init__(self):
+        self.num_subjects = 0
+        self.locus_subjects = Counter()  # locus -> number of subjects with a genotype at the locus
+        self.allele_counts = Counter()  # (locus, symbol) -> number of copies of the allele at the locus
+        self.genotype_counts = Counter()  # (locus, genotype) -> number of rows with the genotype at the locus
+        self.zygosity_counts = Counter()  # (locus, zygosity) -> number of rows with the zygosity at the locus
+
+    def __repr__(self):
+        return '%s(num_subjects=%d, num_loci=%d)' % (self.__class__.__name__, self.num_subjects,
+                                                     len(self.locus_subjects))
+
+    @docval({'name': 'genotypes_table', 'type': 'GenotypesTable', 'doc': 'the genotypes table of one subject'})
+    def add_table(self, **kwargs):
+        """Add the counts of the genotypes table of one subject."""
+        genotypes_table = getargs('genotypes_table', kwargs)
+        self.num_subjects += 1
+        if len(genotypes_table) == 0:
+            return
+        loci, locus_codes = np.unique(_arrays.loci(genotypes_table).astype(str), return_inverse=True)
+        loci = loci.tolist()
+        self.locus_subjects.update(loci)
+
+        # map the allele indices to codes of distinct symbols, so that alleles with the same symbol are counted
+        # together, with -1 for missing alleles
+        symbols, symbol_codes = np.unique(_arrays.allele_symbols(genotypes_table.alleles_table).astype(str),
+                                          return_inverse=True)
+        symbols = symbols.tolist()
+        indices = _arrays.allele_indices(genotypes_table)
+        alleles = np.where(indices >= 0, symbol_codes.reshape(-1)[np.maximum(indices, 0)], -1)
+
+        present = alleles >= 0
+        copies = np.bincount(np.repeat(locus_codes, present.sum(axis=1)) * len(symbols) + alleles[present],
+                             minlength=len(loci) * len(symbols)).reshape(len(loci), len(symbols))
+        for i, j in zip(*np.nonzero(copies)):
+            self.allele_counts[loci[i], symbols[j]] += int(copies[i, j])
+
+        # sort the alleles of each row, missing alleles first, so that the order of the alleles does not matter
+        alleles = np.sort(alleles, axis=1)
+        present = alleles >= 0
+        for row, n in zip(*_count_rows(locus_codes, *alleles.T)):
+            self.genotype_counts[loci[row[0]], tuple(symbols[c] for c in row[1:] if c >= 0)] += n
+
+        first = alleles[np.arange(len(alleles)), np.argmax(present, axis=1)]
+        homozygous = ((alleles == first[:, None]) | ~present).all(axis=1)
+        counts = np.bincount(locus_codes * 2 + homozygous, minlength=2 * len(loci)).reshape(len(loci), 2)
+        for i, locus in enumerate(loci):
+            for zygosity, n in ((HETEROZYGOUS, counts[i, 0]), (HOMOZYGOUS, counts[i, 1])):
+                if n:
+                    self.zygosity_counts[locus, zygosity] += int(n)
+
+    @docval({'name': 'subject', 'type': GenotypeSubject, 'doc': 'the subject to add'})
+    def add_subject(self, **kwargs):
+        """Add the counts of the genotypes table of a GenotypeSubject."""
+        subject = getargs('subject', kwargs)
+        if subject.genotypes_table is None:
+            raise ValueError("GenotypeSubject '%s' has no GenotypesTable." % subject.subject_id)
+        self.add_table(subject.genotypes_table)
+
+    @classmethod
+    @docval({'name': 'subjects', 'type': (list, tuple), 'doc': 'the GenotypeSubjects of the cohort'})
+    def from_genotype_subjects(cls, **kwargs):
+        """Return the statistics of the given GenotypeSubjects."""
+        subjects = getargs('subjects', kwargs)
+        ret = cls()
+        for subject in subjects:
+            ret.add_subject(subject)
+        return ret
+
+    @classmethod
+    @docval({'name': 'paths', 'type': ('array_data', 'data'), 'doc': 'the paths of the NWB files of the cohort'})
+    def from_files(cls, **kwargs):
+        """
+        Return the statistics of the GenotypeSubjects of the given NWB files, reading only the subject of each file.
+        Files whose subject is not a GenotypeSubject are skipped.
+        """
+        paths = getargs('paths', kwargs)
+        ret = cls()
+        for read in read_genotype_subjects(paths, external_resources=False):
+            if read.subject is not None and read.subject.genotypes_table is not None:
+                ret.add_table(read.subject.genotypes_table)
+        return ret
+
+    @docval({'name': 'other', 'type': 'GenotypeStatistics', 'doc': 'the statistics of other subjects'},
+            returns='the statistics of the subjects of both', rtype='GenotypeStatistics')
+    def merge(self, **kwargs):
+        """Return the statistics of the subjects of this and the other statistics, which must be disjoint."""
+        other = getargs('other', kwargs)
+        ret = GenotypeStatistics()
+        ret.num_subjects = self.num_subjects + other.num_subjects
+        for name in ('locus_subjects', 'allele_counts', 'genotype_counts', 'zygosity_counts'):
+            setattr(ret, name, getattr(self, name) + getattr(other, name))
+        return ret
+
+    def __add__(self, other):
+        if not isinstance(other, GenotypeStatistics):
+            return NotImplemented
+        return self.merge(other)
+
+    def __eq__(self, other):
+        return (isinstance(other, GenotypeStatistics) and self.num_subjects == other.num_subjects and
+                self.locus_subjects == other.locus_subjects and self.allele_counts == other.allele_counts and
+                self.genotype_counts == other.genotype_counts and self.zygosity_counts == other.zygosity_counts)
+
+    @property
+    def loci(self):
+        """The loci with a genotype in at least one subject, sorted."""
+        return sorted(self.locus_subjects)
+
+    def allele_frequencies(self, locus):
+        """Return a dict mapping the symbol of each allele at the given locus to its frequency among all copies."""
+        counts = {symbol: n for (other, symbol), n in self.allele_counts.items() if other == locus}
+        total = sum(counts.values())
+        return {symbol: n / total for symbol, n in sorted(counts.items())}
+
+    def genotype_distribution(self, locus):
+        """Return a dict mapping each genotype at the given locus, a tuple of symbols, to its number of rows."""
+        return {genotype: n for (other, genotype), n in sorted(self.genotype_counts.items())
+                if other == locus}
+
+    def zygosity_distribution(self, locus):
+        """Return a dict mapping 'homozygous' and 'heterozygous' to their numbers of rows at the given locus."""
+        return {zygosity: self.zygosity_counts[locus, zygosity] for zygosity in (HOMOZYGOUS, HETEROZYGOUS)}
+
+    def allele_frequency_table(self):
+        """
+        Return a DataFrame with one row per locus and allele, with columns 'locus', 'allele', 'count' and
+        'frequency', sorted by locus and allele.
+        """
+        df = pd.DataFrame([(locus, symbol, n) for (locus, symbol), n in self.allele_counts.items()],
+                          columns=['locus', 'allele', 'count'])
+        df = df.sort_values(['locus', 'allele'], ignore_index=True)
+        df['frequency'] = df['count'] / df.groupby('locus')['count'].transform('sum')
+        return df
@@ -0,0 +1,264 @@
+"""
+Construction of genotype tables from iterators, for writing tables that do not fit in memory.
+
+The columns of a table built with alleles_table_from_iterators or genotypes_table_from_iterators are backed by
+DataChunkIterators. Write them with NWBHDF5IO.write(nwbfile, exhaust_dci=False), which writes them one chunk at a
+time, round-robin over all columns, so that the values of only about one chunk of rows per column are held in memory
+at any time, however many rows the table has. Writing one column after the other, as NWBHDF5IO.write does by default,
+raises a ValueError because it would hold the values of the remaining columns in memory.
+
+The values of each column can be given as any iterable, e.g., a generator, or as an hdmf DataChunkIterator or
+GenericDataChunkIterator. The sources of all columns of a table are read in step, one row at a time, so they must
+yield the same number of rows. Such tables can only be written. They do not support len, add_row or other methods
+that read the rows of the table until they are written and read back.
+"""
+import itertools
+from collections import deque
+from collections.abc import Iterable
+
+import numpy as np
+
+from hdmf.common.table import DynamicTableRegion, ElementIdentifiers, VectorData, VectorIndex
+from hdmf.data_utils import AbstractDataChunkIterator, DataChunk
+from hdmf.utils import docval, getargs, popargs
+
+from ._spec_columns import ALLELES_TABLE_COLUMNS, GENOTYPES_TABLE_COLUMNS, COLUMN_DTYPES
+from .genotypes_table import AllelesTable, GenotypesTable, _check_column_values
+
+
+ROWS_PER_CHUNK = 100000
+
+
+def _iter_values(source):
+    """Iterate over the values of a column given as an iterable or as a 1D AbstractDataChunkIterator."""
+    if not isinstance(source, AbstractDataChunkIterator):
+        yield from source
+        return
+    position = 0
+    for chunk in source:
+        selection = chunk.selection[0] if isinstance(chunk.selection, tuple) else chunk.selection
+        if not isinstance(selection, slice) or (selection.start or 0) != position:
+            raise ValueError("DataChunkIterator sources of table columns must yield 1D chunks in order.")
+        yield from chunk.data
+        position += len(chunk.data)
+
+
+class _RowBlocks:
+    """
+    The values of each column of the next rows_per_chunk rows of the given column sources, read once and shared by
+    the iterators of all columns of a table. A block is dropped once every column has read it.
+    """
+
+    def __init__(self, names, sources, rows_per_chunk):
+        self.names = names
+        self.rows_per_chunk = rows_per_chunk
+        self.__iterators = [_iter_values(source) for source in sources]
+        self.__blocks = deque()
+        self.__first = 0  # the number of the first block in self.__blocks
+        self.__positions = list()  # the number of the next block of each reader
+
+    def add_reader(self):
+        self.__positions.append(0)
+        return len(self.__positions) - 1
+
+    def read(self, reader):
+        """Return the next block of the given reader as a list of the values of each column, or None at the end."""
+        position = self.__positions[reader]
+        if position - min(self.__positions) > 1:
+            raise ValueError("The columns of a table built from iterators must be written together. Write the file "
+                             "with NWBHDF5IO.write(..., exhaust_dci=False).")
+        if position - self.__first == len(self.__blocks):
+            block = self.__read_block()
+            if block is None:
+                return None
+            self.__blocks.append(block)
+        block = self.__blocks[position - self.__first]
+        self.__positions[reader] = position + 1
+        while self.__blocks and min(self.__positions) > self.__first:
+            self.__blocks.popleft()
+            self.__first += 1
+        return block
+
+    def __read_block(self):
+        block = [list(itertools.islice(it, self.rows_per_chunk)) for it in self.__iterators]
+        lengths = [len(values) for values in block]
+        if any(n != lengths[0] for n in lengths):
+            shorter = [name for name, n in zip(self.names, lengths) if n < max(lengths)]
+            raise ValueError("Columns %s have fewer rows than columns %s." %
+                             (shorter, [name for name in self.names if name not in shorter]))
+        return block if lengths[0] else None
+
+
+class _ColumnIterator(AbstractDataChunkIterator):
+    """
+    Iterate over one column of a table built from iterators, in chunks of a fixed number of rows.
+
+    Every column of a table, including the row IDs and the index of a ragged column, advances by the same number of
+    rows per chunk, so that the columns, which share the blocks of rows read from the sources, stay within one chunk
+    of each other when they are written round-robin. A column that gets further ahead raises a ValueError.
+    """
+
+    def __init__(self, blocks, column, dtype, check=None):
+        self.__blocks = blocks
+        self.__reader = blocks.add_reader()
+        self.__column = column
+        self.__dtype = np.dtype(dtype)
+        self.__check = check
+        self._num_rows = 0  # the number of rows before the next chunk
+        self._num_values = 0  # the number of values before the next chunk
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        block = self.__blocks.read(self.__reader)
+        if block is None:
+            raise StopIteration
+        values = block[self.__column]
+        if self.__check is not None:
+            self.__check(values)
+        data = self._convert(values)
+        selection = np.s_[self._num_values:self._num_values + len(data)]
+        self._num_rows += len(values)
+        self._num_values += len(data)
+        return DataChunk(data=data, selection=selection)
+
+    def _convert(self, values):
+        return np.array(values, dtype=self.__dtype)
+
+    def recommended_chunk_shape(self):
+        return (self.__blocks.rows_per_chunk, )
+
+    def recommended_data_shape(self):
+        return (0, )
+
+    @property
+    def dtype(self):
+        return self.__dtype
+
+    @property
+    def maxshape(self):
+        return (None, )
+
+
+class _IdIterator(_ColumnIterator):
+    """Iterate over the IDs 0, 1, 2, ... of the rows of a table built from iterators."""
+
+    def _convert(self, values):
+        return np.arange(self._num_rows, self._num_rows + len(values), dtype=self.dtype)
+
+
+class _RaggedValuesIterator(_ColumnIterator):
+    """Iterate over the concatenated values of the lists of the rows of a ragged column."""
+
+    def _convert(self, values):
+        return np.array([v for row in values for v in row], dtype=self.dtype)
+
+
+class _RaggedIndexIterator(_ColumnIterator):
+    """Iterate over the end offsets of the lists of the rows of a ragged column."""
+
+    def __init__(self, blocks, column):
+        super().__init__(blocks, column, np.uint64)
+        self.__end = 0
+
+    def _convert(self, values):
+        offsets = self.__end + np.cumsum([len(row) for row in values], dtype=np.uint64)
+        if len(offsets):
+            self.__end = int(offsets[-1])
+        return offsets
+
+
+def _check_values(data_type, name, ragged=False):
+    def check(block):
+        _check_column_values(data_type, name, block, ragged=ragged)
+    return check
+
+
+def _check_allele_indices(name, num_alleles):
+    def check(block):
+        _check_column_values('GenotypesTable', name, block)
+        if min(block) < 0 or (num_alleles is not None and max(block) >= num_alleles):
+            bound = 'the number of alleles' if num_alleles is None else num_alleles - 1
+            raise ValueError("'%s' indices must be between 0 and %s." % (name, bound))
+    return check
+
+
+def _num_rows(table):
+    """Return the number of rows of a table, or None if the table is backed by iterators."""
+    try:
+        return len(table)
+    except TypeError:
+        return None
+
+
+def _build_columns(data_type, column_specs, sources, rows_per_chunk, checks):
+    """Return the row IDs and the columns, including the indices of ragged columns, of the given sources."""
+    names = [c['name'] for c in column_specs if sources.get(c['name']) is not None]
+    blocks = _RowBlocks(names, [sources[name] for name in names], rows_per_chunk)
+    ids = ElementIdentifiers(name='id', data=_IdIterator(blocks, 0, np.int64))
+    columns = list()
+    for i, name in enumerate(names):
+        spec = [c for c in column_specs if c['name'] == name][0]
+        dtype = object if COLUMN_DTYPES[data_type][name] is str else np.int64
+        if spec.get('index'):
+            values = _RaggedValuesIterator(blocks, i, dtype, _check_values(data_type, name, ragged=True))
+            target = VectorData(name=name, description=spec['description'], data=values)
+            index = _RaggedIndexIterator(blocks, i)
+            # DynamicTable expects the index before an iterator-backed target when checking the column lengths
+            columns.extend([VectorIndex(name=name + '_index', data=index, target=target), target])
+        else:
+            data = _ColumnIterator(blocks, i, dtype, checks.get(name) or _check_values(data_type, name))
+            # the regions refer to the alleles table, which GenotypesTable sets
+            cls = DynamicTableRegion if spec.get('table') else VectorData
+            columns.append(cls(name=name, description=spec['description'], data=data))
+    return ids, columns
+
+
+@docval({'name': 'symbol', 'type': Iterable,
+         'doc': 'the symbols of the alleles, as an iterable or a DataChunkIterator'},
+        {'name': 'recombinase', 'type': Iterable, 'doc': 'for each allele, the list of recombinases',
+         'default': None},
+        {'name': 'reporter', 'type': Iterable, 'doc': 'for each allele, the list of reporters', 'default': None},
+        {'name': 'promoter', 'type': Iterable, 'doc': 'for each allele, the list of promoters', 'default': None},
+        {'name': 'recombinase_recognition_site', 'type': Iterable,
+         'doc': 'for each allele, the list of recombinase recognition sites', 'default': None},
+        {'name': 'rows_per_chunk', 'type': int, 'doc': 'the number of rows read and written at a time',
+         'default': ROWS_PER_CHUNK},
+        allow_extra=True,
+        returns='the new alleles table', rtype=AllelesTable, is_method=False)
+def alleles_table_from_iterators(**kwargs):
+    """
+    Return a new AllelesTable whose columns are written from the given iterators. Other keyword arguments, e.g.,
+    name, are passed to AllelesTable. The symbols are not checked for duplicates.
+    """
+    rows_per_chunk = popargs('rows_per_chunk', kwargs)
+    sources = {c['name']: popargs(c['name'], kwargs) for c in ALLELES_TABLE_COLUMNS}
+    ids, columns = _build_columns('AllelesTable', ALLELES_TABLE_COLUMNS, sources, rows_per_chunk, dict())
+    return AllelesTable(id=ids, columns=columns, **kwargs)
+
+
+@docval({'name': 'locus', 'type': Iterable, 'doc': 'the loci, as an iterable or a DataChunkIterator'},
+        {'name': 'allele1', 'type': Iterable, 'doc': 'the indices of the first alleles in the alleles table'},
+        {'name': 'allele2', 'type': Iterable, 'doc': 'the indices of the second alleles in the alleles table'},
+        {'name': 'allele3', 'type': Iterable, 'doc': 'the indices of the third alleles in the alleles table',
+         'default': None},
+        {'name': 'alleles_table', 'type': AllelesTable,
+         'doc': 'the alleles table, e.g., from alleles_table_from_iterators'},
+        {'name': 'rows_per_chunk', 'type': int, 'doc': 'the number of rows read and written at a time',
+         'default': ROWS_PER_CHUNK},
+        allow_extra=True,
+        returns='the new genotypes table', rtype=GenotypesTable, is_method=False)
+def genotypes_table_from_iterators(**kwargs):
+    """
+    Return a new GenotypesTable whose columns are written from the given iterators. Other keyword arguments, e.g.,
+    process, are passed to GenotypesTable. The alleles are given as indices into the alleles table, which are
+    checked against the length of the alleles table if it is not itself backed by iterators.
+    """
+    rows_per_chunk = popargs('rows_per_chunk', kwargs)
+    alleles_table = getargs('alleles_table', kwargs)
+    sources = {c['name']: popargs(c['name'], kwargs) for c in GENOTYPES_TABLE_COLUMNS}
+    num_alleles = _num_rows(alleles_table)
+    checks = {name: _check_allele_indices(name, num_alleles) for name in ('allele1', 'allele2', 'allele3')}
+    ids, columns = _build_columns('GenotypesTable', GENOTYPES_TABLE_COLUMNS, sources, rows_per_chunk, checks)
+    return GenotypesTable(id=ids, columns=columns, **kwargs)
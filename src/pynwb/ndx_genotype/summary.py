@@ -0,0 +1,180 @@
+"""
+Summaries of genotypes tables that are stored as attributes of the table when it is written.
+
+A summary holds the numbers of genotypes and alleles, a hash of the contents, and a Bloom filter of the loci and
+allele symbols. A query for loci or alleles can be checked against the summary of a file, read from the attributes of
+the table without reading any column data, and files that cannot match can be skipped.
+"""
+import h5py
+import numpy as np
+import pandas as pd
+
+from hdmf.data_utils import AbstractDataChunkIterator, DataIO
+from hdmf.utils import docval, getargs
+
+from . import _arrays
+from ._hashing import _genotype_frame, _hashes, _table_hash
+
+
+BLOOM_BITS_PER_ITEM = 10
+BLOOM_NUM_HASHES = 7
+GENOTYPES_TABLE_PATH = '/general/subject/genotypes_table'
+
+# the names of the attributes of GenotypesTable defined in the spec for the summary
+SUMMARY_ATTRIBUTES = ('summary_num_rows', 'summary_num_alleles', 'summary_hash', 'summary_bloom_filter',
+                      'summary_bloom_num_hashes')
+
+# fixed keys, so that the positions of an item in the Bloom filter are the same in every file
+_HASH_KEYS = ('ndx-genotype-bf1', 'ndx-genotype-bf2')
+
+
+def _bloom_positions(items, num_bits, num_hashes):
+    """Return the (len(items), num_hashes) bit positions of the given strings, by double hashing."""
+    items = np.asarray(items, dtype=object)
+    h1, h2 = (pd.util.hash_array(items, hash_key=key, categorize=False) for key in _HASH_KEYS)
+    h2 |= np.uint64(1)  # odd, so that the positions are distinct for power-of-two sizes
+    i = np.arange(num_hashes, dtype=np.uint64)
+    return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(num_bits)
+
+
+def can_summarize(genotypes_table):
+    """
+    Return whether the summary of the given GenotypesTable can be computed before it is written, i.e., whether the
+    loci, alleles and allele symbols are not written from iterators.
+    """
+    columns = [genotypes_table[name] for name in ('locus', 'allele1', 'allele2', 'allele3') if name in genotypes_table]
+    columns.append(genotypes_table.alleles_table['symbol'])
+    for column in columns:
+        data = column.data.data if isinstance(column.data, DataIO) else column.data
+        if isinstance(data, AbstractDataChunkIterator):
+            return False
+    return True
+
+
+def _items(loci, symbols):
+    return ['locus:%s' % locus for locus in loci] + ['allele:%s' % symbol for symbol in symbols]
+
+
+class GenotypesSummary:
+    """A summary of the contents of a GenotypesTable, for deciding whether a query can match the table."""
+
+    def __init__(self, num_rows, num_alleles, content_hash, bloom_filter, bloom_num_hashes):
+        self.num_rows = int(num_rows)
+        self.num_alleles = int(num_alleles)
+        self.content_hash = content_hash
+        self.bloom_filter = np.asarray(bloom_filter, dtype=np.uint8)
+        self.bloom_num_hashes = int(bloom_num_hashes)
+
+    def __repr__(self):
+        return ('%s(num_rows=%d, num_alleles=%d, content_hash=%r, bloom_filter=<%d bytes>)'
+                % (self.__class__.__name__, self.num_rows, self.num_alleles, self.content_hash,
+                   len(self.bloom_filter)))
+
+    @classmethod
+    def from_table(cls, genotypes_table):
+        """Compute the summary of the given GenotypesTable."""
+        loci = pd.unique(_arrays.loci(genotypes_table))
+        symbols = pd.unique(_arrays.allele_symbols(genotypes_table.alleles_table))
+        items = _items(loci, symbols)
+        num_bits = 64
+        while num_bits < BLOOM_BITS_PER_ITEM * len(items):
+            num_bits *= 2
+        bits = np.zeros(num_bits, dtype=bool)
+        if items:
+            bits[_bloom_positions(items, num_bits, BLOOM_NUM_HASHES).ravel().astype(np.int64)] = True
+        return cls(
+            num_rows=len(genotypes_table),
+            num_alleles=len(symbols),
+            content_hash=_table_hash(_hashes(_genotype_frame(genotypes_table))[0]),
+            bloom_filter=np.packbits(bits, bitorder='little'),
+            bloom_num_hashes=BLOOM_NUM_HASHES,
+        )
+
+    @classmethod
+    def from_attributes(cls, attrs):
+        """Create the summary from the attributes of a GenotypesTable, or return None if they have no summary."""
+        if any(name not in attrs for name in SUMMARY_ATTRIBUTES):
+            return None
+        content_hash = attrs['summary_hash']
+        return cls(
+            num_rows=attrs['summary_num_rows'],
+            num_alleles=attrs['summary_num_alleles'],
+            content_hash=content_hash.decode('utf-8') if isinstance(content_hash, bytes) else content_hash,
+            bloom_filter=attrs['summary_bloom_filter'],
+            bloom_num_hashes=attrs['summary_bloom_num_hashes'],
+        )
+
+    def to_attributes(self):
+        """Return the summary as a dict of the attributes of a GenotypesTable."""
+        return {
+            'summary_num_rows': self.num_rows,
+            'summary_num_alleles': self.num_alleles,
+            'summary_hash': self.content_hash,
+            'summary_bloom_filter': self.bloom_filter,
+            'summary_bloom_num_hashes': self.bloom_num_hashes,
+        }
+
+    def __might_contain(self, items):
+        """Return whether each of the given items may be in the table. False is certain, True may be wrong."""
+        if not items:
+            return np.zeros(0, dtype=bool)
+        bits = np.unpackbits(self.bloom_filter, bitorder='little').astype(bool)
+        positions = _bloom_positions(items, len(bits), self.bloom_num_hashes).astype(np.int64)
+        return bits[positions].all(axis=1)
+
+    def might_contain_locus(self, locus):
+        """Return False if the table has no genotype at the given locus, or True if it may have."""
+        return bool(self.__might_contain(_items([locus], []))[0])
+
+    def might_contain_allele(self, symbol):
+        """Return False if the table has no allele with the given symbol, or True if it may have."""
+        return bool(self.__might_contain(_items([], [symbol]))[0])
+
+    @docval({'name': 'loci', 'type': ('array_data', 'data'), 'doc': 'the loci of the query', 'default': ()},
+            {'name': 'alleles', 'type': ('array_data', 'data'), 'doc': 'the allele symbols of the query',
+             'default': ()})
+    def may_match(self, **kwargs):
+        """
+        Return False if the table certainly has no genotype at any of the given loci, or no allele with any of the
+        given symbols, i.e., a query for rows with one of the loci and one of the alleles cannot match.
+        """
+        loci, alleles = getargs('loci', 'alleles', kwargs)
+        loci, alleles = list(loci), list(alleles)
+        if self.num_rows == 0:
+            return False
+        contains = self.__might_contain(_items(loci, alleles))
+        return bool((not loci or contains[:len(loci)].any()) and (not alleles or contains[len(loci):].any()))
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'the path of the NWB file'},
+        returns='the summary of the genotypes table of the subject of the file, or None if there is none',
+        rtype=GenotypesSummary, is_method=False)
+def read_genotypes_summary(**kwargs):
+    """
+    Read the summary of the genotypes table of the subject of an NWB file. Only the attributes of the table are read.
+    """
+    path = getargs('path', kwargs)
+    with h5py.File(path, 'r') as f:
+        group = f.get(GENOTYPES_TABLE_PATH)
+        if group is None:
+            return None
+        return GenotypesSummary.from_attributes(group.attrs)
+
+
+@docval({'name': 'path', 'type': str, 'doc': 'the path of the NWB file'},
+        {'name': 'loci', 'type': ('array_data', 'data'), 'doc': 'the loci of the query', 'default': ()},
+        {'name': 'alleles', 'type': ('array_data', 'data'), 'doc': 'the allele symbols of the query', 'default': ()},
+        returns='whether the genotypes table of the file may match the query', rtype=bool, is_method=False)
+def genotypes_may_match(**kwargs):
+    """
+    Check a query for loci and alleles against the summary of the genotypes table of an NWB file, without reading
+    any column data. Return False if the file certainly has no matching genotype, or if it has no genotypes table,
+    and True if it may have one or if the table has no summary.
+    """
+    path, loci, alleles = getargs('path', 'loci', 'alleles', kwargs)
+    with h5py.File(path, 'r') as f:
+        group = f.get(GENOTYPES_TABLE_PATH)
+        if group is None:
+            return False
+        summary = GenotypesSummary.from_attributes(group.attrs)
+    return summary is None or summary.may_match(loci=loci, alleles=alleles)
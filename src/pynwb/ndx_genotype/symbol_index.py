@@ -0,0 +1,122 @@
+"""
+A normalized index of allele symbols, for resolving symbols that are written differently from the symbols in an
+AllelesTable, and for suggesting the closest symbols for those that cannot be resolved.
+
+Symbols are normalized by Unicode compatibility normalization and case folding, and by removing punctuation and
+whitespace, so that, e.g., 'Pvalb-IRES-cre', 'Pvalb IRES Cre' and 'PVALB_IRES_CRE' all match 'Pvalb-IRES-Cre'.
+Synonyms, e.g., from the synonym lists of MGI, are normalized the same way. Suggestions are looked up in an inverted
+index of the character trigrams of the normalized symbols, and the candidates that share the most trigrams with the
+given symbol are ranked by their similarity to it, so the table is not scanned for each symbol.
+"""
+import difflib
+import unicodedata
+import warnings
+from collections import Counter
+
+import numpy as np
+
+
+def normalize_symbol(symbol):
+    """
+    Return the normalized form of an allele symbol: its case-folded letters, digits and '+' signs. Symbols that have
+    none of these, e.g., '-', are only case-folded and stripped.
+    """
+    folded = unicodedata.normalize('NFKC', symbol).casefold()
+    key = ''.join(c for c in folded if c.isalnum() or c == '+')
+    return key or folded.strip()
+
+
+def _trigrams(key):
+    padded = '$' + key + '$'
+    return {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+
+
+class SymbolIndex:
+    """
+    An index of normalized allele symbols and synonyms, with a trigram index of them for suggestions.
+
+    Symbols are added in the order of the rows of the alleles table, so the index of the n-th symbol added is n.
+    Where several symbols have the same normalized form, the first of them is used.
+    """
+
+    def __init__(self):
+        self.__num_symbols = 0
+        self.__keys = dict()  # normalized symbol -> (symbol, index) of the first allele with the normalized symbol
+        self.__ambiguous = dict()  # normalized symbol -> the symbols of all alleles with it, if there are several
+        self.__synonyms = dict()  # normalized synonym -> symbol
+        self.__entries = list()  # (normalized symbol or synonym, symbol) of each entry of the trigram index
+        self.__trigrams = dict()  # trigram -> numbers of the entries with the trigram
+
+    def __len__(self):
+        """Return the number of symbols added to the index."""
+        return self.__num_symbols
+
+    def __add_entry(self, key, symbol):
+        number = len(self.__entries)
+        self.__entries.append((key, symbol))
+        for trigram in _trigrams(key):
+            self.__trigrams.setdefault(trigram, []).append(number)
+
+    def extend(self, symbols):
+        """Add the given symbols of the next rows of the alleles table to the index."""
+        for index, symbol in enumerate(symbols, self.__num_symbols):
+            key = normalize_symbol(symbol)
+            first = self.__keys.setdefault(key, (symbol, index))
+            if first[1] == index:
+                self.__add_entry(key, symbol)
+            elif symbol != first[0]:
+                self.__ambiguous.setdefault(key, [first[0]]).append(symbol)
+            self.__num_symbols += 1
+
+    def add_synonym(self, synonym, symbol):
+        """Add a synonym of the given symbol. Synonyms whose normalized form is that of a symbol are ignored."""
+        key = normalize_symbol(synonym)
+        if key in self.__keys:
+            return  # symbols take precedence over synonyms
+        if key in self.__synonyms:
+            if self.__synonyms[key] != symbol:
+                raise ValueError("Synonym '%s' is already a synonym of '%s'." % (synonym, self.__synonyms[key]))
+            return
+        self.__synonyms[key] = symbol
+        self.__add_entry(key, symbol)
+
+    def get(self, symbol):
+        """
+        Return the index of the allele whose normalized symbol, or one of whose synonyms, matches the given symbol,
+        or None if not found.
+        """
+        key = normalize_symbol(symbol)
+        if key not in self.__keys and key in self.__synonyms:
+            key = normalize_symbol(self.__synonyms[key])
+        if key not in self.__keys:
+            return None
+        if key in self.__ambiguous:
+            warnings.warn("Allele symbol '%s' matches multiple alleles %s after normalization. Using the first match."
+                          % (symbol, self.__ambiguous[key]))
+        return self.__keys[key][1]
+
+    def suggest(self, symbol, limit=5, cutoff=0.6):
+        """
+        Return up to the given number of symbols of the index that are closest to the given symbol, from closest to
+        farthest. Only symbols whose similarity to the symbol, between 0 and 1, is at least the cutoff are returned.
+        """
+        key = normalize_symbol(symbol)
+        trigrams = _trigrams(key)
+        counts = Counter()
+        for trigram in trigrams:
+            counts.update(self.__trigrams.get(trigram, ()))
+        if not counts:
+            return []
+        numbers = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        shared = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        # rank the candidates by the number of trigrams they share with the symbol, and compare the best of them
+        numbers = numbers[np.lexsort((numbers, -shared))[:max(limit * 10, 50)]]
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        scores = dict()
+        for number in numbers.tolist():
+            candidate_key, candidate = self.__entries[number]
+            matcher.set_seq1(candidate_key)
+            score = matcher.ratio()
+            if score >= cutoff and score > scores.get(candidate, -1):
+                scores[candidate] = score
+        return sorted(scores, key=lambda s: -scores[s])[:limit]
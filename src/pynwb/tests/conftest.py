@@ -0,0 +1,4 @@
+# The ndx-genotype namespace includes the ndx-external-resources namespace, which is loaded when
+# ndx_external_resources is imported. Import it before any test module imports ndx_genotype, so that test modules
+# that do not use ERNWBFile can also be run on their own.
+import ndx_external_resources  # noqa: F401
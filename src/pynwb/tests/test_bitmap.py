@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeBitmap
+
+from .utils import make_subject
+
+
+class TestGenotypeBitmap(TestCase):
+
+    def setUp(self):
+        self.subjects = [
+            make_subject('1', [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt')]),
+            make_subject('2', [('Pvalb', 'Pvalb-IRES-Cre', 'wt')]),
+            make_subject('3', [('Vip', 'Vip-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt')]),
+        ]
+
+    def test_from_genotype_subjects(self):
+        bitmap = GenotypeBitmap.from_genotype_subjects(subjects=self.subjects)
+        self.assertEqual(bitmap.num_subjects, 3)
+        self.assertEqual(bitmap.counts(), {'Ai14': 2, 'Pvalb-IRES-Cre': 2, 'Vip-IRES-Cre': 1, 'wt': 3})
+        self.assertEqual(list(bitmap.subjects_with('Ai14')), ['1', '3'])
+        self.assertEqual(len(bitmap.subjects_with('not_an_allele')), 0)
+
+    def test_duplicate_subjects(self):
+        self.subjects.append(make_subject('1', [('Vip', 'Vip-IRES-Cre', 'wt')]))
+        with self.assertRaisesWith(ValueError, "'subject_ids' must be unique, got duplicate IDs ['1']."):
+            GenotypeBitmap.from_genotype_subjects(subjects=self.subjects)
+
+    def test_set_operations(self):
+        bitmap = GenotypeBitmap.from_genotype_subjects(subjects=self.subjects)
+        pvalb = bitmap.subjects_with('Pvalb-IRES-Cre')
+        ai14 = bitmap.subjects_with('Ai14')
+        self.assertEqual(list(pvalb & ai14), ['1'])
+        self.assertEqual(list(pvalb | ai14), ['1', '2', '3'])
+        self.assertEqual(list(pvalb - ai14), ['2'])
+        self.assertEqual(list(~pvalb), ['3'])
+        self.assertEqual((~pvalb).count(), 1)
+        self.assertIn('3', ai14)
+        self.assertNotIn('2', ai14)
+
+    def test_query(self):
+        bitmap = GenotypeBitmap.from_genotype_subjects(subjects=self.subjects, by='locus')
+        self.assertEqual(list(bitmap.query(all_of=['ROSA26'], none_of=['Vip'])), ['1'])
+        self.assertEqual(list(bitmap.query(any_of=['Pvalb', 'Vip'])), ['1', '2', '3'])
+
+    def test_save_load(self):
+        bitmap = GenotypeBitmap.from_genotype_subjects(subjects=self.subjects)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'bitmap.npz')
+            bitmap.save(path)
+            loaded = GenotypeBitmap.load(path)
+        self.assertEqual(loaded.subject_ids.tolist(), ['1', '2', '3'])
+        self.assertEqual(loaded.counts(), bitmap.counts())
+        self.assertEqual(list(loaded.subjects_with('Vip-IRES-Cre')), ['3'])
@@ -0,0 +1,105 @@
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+
+import h5py
+from dateutil.tz import tzlocal
+from hdmf.validate import ValidatorMap
+from pynwb import NWBHDF5IO, NWBFile, validate
+from pynwb.testing import TestCase
+
+from ndx_genotype import (GenotypeSubject, GenotypesTable, AllelesTable, write_allele_catalogue,
+                          open_allele_catalogue, close_allele_catalogues)
+
+
+class TestAlleleCatalogue(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.catalogue_path = os.path.join(self.tmpdir.name, 'alleles.h5')
+        alleles_table = AllelesTable()
+        alleles_table.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre'], recombinase=[[], [], ['Cre']])
+        write_allele_catalogue(self.catalogue_path, alleles_table)
+
+    def tearDown(self):
+        close_allele_catalogues()
+        self.tmpdir.cleanup()
+
+    def write(self, name, catalogue):
+        gt = GenotypesTable(alleles_table=catalogue.alleles_table)
+        gt.add_genotypes(locus=['ROSA26', 'Pvalb'], allele1=['Ai14', 'Pvalb-IRES-Cre'], allele2=['wt', 'wt'])
+        nwbfile = NWBFile(session_description='description', identifier=name,
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id=name, genotypes_table=gt)
+        path = os.path.join(self.tmpdir.name, name + '.nwb')
+        with catalogue.io(path, mode='w') as io:
+            io.write(nwbfile)
+        return path
+
+    def test_open(self):
+        catalogue = open_allele_catalogue(self.catalogue_path)
+        self.assertIs(open_allele_catalogue(os.path.relpath(self.catalogue_path)), catalogue)
+        self.assertEqual(catalogue.alleles_table['symbol'].data[:].tolist(), ['wt', 'Ai14', 'Pvalb-IRES-Cre'])
+        self.assertEqual(catalogue.alleles_table.get_allele_index('Pvalb-IRES-Cre'), 2)
+
+    def test_external_link(self):
+        path = self.write('mouse1', open_allele_catalogue(self.catalogue_path))
+        with h5py.File(path, 'r') as f:
+            group = f['/general/subject/genotypes_table']
+            link = group.get('alleles_table', getlink=True)
+            self.assertIsInstance(link, h5py.ExternalLink)
+            self.assertEqual((link.filename, link.path), ('alleles.h5', '/alleles_table'))
+            self.assertNotIn('table', group['allele1'].attrs)
+            self.assertEqual(group['allele1'].attrs['neurodata_type'], 'AlleleIndex')
+            self.assertEqual(group['allele1'].attrs['catalogue'], 'alleles.h5')
+        # readers without this extension's Python API read the allele columns as plain indices
+        code = ("from pynwb import NWBHDF5IO\n"
+                "with NWBHDF5IO(%r, mode='r', load_namespaces=True) as io:\n"
+                "    table = io.read().subject.genotypes_table\n"
+                "    print(type(table['allele1']).__name__, list(table['allele1'].data[:]))" % path)
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "AlleleIndex [1, 2]")
+
+    def test_validate(self):
+        path = self.write('mouse1', open_allele_catalogue(self.catalogue_path))
+        with NWBHDF5IO(path, mode='r') as io:
+            self.assertEqual(validate(io, namespace='ndx-genotype'), [])
+            # the validator checks general/subject against the spec of Subject, so validate the subject separately
+            validator_map = ValidatorMap(io.manager.namespace_catalog.get_namespace('ndx-genotype'))
+            subject = io.read_builder().groups['general'].groups['subject']
+            self.assertEqual(validator_map.validate(subject), [])
+
+    def test_read(self):
+        catalogue = open_allele_catalogue(self.catalogue_path)
+        paths = [self.write(name, catalogue) for name in ('mouse1', 'mouse2')]
+        ios = [NWBHDF5IO(path, mode='r') for path in paths]
+        try:
+            tables = [io.read().subject.genotypes_table for io in ios]
+            for gt in tables:
+                # the tables of all files share the alleles table of the open catalogue
+                self.assertIs(gt.alleles_table, catalogue.alleles_table)
+                self.assertIs(gt['allele1'].table, catalogue.alleles_table)
+                self.assertEqual(gt.to_dataframe(index=True)['allele1'].tolist(), [1, 2])
+                self.assertEqual(gt[1, 'allele1']['symbol'].tolist(), ['Pvalb-IRES-Cre'])
+        finally:
+            for io in ios:
+                io.close()
+
+    def test_write_errors(self):
+        gt = GenotypesTable()
+        with self.assertRaisesWith(ValueError, "Cannot write AllelesTable 'alleles_table' to a catalogue because it "
+                                               "has a parent."):
+            write_allele_catalogue(os.path.join(self.tmpdir.name, 'other.h5'), gt.alleles_table)
+        catalogue = open_allele_catalogue(self.catalogue_path)
+        gt = GenotypesTable(alleles_table=catalogue.alleles_table)
+        gt.add_genotypes(locus=['ROSA26'], allele1=[1], allele2=[0])
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=gt)
+        msg = ("GenotypesTable 'genotypes_table' uses the alleles table of the catalogue '%s'. Write it with the io of "
+               "the catalogue, AlleleCatalogue.io." % self.catalogue_path)
+        with self.assertRaisesWith(ValueError, msg):
+            with NWBHDF5IO(os.path.join(self.tmpdir.name, 'other.nwb'), mode='w') as io:
+                io.write(nwbfile)
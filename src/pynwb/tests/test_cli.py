@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from pynwb import NWBHDF5IO
+from pynwb.testing import TestCase
+
+from ndx_genotype.cli import main
+
+
+class TestCommandLine(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.inputs = list()
+        for name, rows in (('m1', 'Pvalb\tPvalb-IRES-Cre\twt\nROSA26\tAi14\twt\n'), ('m2', 'ROSA26\tAi14\tAi14\n')):
+            path = os.path.join(self.tmpdir.name, name + '.tsv')
+            with open(path, 'w') as f:
+                f.write('locus\tallele1\tallele2\n' + rows)
+            self.inputs.append(path)
+        self.outputs = [os.path.join(self.tmpdir.name, name + '.nwb') for name in ('m1', 'm2')]
+        self.assertEqual(self.run_main('ingest', *self.inputs, '--output-dir', self.tmpdir.name)[0], 0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_main(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = main(list(argv))
+        return status, out.getvalue(), err.getvalue()
+
+    def test_ingest(self):
+        with NWBHDF5IO(self.outputs[0], mode='r') as nwb_io:
+            subject = nwb_io.read().subject
+            self.assertEqual(subject.subject_id, 'm1')
+            self.assertEqual(subject.genotypes_table.freeze().get_allele_index('Ai14'), 1)
+        # existing files are not replaced without --overwrite
+        status, _, err = self.run_main('ingest', self.inputs[0], '--output-dir', self.tmpdir.name)
+        self.assertEqual(status, 1)
+        self.assertIn('already exists', err)
+
+    def test_dump(self):
+        status, out, _ = self.run_main('dump', *self.outputs, '--format', 'jsonl')
+        self.assertEqual(status, 0)
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([(r['subject_id'], r['locus'], r['allele1'], r['allele2']) for r in rows], [
+            ('m1', 'Pvalb', 'Pvalb-IRES-Cre', 'wt'),
+            ('m1', 'ROSA26', 'Ai14', 'wt'),
+            ('m2', 'ROSA26', 'Ai14', 'Ai14'),
+        ])
+
+    def test_query(self):
+        status, out, _ = self.run_main('query', *self.outputs, '--locus', 'ROSA26', '--allele', 'wt', '--jobs', '2')
+        self.assertEqual(status, 0)
+        self.assertEqual(out.splitlines(), [
+            'file\tsubject_id\tlocus\tallele1\tallele2\tallele3',
+            '%s\tm1\tROSA26\tAi14\twt\t' % self.outputs[0],
+        ])
+
+    def test_serve_remote_host(self):
+        status, _, err = self.run_main('serve', '--host', '0.0.0.0', '--port', '0')
+        self.assertEqual(status, 1)
+        self.assertIn('not a loopback address', err)
@@ -0,0 +1,56 @@
+import numpy as np
+from pynwb.testing import TestCase
+
+from ndx_genotype import predict_cross, predict_crosses
+
+from .utils import make_subject
+
+
+class TestPredictCross(TestCase):
+
+    def setUp(self):
+        # Pvalb-IRES-Cre/wt; Ai14/wt
+        self.father = make_subject('father', [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt')], ['wt'])
+        # wt/wt; Ai14/Ai14, with the alleles in another order
+        self.mother = make_subject('mother', [('Pvalb', 'wt', 'wt'), ('ROSA26', 'Ai14', 'Ai14')], ['Ai14'])
+        # Sst-IRES-Cre/wt, not genotyped at ROSA26
+        self.other = make_subject('other', [('Sst', 'Sst-IRES-Cre', 'wt'), ('Pvalb', 'wt', 'wt')], ['wt'])
+
+    def test_cross(self):
+        prediction = predict_cross(self.father, self.mother)
+        self.assertEqual(len(prediction), 1)
+        self.assertEqual(prediction.distribution(0, 'Pvalb'), {('Pvalb-IRES-Cre', 'wt'): 0.5, ('wt', 'wt'): 0.5})
+        self.assertEqual(prediction.distribution(0, 'ROSA26'), {('Ai14', 'Ai14'): 0.5, ('Ai14', 'wt'): 0.5})
+        df = prediction.to_dataframe()
+        self.assertEqual(df['parent1'].unique().tolist(), ['father'])
+        self.assertEqual(df.groupby('locus')['probability'].sum().tolist(), [1.0, 1.0])
+
+    def test_missing_allele(self):
+        prediction = predict_cross(self.father, self.other)
+        self.assertEqual(prediction.to_dataframe()['locus'].unique().tolist(), ['Pvalb'])
+        self.assertEqual(prediction.distribution(0, 'Sst'), {})
+        prediction = predict_cross(self.father, self.other, missing_allele='wt')
+        self.assertEqual(prediction.distribution(0, 'Sst'), {('Sst-IRES-Cre', 'wt'): 0.5, ('wt', 'wt'): 0.5})
+        self.assertEqual(prediction.distribution(0, 'ROSA26'), {('Ai14', 'wt'): 0.5, ('wt', 'wt'): 0.5})
+
+    def test_all_pairs(self):
+        subjects = [self.father, self.mother, self.other]
+        prediction = predict_crosses(subjects, pairs_per_batch=2)
+        self.assertEqual(prediction.parent_ids.tolist(),
+                         [['father', 'mother'], ['father', 'other'], ['mother', 'other']])
+        for cross, (i, j) in enumerate([(0, 1), (0, 2), (1, 2)]):
+            single = predict_cross(subjects[i], subjects[j])
+            for locus in ('Pvalb', 'ROSA26', 'Sst'):
+                self.assertEqual(prediction.distribution(cross, locus), single.distribution(0, locus))
+        prediction = predict_crosses(subjects, pairs=np.array([[2, 2]]))
+        self.assertEqual(prediction.distribution(0, 'Sst'),
+                         {('Sst-IRES-Cre', 'Sst-IRES-Cre'): 0.25, ('Sst-IRES-Cre', 'wt'): 0.5, ('wt', 'wt'): 0.25})
+        with self.assertRaisesWith(ValueError, "'pairs' must be indices into 'subjects', between 0 and 2."):
+            predict_crosses(subjects, pairs=[[0, 3]])
+
+    def test_most_likely_genotypes_table(self):
+        table = predict_crosses([self.other, self.other], pairs=[[0, 1]]).most_likely_genotypes_table()
+        self.assertEqual(table['locus'].data, ['Pvalb', 'Sst'])
+        self.assertEqual(table.alleles_table['symbol'].data, ['Sst-IRES-Cre', 'wt'])
+        self.assertEqual(table['allele1'].data, [1, 0])
+        self.assertEqual(table['allele2'].data, [1, 1])
@@ -0,0 +1,111 @@
+import datetime
+import json
+import os
+import tempfile
+
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, H5DataIO
+from pynwb.testing import TestCase
+from ndx_external_resources import ERNWBFile
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, GenotypesChangeset, ResourceCache, diff_genotypes_tables
+
+
+def make_table(genotypes, symbols=('wt', 'Pvalb-IRES-Cre', 'Ai14')):
+    gt = GenotypesTable()
+    gt.add_alleles(symbol=list(symbols), recombinase=[['Cre'] if 'Cre' in s else [] for s in symbols])
+    gt.add_genotypes(locus=[g[0] for g in genotypes], allele1=[g[1] for g in genotypes],
+                     allele2=[g[2] for g in genotypes])
+    return gt
+
+
+def rows(gt):
+    return [(r['locus'], r['allele1'], r['allele2']) for r in (gt.freeze()[i] for i in range(len(gt)))]
+
+
+OLD = [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt'), ('Rorb', 'wt', 'wt'), ('Vip', 'wt', 'wt')]
+NEW = [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'Ai14'), ('Vip', 'wt', 'wt'),
+       ('Sst', 'Sst-IRES-Flp', 'wt')]
+
+
+class TestDiff(TestCase):
+
+    def setUp(self):
+        self.old = make_table(OLD)
+        # the new alleles table orders the alleles differently
+        self.new = make_table(NEW, symbols=('Sst-IRES-Flp', 'Ai14', 'wt', 'Pvalb-IRES-Cre'))
+
+    def test_diff(self):
+        changeset = self.old.diff(self.new)
+        self.assertEqual(len(changeset), 3)
+        self.assertEqual(changeset.new_alleles, {'symbol': ['Sst-IRES-Flp'], 'recombinase': [[]]})
+        self.assertEqual(changeset.removed_rows.tolist(), [2])
+        self.assertEqual(changeset.removed_loci, ['Rorb'])
+        self.assertEqual(changeset.changed_rows.tolist(), [1])
+        self.assertEqual(changeset.changed_alleles, [['Ai14', 'Ai14', None]])
+        self.assertEqual(changeset.added_loci, ['Sst'])
+        self.assertEqual(changeset.added_alleles, [['Sst-IRES-Flp', 'wt', None]])
+        self.assertEqual(len(diff_genotypes_tables(self.new, self.new)), 0)
+
+    def test_apply(self):
+        changeset = GenotypesChangeset.from_dict(json.loads(json.dumps(self.old.diff(self.new).to_dict())))
+        changeset.apply(self.old)
+        self.assertEqual(rows(self.old), NEW)
+        self.assertEqual(list(self.old.id.data), [0, 1, 3, 4])
+        self.assertEqual(self.old.alleles_table['recombinase'][3], [])
+        self.assertEqual(len(self.old.diff(self.new)), 0)
+        msg = "GenotypesTable 'genotypes_table' is not the version that the changeset was computed from."
+        with self.assertRaisesWith(ValueError, msg):
+            changeset.apply(self.old)
+
+    def test_apply_in_file(self):
+        nwbfile = ERNWBFile(session_description='description', identifier='id',
+                            session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=self.old)
+        for table in (self.old, self.old.alleles_table):
+            for column in [table.id] + list(table.columns):
+                column.transform(lambda data: H5DataIO(data, maxshape=(None, )))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'genotypes.nwb')
+            with NWBHDF5IO(path, mode='w') as io:
+                io.write(nwbfile)
+            with NWBHDF5IO(path, mode='a') as io:
+                table = io.read().subject.genotypes_table
+                table.diff(self.new).apply(table)
+            with NWBHDF5IO(path, mode='r') as io:
+                table = io.read().subject.genotypes_table
+                self.assertEqual(len(table.diff(self.new)), 0)
+                self.assertEqual(table.alleles_table['recombinase'][1], ['Cre'])
+
+    def test_apply_not_resizable(self):
+        nwbfile = ERNWBFile(session_description='description', identifier='id',
+                            session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=self.old)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'genotypes.nwb')
+            with NWBHDF5IO(path, mode='w') as io:
+                io.write(nwbfile)
+            with NWBHDF5IO(path, mode='a') as io:
+                table = io.read().subject.genotypes_table
+                # changed rows are overwritten in place
+                table.diff(make_table(OLD[:1] + [('ROSA26', 'Ai14', 'Ai14')] + OLD[2:])).apply(table)
+                self.assertEqual(table['allele2'].data[1], 2)
+                msg = ("Dataset '/general/subject/genotypes_table/alleles_table/id' cannot be resized. Write it with "
+                       "H5DataIO(maxshape=(None,)) to add or remove rows in place.")
+                with self.assertRaisesWith(ValueError, msg):
+                    table.diff(self.new).apply(table)
+
+    def test_external_resources(self):
+        nwbfile = ERNWBFile(session_description='description', identifier='id',
+                            session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=self.old)
+        cache = ResourceCache()
+        mgi = ('MGI Database', 'http://www.informatics.jax.org/')
+        cache.add_many([('Rorb', *mgi, 'MGI:1343464', 'http://www.informatics.jax.org/marker/MGI:1343464'),
+                        ('Sst', *mgi, 'MGI:98326', 'http://www.informatics.jax.org/marker/MGI:98326')])
+        cache.add_refs(nwbfile.external_resources, self.old, 'locus', ['Rorb'], 'MGI Database')
+        self.old.diff(self.new).apply(self.old, resource_cache=cache, resource_name='MGI Database')
+        # the reference to the removed locus is kept
+        er = nwbfile.external_resources
+        self.assertEqual([er.keys.data[k][0] for _, k in er.object_keys.data], ['Rorb', 'Sst'])
+        self.assertEqual([e[2] for e in er.entities.data], ['MGI:1343464', 'MGI:98326'])
@@ -0,0 +1,67 @@
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, parse_genotype_strings, add_genotypes_tables_from_strings
+
+
+class TestParseGenotypeStrings(TestCase):
+
+    def test_parse(self):
+        parsed = parse_genotype_strings(
+            ['Pvalb-IRES-Cre/wt;Ai14(RCL-tdT)/wt', None, '', 'Rorb-IRES2-Cre / wt;',
+             'Pvalb-IRES-Cre/wt;Ai14(RCL-tdT)/wt', 'Chrna2-Cre/wt/wt'],
+            locus_map={'Ai14(RCL-tdT)': 'ROSA26'})
+        self.assertEqual(len(parsed), 6)
+        self.assertEqual(parsed.errors, {})
+        self.assertEqual(parsed.genotypes(0), [('Pvalb', 'Pvalb-IRES-Cre', 'wt', None),
+                                               ('ROSA26', 'Ai14(RCL-tdT)', 'wt', None)])
+        self.assertEqual(parsed.genotypes(1), [])
+        self.assertEqual(parsed.genotypes(2), [])
+        self.assertEqual(parsed.genotypes(3), [('Rorb', 'Rorb-IRES2-Cre', 'wt', None)])
+        self.assertEqual(parsed.genotypes(4), parsed.genotypes(0))
+        self.assertEqual(parsed.genotypes(5), [('Chrna2', 'Chrna2-Cre', 'wt', 'wt')])
+        self.assertEqual(parsed.alleles.tolist(),
+                         ['Pvalb-IRES-Cre', 'wt', 'Ai14(RCL-tdT)', 'Rorb-IRES2-Cre', 'Chrna2-Cre'])
+
+    def test_errors(self):
+        parsed = parse_genotype_strings(['Pvalb-IRES-Cre', 'wt/wt', 'Rorb-Cre/wt;Chrna2-Cre/wt/wt', 'a/b/c/d',
+                                         'Sst-IRES-Cre/wt', 'wt/wt'])
+        self.assertEqual(parsed.errors, {0: 'Pvalb-IRES-Cre', 1: 'wt/wt', 2: 'Rorb-Cre/wt;Chrna2-Cre/wt/wt',
+                                         3: 'a/b/c/d', 5: 'wt/wt'})
+        self.assertEqual(parsed.genotypes(1), [])
+        self.assertEqual(parsed.genotypes(4), [('Sst', 'Sst-IRES-Cre', 'wt', None)])
+        # the locus of wild-type genotypes can be given
+        parsed = parse_genotype_strings(['wt/wt'], locus_map={'wt': 'Pvalb'}, wild_type=['wt'])
+        self.assertEqual(parsed.genotypes(0), [('Pvalb', 'wt', 'wt', None)])
+
+    def test_not_strings(self):
+        with self.assertRaisesWith(TypeError, "Genotype strings must be str or None, got int at positions [1, 3]."):
+            parse_genotype_strings(['Pvalb-IRES-Cre/wt', 1, None, 2, float('nan')])
+
+    def test_genotypes_table(self):
+        parsed = parse_genotype_strings(['Chrna2-Cre/wt/wt;Ai14/Ai14/wt', 'x'])
+        table = parsed.genotypes_table(0, process='PCR')
+        self.assertIsInstance(table, GenotypesTable)
+        self.assertEqual(table.process, 'PCR')
+        self.assertEqual(table.alleles_table['symbol'].data, ['Chrna2-Cre', 'Ai14', 'wt'])
+        self.assertEqual(table['locus'].data, ['Chrna2', 'Ai14'])
+        self.assertEqual(table['allele3'].data, [2, 2])
+        self.assertIsNone(parsed.genotypes_table(1))
+
+
+class TestAddGenotypesTablesFromStrings(TestCase):
+
+    def test_add(self):
+        existing = GenotypesTable()
+        subjects = [GenotypeSubject(subject_id='1', genotype='Pvalb-IRES-Cre/wt;Ai14/wt'),
+                    GenotypeSubject(subject_id='2', genotype='Pvalb-IRES-Cre'),
+                    GenotypeSubject(subject_id='3'),
+                    GenotypeSubject(subject_id='4', genotype='Ai14/wt', genotypes_table=existing),
+                    GenotypeSubject(subject_id='5', genotype='Pvalb-IRES-Cre/wt;Ai14/wt')]
+        errors = add_genotypes_tables_from_strings(subjects, locus_map={'Ai14': 'ROSA26'})
+        self.assertEqual(errors, {1: 'Pvalb-IRES-Cre'})
+        self.assertEqual(subjects[0].genotypes_table['locus'].data, ['Pvalb', 'ROSA26'])
+        self.assertIsNone(subjects[1].genotypes_table)
+        self.assertIsNone(subjects[2].genotypes_table)
+        self.assertIs(subjects[3].genotypes_table, existing)
+        self.assertIsNot(subjects[4].genotypes_table, subjects[0].genotypes_table)
+        self.assertEqual(subjects[4].genotypes_table['allele2'].data, [2, 2])
@@ -478,3 +478,61 @@ class TestGenotypeSubjectRoundtrip(TestCase):
             if errors:
                 for err in errors:
                     raise Exception(err)
+
+
+class TestBulkAdd(TestCase):
+
+    def test_add_alleles(self):
+        at = AllelesTable()
+        inds = at.add_alleles(symbol=['Vip-IRES-Cre', 'wt'])
+        self.assertEqual(inds, [0, 1])
+        self.assertEqual(at.symbol.data, ['Vip-IRES-Cre', 'wt'])
+        self.assertEqual(at.add_alleles(symbol=['Ai14']), [2])
+        self.assertEqual(at.get_allele_index(symbol='Ai14'), 2)
+
+    def test_add_alleles_ragged(self):
+        at = AllelesTable()
+        at.add_alleles(symbol=['Vip-IRES-Cre', 'wt'], recombinase=[['Cre'], []])
+        at.add_alleles(symbol=['Ai14'])
+        self.assertEqual(at['recombinase'][:], [['Cre'], [], []])
+        self.assertEqual(at.colnames, ('symbol', 'recombinase'))
+
+    def test_add_alleles_duplicate(self):
+        at = AllelesTable()
+        at.add_alleles(symbol=['wt'])
+        with self.assertRaisesRegex(ValueError, "already exist"):
+            at.add_alleles(symbol=['Ai14', 'wt'])
+        with self.assertRaisesRegex(ValueError, "already exist"):
+            at.add_alleles(symbol=['Ai14', 'Ai14'])
+
+    def test_add_alleles_bad_type(self):
+        at = AllelesTable()
+        with self.assertRaises(TypeError):
+            at.add_alleles(symbol=['wt', 3])
+        with self.assertRaises(TypeError):
+            at.add_alleles(symbol=['wt'], reporter=['tdTomato'])
+
+    def test_add_genotypes(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['Vip-IRES-Cre', 'wt', 'Ai14(RCL-tdT)'])
+        gt.add_genotypes(locus=['Vip', 'ROSA26'], allele1=['Vip-IRES-Cre', 2], allele2=['wt', 'wt'])
+
+        exp = pd.DataFrame({'locus': ['Vip', 'ROSA26'], 'allele1': [0, 2], 'allele2': [1, 1]},
+                           index=pd.Index(name='id', data=[0, 1]))
+        pd.testing.assert_frame_equal(gt.to_dataframe(index=True), exp)
+
+    def test_add_genotypes_allele3(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['Vip-IRES-Cre', 'wt'])
+        gt.add_genotypes(locus=['Vip'], allele1=[0], allele2=[1], allele3=[1])
+        self.assertIs(gt['allele3'].table, gt.alleles_table)
+        with self.assertRaisesRegex(ValueError, "'allele3' must be provided"):
+            gt.add_genotypes(locus=['Vip'], allele1=[0], allele2=[1])
+
+    def test_add_genotypes_unknown_allele(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt'])
+        with self.assertRaisesRegex(ValueError, "not found in alleles table"):
+            gt.add_genotypes(locus=['Vip'], allele1=['Vip-IRES-Cre'], allele2=['wt'])
+        with self.assertRaisesRegex(ValueError, "indices must be between"):
+            gt.add_genotypes(locus=['Vip'], allele1=[1], allele2=[0])
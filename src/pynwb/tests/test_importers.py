@@ -0,0 +1,123 @@
+import gzip
+import os
+import tempfile
+
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, import_tabular_genotypes, import_vcf_genotypes
+
+
+VCF = '''##fileformat=VCFv4.2
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tm1\tm2
+6\t113067428\tPvalb\twt\t<Pvalb-IRES-Cre>\t.\tPASS\t.\tGT\t0/1\t0/0
+6\t113067429\t.\tA\tG,T\t.\tPASS\t.\tGT:DP\t2|1:10\t./.:3
+6\t113067430\tROSA26\twt\t<Ai14>\t.\tPASS\t.\tGT\t./.\t1/1
+6\t113067431\tRorb\twt\t<Rorb-IRES2-Cre>\t.\tPASS\t.\tGT\t1/0\t0/0
+'''
+
+
+def genotypes(table):
+    symbols = table.alleles_table['symbol'].data
+    return [(locus, symbols[a1], symbols[a2])
+            for locus, a1, a2 in zip(table['locus'].data, table['allele1'].data, table['allele2'].data)]
+
+
+class TestImporters(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text, compress=False):
+        path = os.path.join(self.tmpdir.name, name)
+        with (gzip.open(path, 'wt') if compress else open(path, 'w')) as f:
+            f.write(text)
+        return path
+
+    def test_tabular(self):
+        path = self.write('genotypes.csv', 'subject,locus,allele1,allele2\n'
+                                           'm1,Pvalb,Pvalb-IRES-Cre,wt\n'
+                                           'm2,ROSA26,Ai14,wt\n'
+                                           'm1,ROSA26,Ai14,wt\n'
+                                           'm1,Rorb,,wt\n'
+                                           'm1,Vip,wt,wt\n')
+        gt = GenotypesTable()
+        gt.add_allele(symbol='wt')
+        reports = list()
+        stats = import_tabular_genotypes(gt, path, subject_column='subject', subject_id='m1', chunk_size=2,
+                                         progress=reports.append)
+        self.assertEqual(genotypes(gt), [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt'),
+                                         ('Vip', 'wt', 'wt')])
+        # alleles are deduplicated against the existing alleles and across chunks
+        self.assertEqual(gt.alleles_table['symbol'].data, ['wt', 'Pvalb-IRES-Cre', 'Ai14'])
+        self.assertEqual((stats.records, stats.genotypes, stats.alleles, stats.skipped), (4, 3, 2, 1))
+        self.assertEqual(len(reports), 3)
+        self.assertEqual(stats.bytes_read, os.path.getsize(path))
+        self.assertEqual(stats.fraction, 1.0)
+
+    def test_tabular_allele3(self):
+        path = self.write('genotypes.tsv.gz', 'Locus\tA1\tA2\tA3\nPvalb\tPvalb-IRES-Cre\twt\tNone\n', compress=True)
+        gt = GenotypesTable()
+        stats = import_tabular_genotypes(gt, path, locus_column='Locus', allele_columns=['A1', 'A2', 'A3'])
+        self.assertEqual(gt['allele3'].data, [2])
+        self.assertIs(gt['allele3'].table, gt.alleles_table)
+        self.assertIsNone(stats.fraction)
+
+    def test_vcf(self):
+        path = self.write('genotypes.vcf', VCF)
+        gt = GenotypesTable()
+        stats = import_vcf_genotypes(gt, path, chunk_size=3)
+        self.assertEqual(genotypes(gt), [('Pvalb', 'wt', 'Pvalb-IRES-Cre'), ('6:113067429', 'T', 'G'),
+                                         ('Rorb', 'Rorb-IRES2-Cre', 'wt')])
+        self.assertEqual((stats.records, stats.genotypes, stats.skipped), (4, 3, 1))
+
+    def test_vcf_sample(self):
+        path = self.write('genotypes.vcf.gz', VCF, compress=True)
+        gt = GenotypesTable()
+        import_vcf_genotypes(gt, path, sample='m2')
+        self.assertEqual(genotypes(gt), [('Pvalb', 'wt', 'wt'), ('ROSA26', 'Ai14', 'Ai14'), ('Rorb', 'wt', 'wt')])
+        with self.assertRaisesWith(ValueError, "Sample 'm3' not found in VCF file '%s'." % path):
+            import_vcf_genotypes(gt, path, sample='m3')
+
+    def test_vcf_mixed_ploidy(self):
+        path = self.write('genotypes.vcf', VCF.replace('\t./.\t1/1\n', '\t0/1/1\t1/1\n') +
+                          '6\t113067432\tSst\twt\t<Sst-IRES-Cre>\t.\tPASS\t.\tGT\t0/0/1\t0/1/1\n')
+        # the genotypes have the ploidy of the first called record, within and across chunks
+        for chunk_size in (2, 10):
+            gt = GenotypesTable()
+            stats = import_vcf_genotypes(gt, path, chunk_size=chunk_size)
+            self.assertEqual(genotypes(gt), [('Pvalb', 'wt', 'Pvalb-IRES-Cre'), ('6:113067429', 'T', 'G'),
+                                             ('Rorb', 'Rorb-IRES2-Cre', 'wt')])
+            self.assertEqual((stats.records, stats.genotypes, stats.skipped), (5, 3, 2))
+        # or that of the table, if it has genotypes
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt'])
+        gt.add_genotypes(locus=['Vip'], allele1=['wt'], allele2=['wt'], allele3=['wt'])
+        stats = import_vcf_genotypes(gt, path, chunk_size=2)
+        self.assertEqual(gt['locus'].data, ['Vip', 'ROSA26', 'Sst'])
+        self.assertEqual(gt.alleles_table['symbol'].data, ['wt', 'Ai14', 'Sst-IRES-Cre'])
+        self.assertEqual(gt['allele3'].data, [0, 1, 2])
+        self.assertEqual((stats.genotypes, stats.skipped), (2, 3))
+
+    def test_tabular_normalized(self):
+        path = self.write('genotypes.csv', 'locus,allele1,allele2\n'
+                                           'Pvalb,pvalb-ires-cre,WT\n'
+                                           'Pvalb,Pvalb-cre,wt\n'
+                                           'ROSA26,Ai14,wt\n'
+                                           'Sst,Sst-IRES-Cre,wt\n'
+                                           'Sst,SST_IRES_CRE,wt\n')
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Pvalb-IRES-Cre', 'Ai41'])
+        gt.add_allele_synonyms({'Pvalb-cre': 'Pvalb-IRES-Cre'})
+        stats = import_tabular_genotypes(gt, path, chunk_size=4, match='normalized')
+        # symbols that match an allele after normalization or a synonym are added as that allele
+        self.assertEqual(genotypes(gt), [('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('Pvalb', 'Pvalb-IRES-Cre', 'wt'),
+                                         ('ROSA26', 'Ai14', 'wt'), ('Sst', 'Sst-IRES-Cre', 'wt'),
+                                         ('Sst', 'Sst-IRES-Cre', 'wt')])
+        self.assertEqual(gt.alleles_table['symbol'].data, ['wt', 'Pvalb-IRES-Cre', 'Ai41', 'Ai14', 'Sst-IRES-Cre'])
+        self.assertEqual(stats.alleles, 2)
+        # new alleles that are close to existing ones are reported
+        self.assertEqual(stats.near_misses, {'Ai14': ['Ai41'], 'Sst-IRES-Cre': ['Pvalb-IRES-Cre']})
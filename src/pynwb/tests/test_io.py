@@ -0,0 +1,91 @@
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+
+import h5py
+from dateutil.tz import tzlocal
+from hdmf.build import BuildManager
+from pynwb import NWBHDF5IO, NWBFile, get_type_map
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, AllelesTable, read_genotype_subject
+from ndx_genotype.io.genotypes_table import GenotypesTableMap, AllelesTableMap
+from ndx_genotype.io.genotype_subject import GenotypeSubjectMap
+
+
+class TestObjectMappers(TestCase):
+
+    def setUp(self):
+        self.type_map = get_type_map()
+        gt = GenotypesTable(process='PCR', assembly='GRCm38.p6')
+        gt.add_allele(symbol='Rorb-IRES2-Cre')
+        gt.add_allele(symbol='wt')
+        gt.add_allele(symbol='None')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # no ExternalResources are provided for the locus
+            gt.add_genotype(locus='Rorb', allele1=0, allele2=1, allele3=2)
+        self.subject = GenotypeSubject(subject_id='3', genotype='Rorb-IRES2-Cre/wt', genotypes_table=gt)
+
+    def test_registered(self):
+        self.assertIsInstance(self.type_map.get_map(self.subject), GenotypeSubjectMap)
+        self.assertIsInstance(self.type_map.get_map(self.subject.genotypes_table), GenotypesTableMap)
+        self.assertIsInstance(self.type_map.get_map(AllelesTable()), AllelesTableMap)
+
+    def test_build_construct(self):
+        """Test that a GenotypeSubject built with the custom mappers is constructed back to an equal container."""
+        builder = BuildManager(self.type_map).build(self.subject)
+        self.assertEqual(builder['genotypes_table'].attributes['process'], 'PCR')
+        self.assertEqual(builder['genotypes_table']['locus'].data, ['Rorb'])
+
+        constructed = BuildManager(self.type_map).construct(builder)
+        self.assertContainerEqual(self.subject, constructed, ignore_hdmf_attrs=True)
+        self.assertIs(constructed.genotypes_table['allele1'].table, constructed.genotypes_table.alleles_table)
+
+    def test_sparse_columns(self):
+        """Test that ragged allele columns with values in few rows are stored sparsely and read back densely."""
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre', 'Sst-IRES-Flp', 'Ai9', 'Ai32'],
+                       recombinase=[[], [], ['Cre'], ['Flp', 'FlpO'], [], []],
+                       promoter=[['CAG'], ['CAG'], ['Pvalb'], [], ['CAG'], ['CAG']],
+                       reporter=[[], [], [], [], [], ['ChR2']])
+        gt.alleles_table.sparse_columns = ['recombinase', 'promoter']
+        gt.add_genotypes(locus=['Pvalb'], allele1=[2], allele2=[0])
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=gt)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sparse.nwb')
+            with NWBHDF5IO(path, mode='w') as io:
+                io.write(nwbfile)
+            with h5py.File(path, 'r') as f:
+                group = f['/general/subject/genotypes_table/alleles_table']
+                self.assertEqual(group['recombinase_sparse_values'].asstr()[:].tolist(), ['Cre', 'Flp', 'FlpO'])
+                self.assertEqual(group['recombinase_sparse_index'][:].tolist(), [1, 3])
+                self.assertEqual(group['recombinase_rows'][:].tolist(), [2, 3])
+                self.assertNotIn('recombinase', group)
+                self.assertNotIn('recombinase_index', group)
+                self.assertEqual(list(group.attrs['colnames']), ['symbol', 'reporter', 'promoter'])
+                # most rows have a promoter, so the column is stored regularly
+                self.assertNotIn('promoter_rows', group)
+                self.assertEqual(group['promoter_index'][:].tolist(), [1, 2, 3, 3, 4, 5])
+                # columns not in sparse_columns are stored regularly
+                self.assertNotIn('reporter_rows', group)
+            with NWBHDF5IO(path, mode='r') as io:
+                subject = io.read().subject
+                self.assertContainerEqual(nwbfile.subject, subject, ignore_hdmf_attrs=True)
+                alleles_table = subject.genotypes_table.alleles_table
+                self.assertEqual(alleles_table.colnames, ('symbol', 'recombinase', 'reporter', 'promoter'))
+                self.assertEqual([list(alleles_table['recombinase'][i]) for i in range(6)],
+                                 [[], [], ['Cre'], ['Flp', 'FlpO'], [], []])
+                self.assertEqual(alleles_table.sparse_columns, {'recombinase'})
+            # readers without this extension's Python API read the table without the sparse column
+            code = ("from pynwb import NWBHDF5IO\n"
+                    "with NWBHDF5IO(%r, mode='r', load_namespaces=True) as io:\n"
+                    "    print(list(io.read().subject.genotypes_table.alleles_table.colnames))" % path)
+            output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+            self.assertEqual(output.strip(), "['symbol', 'reporter', 'promoter']")
+            alleles_table = read_genotype_subject(path).subject.genotypes_table.alleles_table
+            self.assertEqual(alleles_table['recombinase_index'].data, [0, 0, 1, 3, 3, 3])
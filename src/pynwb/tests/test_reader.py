@@ -0,0 +1,70 @@
+import datetime
+import os
+import tempfile
+
+from dateutil.tz import tzlocal
+from hdmf.common import DynamicTable, VectorData
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+from ndx_external_resources import ERNWBFile
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, read_genotype_subject, read_genotype_subjects
+
+
+MGI = ('MGI Database', 'http://www.informatics.jax.org/')
+
+
+class TestReadGenotypeSubject(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'subject.nwb')
+        nwbfile = ERNWBFile(session_description='description', identifier='id',
+                            session_start_time=datetime.datetime.now(tzlocal()))
+        gt = GenotypesTable(process='PCR')
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotype='Pvalb-IRES-Cre/wt', genotypes_table=gt)
+        gt.add_alleles(symbol=['wt', 'Pvalb-IRES-Cre'], recombinase=[[], ['Cre']])
+        gt.add_genotype(locus='Pvalb', allele1=1, allele2=0, locus_resource_name=MGI[0], locus_resource_uri=MGI[1],
+                        locus_entity_id='MGI:97821', locus_entity_uri='http://www.informatics.jax.org/marker/MGI:97821')
+        other = DynamicTable(name='other', description='not part of the subject',
+                             columns=[VectorData(name='note', description='a note', data=['other'])])
+        nwbfile.add_acquisition(other)
+        nwbfile.external_resources.add_ref(container=other, attribute='note', key='other',
+                                           resource_name='Other', resource_uri='http://example.com/', entity_id='0',
+                                           entity_uri='http://example.com/0')
+        gt.alleles_table.add_external_resource(column='symbol', key='Pvalb-IRES-Cre', resource_name=MGI[0],
+                                               resource_uri=MGI[1], entity_id='MGI:3590684',
+                                               entity_uri='http://www.informatics.jax.org/allele/MGI:3590684')
+        with NWBHDF5IO(self.path, mode='w') as io:
+            io.write(nwbfile)
+        self.subject = nwbfile.subject
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read(self):
+        path, subject, er = read_genotype_subject(self.path)
+        self.assertEqual(path, self.path)
+        self.assertContainerEqual(subject, self.subject, ignore_hdmf_attrs=True)
+        self.assertIsNone(subject.parent)
+        self.assertIs(subject.genotypes_table['allele1'].table, subject.genotypes_table.alleles_table)
+        # only the rows that refer to the subtree are read, re-indexed
+        self.assertEqual(er.keys.data, [('Pvalb', ), ('Pvalb-IRES-Cre', )])
+        self.assertEqual(er.resources.data, [MGI])
+        self.assertEqual(er.objects.data, [(self.subject.genotypes_table['locus'].object_id, '', ''),
+                                           (self.subject.genotypes_table.alleles_table['symbol'].object_id, '', '')])
+        self.assertEqual(er.object_keys.data, [(0, 0), (1, 1)])
+        self.assertEqual([e[:3] for e in er.entities.data], [(0, 0, 'MGI:97821'), (1, 0, 'MGI:3590684')])
+        self.assertEqual(er.to_dataframe()['entity_id'].tolist(), ['MGI:97821', 'MGI:3590684'])
+        self.assertIsNone(read_genotype_subject(self.path, external_resources=False).external_resources)
+
+    def test_read_many(self):
+        path = os.path.join(self.tmpdir.name, 'no_subject.nwb')
+        with NWBHDF5IO(path, mode='w') as io:
+            io.write(NWBFile(session_description='description', identifier='id',
+                             session_start_time=datetime.datetime.now(tzlocal())))
+        results = list(read_genotype_subjects([self.path, path]))
+        self.assertEqual([r.path for r in results], [self.path, path])
+        self.assertEqual(results[0].subject.subject_id, '3')
+        self.assertIsNone(results[1].subject)
+        self.assertIsNone(results[1].external_resources)
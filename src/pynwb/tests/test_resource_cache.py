@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+from hdmf.common.resources import ExternalResources
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, ResourceCache, ResourceRecord
+
+
+MGI = ('MGI Database', 'http://www.informatics.jax.org/')
+
+
+class TestResourceCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'resources.sqlite')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_persisted_and_content_addressed(self):
+        with ResourceCache(self.path) as cache:
+            pvalb = ('Pvalb', *MGI, 'MGI:97821', 'http://www.informatics.jax.org/marker/MGI:97821')
+            rorb = ('Rorb', *MGI, 'MGI:1343464', 'http://www.informatics.jax.org/marker/MGI:1343464')
+            h1 = cache.add(*pvalb)
+            hashes = cache.add_many([pvalb, rorb])
+            self.assertEqual(hashes[0], h1)
+            self.assertEqual(len(cache), 2)
+        with ResourceCache(self.path) as cache:
+            self.assertEqual(cache.get('Rorb', 'MGI Database'),
+                             ResourceRecord('Rorb', *MGI, 'MGI:1343464',
+                                            'http://www.informatics.jax.org/marker/MGI:1343464'))
+            self.assertIsNone(cache.get('Rorb', 'NCBI Gene'))
+            self.assertEqual(sorted(cache.get_many(['Rorb', 'Vip', 'Pvalb'], 'MGI Database')), ['Pvalb', 'Rorb'])
+
+    def test_first_added(self):
+        first = ('Pvalb', *MGI, 'MGI:97821', 'http://www.informatics.jax.org/marker/MGI:97821')
+        second = ('Pvalb', *MGI, 'MGI:0000001', 'http://www.informatics.jax.org/marker/MGI:0000001')
+        with ResourceCache(self.path) as cache:
+            cache.add(*first)
+            cache.add(*second)
+            self.assertEqual(cache.get('Pvalb', MGI[0]), ResourceRecord(*first))
+            cache.add('Pvalb', *MGI, 'MGI:0000002', 'http://www.informatics.jax.org/marker/MGI:0000002')
+            self.assertEqual(cache.get('Pvalb', MGI[0]), ResourceRecord(*first))
+        with ResourceCache(self.path) as cache:
+            cache.add(*second)
+            self.assertEqual(cache.get('Pvalb', MGI[0]), ResourceRecord(*first))
+
+    def test_add_refs(self):
+        cache = ResourceCache()
+        cache.add_many([('Pvalb', *MGI, 'MGI:97821', 'http://www.informatics.jax.org/marker/MGI:97821'),
+                        ('Rorb', *MGI, 'MGI:1343464', 'http://www.informatics.jax.org/marker/MGI:1343464')])
+        er = ExternalResources(name='external_resources')
+        gt1, gt2 = GenotypesTable(), GenotypesTable()
+        missing = cache.add_refs(er, gt1, 'locus', ['Pvalb', 'Rorb', 'Pvalb', 'Vip'], 'MGI Database')
+        self.assertEqual(missing, ['Vip'])
+        cache.add_refs(er, gt2, 'locus', ['Rorb'], 'MGI Database')
+        # the resource is stored once, each key once per object, and each entity once per key
+        self.assertEqual(er.resources.data, [MGI])
+        self.assertEqual(er.objects.data, [(gt1.locus.object_id, '', ''), (gt2.locus.object_id, '', '')])
+        self.assertEqual(er.keys.data, [('Pvalb', ), ('Rorb', ), ('Rorb', )])
+        self.assertEqual(er.object_keys.data, [(0, 0), (0, 1), (1, 2)])
+        self.assertEqual([e[:3] for e in er.entities.data],
+                         [(0, 0, 'MGI:97821'), (1, 0, 'MGI:1343464'), (2, 0, 'MGI:1343464')])
+
+    def test_add_ref(self):
+        cache = ResourceCache()
+        er = ExternalResources(name='external_resources')
+        gt = GenotypesTable()
+        # a reference added by ExternalResources.add_ref is reused
+        er.add_ref(container=gt, attribute='locus', key='Vip', resource_name='MGI Database', resource_uri=MGI[1],
+                   entity_id='MGI:98933', entity_uri='http://www.informatics.jax.org/marker/MGI:98933')
+        self.assertEqual(cache.add_ref(er, gt, 'locus', 'Vip', 'MGI Database', MGI[1], 'MGI:98933',
+                                       'http://www.informatics.jax.org/marker/MGI:98933'), (0, 0, None))
+        self.assertEqual(len(er.keys), 1)
+        self.assertEqual(len(er.entities), 1)
+        # the record was added to the cache and is found by key
+        self.assertEqual(cache.add_ref(er, gt.alleles_table, 'symbol', 'Vip', 'MGI Database'), (1, 0, 1))
+        msg = "No record for key 'Sst' and resource 'MGI Database' in the resource cache."
+        with self.assertRaisesWith(ValueError, msg):
+            cache.add_ref(er, gt, 'locus', 'Sst', 'MGI Database')
+
+    def test_resource_uri_mismatch(self):
+        cache = ResourceCache()
+        er = ExternalResources(name='external_resources')
+        gt = GenotypesTable()
+        cache.add_ref(er, gt, 'locus', 'Vip', 'MGI Database', MGI[1], 'MGI:98933',
+                      'http://www.informatics.jax.org/marker/MGI:98933')
+        msg = "Resource 'MGI Database' has URI 'http://www.informatics.jax.org/', not 'http://www.mgi.org/'."
+        with self.assertRaisesWith(ValueError, msg):
+            cache.add_ref(er, gt, 'locus', 'Sst', 'MGI Database', 'http://www.mgi.org/', 'MGI:98326',
+                          'http://www.informatics.jax.org/marker/MGI:98326')
+        self.assertEqual(len(er.resources), 1)
@@ -0,0 +1,116 @@
+import datetime
+import os
+import tempfile
+import warnings
+
+import numpy as np
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable
+from ndx_genotype._row_buffer import GrowableArray, RowBuffer, StringCodes, RaggedStringCodes, Integers
+
+
+class TestRowBuffer(TestCase):
+
+    def test_growable_array(self):
+        array = GrowableArray(np.int64, capacity=2)
+        for i in range(5):
+            array.append(i)
+        self.assertEqual(len(array), 5)
+        self.assertEqual(array.values.tolist(), [0, 1, 2, 3, 4])
+
+    def test_take(self):
+        buffer = RowBuffer([('symbol', StringCodes), ('recombinase', RaggedStringCodes), ('allele1', Integers)])
+        buffer.append({'symbol': 'Pvalb-IRES-Cre', 'recombinase': ['Cre']})
+        buffer.append({'symbol': 'Ai14', 'recombinase': []})
+        buffer.append({'symbol': 'Chrna2-Cre', 'recombinase': ['Cre', 'Flp']})
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.colnames, ('symbol', 'recombinase'))
+        self.assertEqual(buffer.take(), {'symbol': ['Pvalb-IRES-Cre', 'Ai14', 'Chrna2-Cre'],
+                                         'recombinase': [['Cre'], [], ['Cre', 'Flp']]})
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.take(), dict())
+
+
+class TestBufferedRows(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable()
+        self.gt.add_allele(symbol='wt')
+        self.gt.add_allele(symbol='Ai14')
+        self.gt.add_allele(symbol='Pvalb-IRES-Cre')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            self.gt.add_genotype(locus='ROSA26', allele1='Ai14', allele2='wt')
+            self.gt.add_genotype(locus='Pvalb', allele1=2, allele2=0)
+
+    def test_read(self):
+        self.assertEqual(len(self.gt.alleles_table), 3)
+        self.assertEqual(self.gt.alleles_table.symbol.data, ['wt', 'Ai14', 'Pvalb-IRES-Cre'])
+        self.assertEqual(self.gt.locus.data, ['ROSA26', 'Pvalb'])
+        self.assertEqual(self.gt['allele1'].data, [1, 2])
+        self.assertEqual(self.gt.id.data, [0, 1])
+        self.assertEqual(self.gt.to_dataframe(index=True)['allele2'].tolist(), [0, 0])
+
+    def test_ragged(self):
+        gt = GenotypesTable()
+        self.assertEqual(gt.add_allele(symbol='Pvalb-IRES-Cre', recombinase='Cre'), 0)
+        self.assertEqual(gt.add_allele(symbol='Chrna2-Cre', recombinase='Cre'), 1)
+        self.assertEqual(gt.alleles_table['recombinase'][:], [['Cre'], ['Cre']])
+        gt.add_alleles(symbol=['Rorb-IRES2-Cre'], recombinase=[['Cre', 'Flp']])
+        self.assertEqual(gt.add_allele(symbol='Sst-IRES-Cre', recombinase='Cre'), 3)
+        self.assertEqual(gt.alleles_table['recombinase'][2:], [['Cre', 'Flp'], ['Cre']])
+
+    def test_ragged_precision(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Pvalb-IRES-Cre'], recombinase=[[], ['Cre']])
+        index = gt.alleles_table['recombinase_index']
+        self.assertEqual([type(o) for o in index.data], [np.uint8, np.uint8])
+        # the offsets are widened when they no longer fit, and stay wide when smaller offsets are added
+        gt.add_alleles(symbol=['Ai14'], recombinase=[['Flp'] * 300])
+        gt.add_alleles(symbol=['Ai9'], recombinase=[[]])
+        self.assertEqual(index.data, [0, 1, 301, 301])
+        self.assertEqual([type(o) for o in index.data], [np.uint16] * 4)
+
+    def test_explicit_ids(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt'])
+        gt.add_genotypes(locus=['ROSA26', 'Pvalb'], allele1=[0, 0], allele2=[0, 0])
+        gt.id.data[:] = [3, 7]  # e.g., the IDs left after rows were removed
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            gt.add_genotype(locus='Sst', allele1='wt', allele2='wt')
+        gt.add_genotypes(locus=['Vip'], allele1=[0], allele2=[0])
+        self.assertEqual(gt.id.data, [3, 7, 8, 9])
+
+    def test_add_after_read(self):
+        self.assertEqual(len(self.gt), 2)
+        self.assertEqual(self.gt.add_allele(symbol='Sst-IRES-Cre'), 3)
+        self.assertEqual(self.gt.get_allele_index('Sst-IRES-Cre'), 3)
+        with self.assertRaisesWith(ValueError, "Allele symbol 'Ai14' already exists in AllelesTable."):
+            self.gt.add_allele(symbol='Ai14')
+        self.gt.add_alleles(symbol=['Rorb-IRES2-Cre'])
+        self.assertEqual(self.gt.get_allele_index('Rorb-IRES2-Cre'), 4)
+        with self.assertRaisesWith(ValueError, "Allele symbol 'Rorb-IRES2-Cre' already exists in AllelesTable."):
+            self.gt.add_allele(symbol='Rorb-IRES2-Cre')
+        self.assertEqual(self.gt.alleles_table.symbol.data[3:], ['Sst-IRES-Cre', 'Rorb-IRES2-Cre'])
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            self.gt.add_genotype(locus='Sst', allele1='Sst-IRES-Cre', allele2=0)
+        self.assertEqual(self.gt['allele1'].data, [1, 2, 3])
+
+    def test_roundtrip(self):
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=self.gt)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'buffered.nwb')
+            with NWBHDF5IO(path, mode='w') as io:
+                io.write(nwbfile)
+            with NWBHDF5IO(path, mode='r') as io:
+                read_gt = io.read().subject.genotypes_table
+                self.assertEqual(read_gt['locus'].data[:].tolist(), ['ROSA26', 'Pvalb'])
+                self.assertEqual(read_gt['allele1'].data[:].tolist(), [1, 2])
+                self.assertEqual(read_gt.alleles_table['symbol'].data[:].tolist(), ['wt', 'Ai14', 'Pvalb-IRES-Cre'])
@@ -0,0 +1,79 @@
+import datetime
+import pickle
+
+from dateutil.tz import tzlocal
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, AllelesTable, to_bytes, from_bytes
+from ndx_genotype.serialization import encode_strings, decode_strings
+
+
+class TestSerialization(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable(process='PCR', assembly='GRCm38.p6', description='genotypes')
+        self.gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre'], recombinase=[[], [], ['Cre']])
+        self.gt.add_genotypes(locus=['Rosa26', 'Pvalb', 'Rosa26'], allele1=[1, 2, 0], allele2=[0, 0, 0])
+        self.subject = GenotypeSubject(subject_id='mouse1', weight='20 g', genotypes_table=self.gt,
+                                       date_of_birth=datetime.datetime(2020, 1, 1, tzinfo=tzlocal()))
+
+    def assertTablesEqual(self, table1, table2):
+        self.assertEqual(table1.name, table2.name)
+        self.assertEqual(table1.colnames, table2.colnames)
+        self.assertTrue(table1.to_dataframe(index=True).equals(table2.to_dataframe(index=True)))
+
+    def test_strings(self):
+        strings = ['wt', '', 'Pvalb-IRES-Cre', 'Δexon2']
+        buffer, offsets = encode_strings(strings)
+        self.assertEqual(offsets.tolist(), [2, 2, 16, 23])
+        self.assertEqual(decode_strings(buffer, offsets), strings)
+        self.assertEqual(decode_strings(*encode_strings([])), [])
+
+    def test_genotypes_table(self):
+        buffers = list()
+        data = to_bytes(self.gt, buffer_callback=buffers.append)
+        self.assertTrue(buffers)
+        gt = from_bytes(data, buffers=buffers)
+        self.assertIsInstance(gt, GenotypesTable)
+        self.assertTablesEqual(gt, self.gt)
+        self.assertTablesEqual(gt.alleles_table, self.gt.alleles_table)
+        self.assertEqual((gt.description, gt.process, gt.assembly, gt.annotation),
+                         ('genotypes', 'PCR', 'GRCm38.p6', None))
+        self.assertIs(gt['allele1'].table, gt.alleles_table)
+        self.assertIs(gt.alleles_table.parent, gt)
+        # the new table can be modified
+        gt.add_genotypes(locus=['Ai14'], allele1=[1], allele2=[1])
+        gt.add_alleles(symbol=['Flp'], recombinase=[['Flp']])
+        gt.sort_by_locus()
+        self.assertEqual(gt['locus'].data, ['Ai14', 'Pvalb', 'Rosa26', 'Rosa26'])
+        self.assertEqual(gt.get_allele_index('Flp'), 3)
+
+    def test_pickle(self):
+        self.gt.sort_by_locus()
+        gt = pickle.loads(pickle.dumps(self.gt))
+        self.assertTablesEqual(gt, self.gt)
+        self.assertEqual(gt.sorted_by, 'locus')
+        alleles_table = pickle.loads(pickle.dumps(AllelesTable()))
+        self.assertEqual(len(alleles_table), 0)
+
+    def test_sparse_columns(self):
+        self.gt.alleles_table.sparse_columns = ['recombinase']
+        gt = pickle.loads(pickle.dumps(self.gt))
+        self.assertEqual(gt.alleles_table.sparse_columns, {'recombinase'})
+        self.assertTablesEqual(gt.alleles_table, self.gt.alleles_table)
+        self.assertEqual(from_bytes(to_bytes(AllelesTable())).sparse_columns, frozenset())
+
+    def test_subject(self):
+        other = GenotypesTable(name='other', alleles_table=self.gt.alleles_table)
+        subject, gt = from_bytes(to_bytes([self.subject, other]))
+        self.assertEqual((subject.subject_id, subject.weight, subject.date_of_birth),
+                         ('mouse1', '20 g', self.subject.date_of_birth))
+        self.assertTablesEqual(subject.genotypes_table, self.gt)
+        # tables that share an alleles table still share it
+        self.assertIs(gt.alleles_table, subject.genotypes_table.alleles_table)
+
+    def test_extra_column(self):
+        self.gt.add_column(name='notes', description='notes', data=['a', 'b', 'c'])
+        with self.assertRaisesWith(TypeError, "Cannot pickle GenotypesTable 'genotypes_table' with columns "
+                                              "['notes'] that are not defined in the spec."):
+            to_bytes(self.gt)
@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable, GenotypeQueryServer, GenotypeQueryClient, run_load_test
+from ndx_genotype.reader import _read_subject
+
+
+def _write(path, subject_id, rows):
+    gt = GenotypesTable()
+    gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre'])
+    gt.add_genotypes(locus=[r[0] for r in rows], allele1=[r[1] for r in rows], allele2=[r[2] for r in rows])
+    nwbfile = NWBFile(session_description='description', identifier=subject_id,
+                      session_start_time=datetime.datetime.now(tzlocal()))
+    nwbfile.subject = GenotypeSubject(subject_id=subject_id, genotypes_table=gt)
+    with NWBHDF5IO(path, mode='w') as io:
+        io.write(nwbfile)
+
+
+class TestGenotypeQueryServer(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpdir.name, name + '.nwb') for name in ('m1', 'm2')]
+        _write(self.paths[0], 'm1', [('Pvalb', 2, 0), ('ROSA26', 1, 0)])
+        _write(self.paths[1], 'm2', [('ROSA26', 1, 1)])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_clients(self, func, **kwargs):
+        async def run():
+            server = GenotypeQueryServer(**kwargs)
+            await server.start(port=0)
+            try:
+                async with await GenotypeQueryClient.connect(port=server.address[1]) as client:
+                    return await func(client)
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_queries(self):
+        async def func(client):
+            rows = await client.genotypes(self.paths, loci=['ROSA26'], alleles=['wt'])
+            subjects = await client.subjects(self.paths)
+            alleles = await client.alleles(self.paths[:1])
+            rows_all = await asyncio.gather(*[client.genotypes(self.paths) for _ in range(3)])
+            return rows, subjects, alleles, rows_all, await client.stats()
+
+        rows, subjects, alleles, rows_all, stats = self.run_clients(func)
+        self.assertEqual(rows, [[self.paths[0], 'm1', 'ROSA26', 'Ai14', 'wt', None]])
+        self.assertEqual(subjects, [[self.paths[0], 'm1', 2], [self.paths[1], 'm2', 1]])
+        self.assertEqual(alleles, [[self.paths[0], ['wt', 'Ai14', 'Pvalb-IRES-Cre']]])
+        self.assertEqual(len(rows_all[0]), 3)
+        # each file is read once, and the other queries are answered from the cache
+        self.assertEqual((stats['requests'], stats['misses'], stats['hits'], stats['opened_files']), (7, 2, 9, 2))
+
+    def test_modified_file(self):
+        async def func(client):
+            before = await client.subjects(self.paths[:1])
+            path = os.path.join(self.tmpdir.name, 'new.nwb')
+            _write(path, 'm3', [('Pvalb', 2, 2)])
+            os.replace(path, self.paths[0])
+            after = await client.subjects(self.paths[:1])
+            await client.invalidate(self.paths[:1])
+            return before, after, await client.stats()
+
+        before, after, stats = self.run_clients(func, max_open_files=1)
+        self.assertEqual(before, [[self.paths[0], 'm1', 2]])
+        self.assertEqual(after, [[self.paths[0], 'm3', 1]])
+        self.assertEqual((stats['misses'], stats['cached_files'], stats['open_files']), (2, 0, 0))
+
+    def test_reads_in_worker(self):
+        threads = list()
+
+        def read(*args):
+            threads.append(threading.current_thread())
+            return _read_subject(*args)
+
+        async def func(client):
+            await client.subjects(self.paths[:1])
+            await client.subjects(self.paths)  # one file is cached and the other is not
+            return await client.stats()
+
+        with mock.patch('ndx_genotype.server._read_subject', side_effect=read):
+            stats = self.run_clients(func)
+        # the files are read by the worker thread, not by the event loop of the main thread
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertEqual((stats['requests'], stats['hits'], stats['misses']), (3, 1, 2))
+
+    def test_errors(self):
+        async def func(client):
+            with self.assertRaisesWith(RuntimeError, "ValueError: Unknown op 'delete'."):
+                await client.request('delete')
+            with self.assertRaisesRegex(RuntimeError, 'FileNotFoundError'):
+                await client.subjects([os.path.join(self.tmpdir.name, 'missing.nwb')])
+            # the connection can still be used
+            return await client.subjects(self.paths[1:])
+
+        self.assertEqual(self.run_clients(func), [[self.paths[1], 'm2', 1]])
+
+    def test_remote_host(self):
+        async def start(host, **kwargs):
+            server = GenotypeQueryServer()
+            try:
+                await server.start(host=host, port=0, **kwargs)
+                return server.address[0]
+            finally:
+                await server.close()
+
+        with self.assertRaisesWith(ValueError, "Host '0.0.0.0' is not a loopback address. Use allow_remote=True to "
+                                               "listen on it."):
+            asyncio.run(start('0.0.0.0'))
+        self.assertIn(asyncio.run(start('localhost')), ('127.0.0.1', '::1'))
+        self.assertEqual(asyncio.run(start('0.0.0.0', allow_remote=True)), '0.0.0.0')
+
+    def test_load_test(self):
+        result = run_load_test(self.paths, clients=4, requests=5, loci=['ROSA26'])
+        self.assertEqual(result['requests'], 20)
+        self.assertEqual((result['cache_misses'], result['cache_hits']), (2, 38))
+        self.assertGreater(result['requests_per_second'], 0)
+        self.assertLessEqual(result['latency_p50_ms'], result['latency_max_ms'])
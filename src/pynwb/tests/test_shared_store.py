@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeStore, write_genotype_store
+
+from .utils import make_genotypes_table
+
+
+class TestGenotypeStore(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cohort.gts')
+        tables = [
+            make_genotypes_table([('Pvalb', 'Pvalb-IRES-Cre', 'wt'), ('ROSA26', 'Ai14', 'wt')]),
+            make_genotypes_table([('ROSA26', 'wt', 'Ai14')]),
+            make_genotypes_table([]),
+        ]
+        write_genotype_store(self.path, tables, ['m1', 'm2', 'm3'])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read(self):
+        with GenotypeStore(self.path) as store:
+            self.assertEqual(store.num_subjects, 3)
+            self.assertEqual(store.subject_ids.tolist(), ['m1', 'm2', 'm3'])
+            self.assertEqual(store.get_genotypes('m1'), [
+                {'locus': 'Pvalb', 'allele1': 'Pvalb-IRES-Cre', 'allele2': 'wt'},
+                {'locus': 'ROSA26', 'allele1': 'Ai14', 'allele2': 'wt'},
+            ])
+            self.assertEqual(store.get_genotypes('m2'), [{'locus': 'ROSA26', 'allele1': 'wt', 'allele2': 'Ai14'}])
+            self.assertEqual(store.get_genotypes('m3'), [])
+            with self.assertRaises(KeyError):
+                store.get_genotypes('m4')
+
+    def test_deduplicated_catalogue(self):
+        with GenotypeStore(self.path) as store:
+            self.assertEqual(sorted(store.symbols.tolist()), ['Ai14', 'Pvalb-IRES-Cre', 'wt'])
+            self.assertEqual(store.symbols[store.get_symbol_code('Ai14')], 'Ai14')
+            self.assertIsNone(store.get_symbol_code('Vip-IRES-Cre'))
+
+    def test_queries(self):
+        with GenotypeStore(self.path) as store:
+            self.assertEqual(store.subjects_with_allele('Ai14'), ['m1', 'm2'])
+            self.assertEqual(store.subjects_with_allele('Pvalb-IRES-Cre'), ['m1'])
+            self.assertEqual(store.subjects_with_locus('ROSA26'), ['m1', 'm2'])
+            self.assertEqual(store.subjects_with_locus('Vip'), [])
+
+    def test_not_a_store(self):
+        path = os.path.join(self.tmpdir.name, 'other.bin')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            GenotypeStore(path)
+
+    def test_duplicate_subjects(self):
+        tables = [make_genotypes_table([('ROSA26', 'wt', 'Ai14')]), make_genotypes_table([])]
+        with self.assertRaisesWith(ValueError, "'subject_ids' must be unique, got duplicate IDs ['1']."):
+            write_genotype_store(os.path.join(self.tmpdir.name, 'other.gts'), tables, [1, '1'])
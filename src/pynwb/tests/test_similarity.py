@@ -0,0 +1,97 @@
+import datetime
+import os
+import tempfile
+
+import numpy as np
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, MinHashIndex
+
+from .utils import make_subject
+
+
+def _subject(subject_id, num_loci, cre_loci=()):
+    """A subject that is wt/wt at num_loci loci, except Cre/wt at the given loci."""
+    genotypes = [('locus%d' % i, 'Cre' if i in cre_loci else 'wt', 'wt') for i in range(num_loci)]
+    return make_subject(subject_id, genotypes, ['wt', 'Cre'])
+
+
+class TestMinHashIndex(TestCase):
+
+    def setUp(self):
+        self.subjects = [
+            _subject('a', 20),
+            _subject('b', 20, cre_loci=[0]),
+            _subject('c', 20, cre_loci=range(10)),
+            _subject('d', 5),
+        ]
+        self.index = MinHashIndex.from_genotype_subjects(self.subjects, num_perm=256, num_bands=64)
+
+    def test_signature(self):
+        gt = self.subjects[0].genotypes_table
+        self.assertEqual(self.index.signature(gt).dtype, np.uint64)
+        self.assertEqual(self.index.signature(gt).tolist(), self.index.signatures[0].tolist())
+        # the signature does not depend on the order of the rows or of the alleles table
+        other = GenotypesTable()
+        other.add_alleles(symbol=['Cre', 'wt'])
+        other.add_genotypes(locus=['locus%d' % i for i in reversed(range(20))], allele1=[1] * 20, allele2=[1] * 20)
+        self.assertEqual(self.index.signature(other).tolist(), self.index.signatures[0].tolist())
+        self.assertNotEqual(MinHashIndex(num_perm=256, seed=2).signature(gt).tolist(),
+                            self.index.signatures[0].tolist())
+
+    def test_jaccard(self):
+        self.assertEqual(self.index.jaccard('a', 'a'), 1.0)
+        # 20 of the 21 (locus, allele) pairs of a and b are shared
+        self.assertAlmostEqual(self.index.jaccard('a', self.subjects[1]), 20 / 21, delta=0.1)
+        self.assertAlmostEqual(self.index.jaccard('a', 'c'), 20 / 30, delta=0.15)
+        self.assertAlmostEqual(self.index.jaccard('a', self.subjects[3].genotypes_table), 5 / 20, delta=0.15)
+
+    def test_query(self):
+        result = self.index.query('a', k=2)
+        self.assertEqual([subject_id for subject_id, _ in result], ['b', 'c'])
+        self.assertGreater(result[0][1], result[1][1])
+        self.assertEqual([subject_id for subject_id, _ in self.index.query(self.subjects[0], k=1)], ['b'])
+        # a query by table does not exclude the identical subject
+        self.assertEqual(self.index.query(self.subjects[0].genotypes_table, k=1), [('a', 1.0)])
+        self.assertEqual(self.index.query('a', min_similarity=0.9)[0][0], 'b')
+        with self.assertRaisesWith(KeyError, "\"Subject 'e' is not in the index.\""):
+            self.index.query('e')
+
+    def test_incremental(self):
+        index = MinHashIndex(num_perm=256, num_bands=64)
+        for subject in self.subjects:
+            index.add_subject(subject)
+        self.assertEqual(index.signatures.tolist(), self.index.signatures.tolist())
+        self.assertEqual(index.query('a'), self.index.query('a'))
+        with self.assertRaisesWith(ValueError, "Subject 'a' is already in the index."):
+            index.add_subject(self.subjects[0])
+        index.add('e', self.subjects[0].genotypes_table)
+        self.assertEqual(index.query('a', k=1), [('e', 1.0)])
+        with self.assertRaisesWith(ValueError, "'num_bands' must divide 'num_perm', got 3 and 128."):
+            MinHashIndex(num_bands=3)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'index.npz')
+            self.index.save(path)
+            loaded = MinHashIndex.load(path)
+        self.assertEqual((loaded.num_perm, loaded.num_bands, loaded.seed), (256, 64, 1))
+        self.assertEqual(loaded.subject_ids, ['a', 'b', 'c', 'd'])
+        self.assertEqual(loaded.signatures.tolist(), self.index.signatures.tolist())
+        self.assertEqual(loaded.query('a'), self.index.query('a'))
+
+    def test_from_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = list()
+            for subject in self.subjects:
+                nwbfile = NWBFile(session_description='description', identifier='id',
+                                  session_start_time=datetime.datetime.now(tzlocal()))
+                nwbfile.subject = subject
+                paths.append(os.path.join(tmpdir, 'subject_%s.nwb' % subject.subject_id))
+                with NWBHDF5IO(paths[-1], mode='w') as io:
+                    io.write(nwbfile)
+            index = MinHashIndex.from_files(paths, num_perm=256, num_bands=64)
+        self.assertEqual(index.subject_ids, ['a', 'b', 'c', 'd'])
+        self.assertEqual(index.signatures.tolist(), self.index.signatures.tolist())
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, GenotypesSnapshot, AllelesSnapshot
+
+
+class TestGenotypesSnapshot(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable(process='PCR')
+        self.gt.add_allele(symbol='Vip-IRES-Cre')
+        self.gt.add_allele(symbol='wt')
+        self.gt.add_allele(symbol='Ai14(RCL-tdT)')
+        self.gt.add_row(locus='Vip', allele1=0, allele2=1)
+        self.gt.add_row(locus='ROSA26', allele1=2, allele2=1)
+        self.gt.add_row(locus='Vip', allele1=1, allele2=1)
+
+    def test_freeze(self):
+        snapshot = self.gt.freeze()
+        self.assertIsInstance(snapshot, GenotypesSnapshot)
+        self.assertIsInstance(snapshot.alleles_table, AllelesSnapshot)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.process, 'PCR')
+        self.assertEqual(snapshot.colnames, ('locus', 'allele1', 'allele2'))
+        self.assertEqual(snapshot['locus'], ['Vip', 'ROSA26', 'Vip'])
+        self.assertEqual(snapshot['allele1'], [0, 2, 1])
+        self.assertEqual(snapshot[1], {'locus': 'ROSA26', 'allele1': 'Ai14(RCL-tdT)', 'allele2': 'wt'})
+        self.assertEqual(len(list(snapshot)), 3)
+
+    def test_lookups(self):
+        snapshot = self.gt.freeze()
+        self.assertEqual(snapshot.get_allele_index('Ai14(RCL-tdT)'), self.gt.get_allele_index('Ai14(RCL-tdT)'))
+        self.assertIsNone(snapshot.get_allele_index('not_an_allele'))
+        np.testing.assert_array_equal(snapshot.get_locus_rows('Vip'), [0, 2])
+        self.assertEqual(len(snapshot.get_locus_rows('Rorb')), 0)
+
+    def test_to_dataframe(self):
+        snapshot = self.gt.freeze()
+        pd.testing.assert_frame_equal(snapshot.to_dataframe(index=True), self.gt.to_dataframe(index=True),
+                                      check_dtype=False)
+        pd.testing.assert_frame_equal(snapshot.alleles_table.to_dataframe(), self.gt.alleles_table.to_dataframe())
+
+    def test_ids(self):
+        self.gt.id.data[:] = [3, 5, 8]
+        self.gt.alleles_table.id.data[:] = [10, 11, 12]
+        snapshot = self.gt.freeze()
+        self.assertEqual(snapshot.ids.tolist(), [3, 5, 8])
+        pd.testing.assert_frame_equal(snapshot.to_dataframe(index=True), self.gt.to_dataframe(index=True),
+                                      check_dtype=False)
+        pd.testing.assert_frame_equal(snapshot.alleles_table.to_dataframe(), self.gt.alleles_table.to_dataframe())
+
+    def test_missing_column(self):
+        snapshot = self.gt.freeze()
+        with self.assertRaises(KeyError):
+            snapshot['allele3']
+        gt = GenotypesTable()
+        gt.add_genotypes(locus=[], allele1=[], allele2=[], allele3=[])
+        self.assertEqual(gt.freeze().colnames, ('locus', 'allele1', 'allele2', 'allele3'))
+        self.assertEqual(gt.freeze()['allele3'], [])
+
+    def test_read_only(self):
+        snapshot = self.gt.freeze()
+        with self.assertRaises(AttributeError):
+            snapshot.process = 'other'
+        with self.assertRaises(ValueError):
+            snapshot.allele_indices[0, 0] = 5
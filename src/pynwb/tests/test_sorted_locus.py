@@ -0,0 +1,73 @@
+import datetime
+import os
+import tempfile
+
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile, H5DataIO
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable
+
+
+class TestSortedByLocus(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable()
+        self.gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre', 'Rorb-IRES2-Cre'])
+        self.gt.add_genotypes(locus=['ROSA26', 'Pvalb', 'Rorb', 'Pvalb', 'Ai14'], allele1=[1, 2, 3, 0, 1],
+                              allele2=[0, 0, 0, 0, 1])
+
+    def test_sort(self):
+        self.assertIsNone(self.gt.sorted_by)
+        self.assertEqual(self.gt.get_locus_rows('Pvalb').tolist(), [1, 3])
+        self.gt.sort_by_locus()
+        self.assertEqual(self.gt.sorted_by, 'locus')
+        self.assertEqual(self.gt['locus'].data, ['Ai14', 'Pvalb', 'Pvalb', 'ROSA26', 'Rorb'])
+        self.assertEqual(self.gt.id.data, [4, 1, 3, 0, 2])
+        self.assertEqual(self.gt['allele1'].data, [1, 2, 0, 1, 3])
+        self.assertEqual(self.gt.get_locus_rows('Pvalb').tolist(), [1, 2])
+        self.assertEqual(self.gt.get_locus_rows('Sst').tolist(), [])
+
+    def test_add_rows(self):
+        self.gt.sort_by_locus()
+        # rows added in order keep the table sorted
+        self.gt.add_genotypes(locus=['Sst', 'Vip'], allele1=[0, 0], allele2=[0, 0])
+        self.gt.add_row(locus='Vip', allele1=0, allele2=0)
+        self.assertEqual(self.gt.sorted_by, 'locus')
+        self.gt.add_row(locus='Chrna2', allele1=0, allele2=0)
+        self.assertIsNone(self.gt.sorted_by)
+        self.assertEqual(self.gt.get_locus_rows('Vip').tolist(), [6, 7])
+
+    def test_bad_sorted_by(self):
+        with self.assertRaisesWith(ValueError, "'sorted_by' must be 'locus' or None, not 'symbol'."):
+            GenotypesTable(sorted_by='symbol')
+
+    def test_roundtrip(self):
+        self.gt.sort_by_locus()
+        new = GenotypesTable()
+        new.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre', 'Rorb-IRES2-Cre'])
+        new.add_genotypes(locus=self.gt['locus'].data + ['Chrna2'], allele1=self.gt['allele1'].data + [0],
+                          allele2=self.gt['allele2'].data + [0])
+        for column in [self.gt.id] + list(self.gt.columns):
+            column.transform(lambda data: H5DataIO(data, chunks=(2, ), maxshape=(None, )))
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=self.gt)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'sorted.nwb')
+            with NWBHDF5IO(path, mode='w') as io:
+                io.write(nwbfile)
+            with NWBHDF5IO(path, mode='a') as io:
+                gt = io.read().subject.genotypes_table
+                self.assertEqual(gt.sorted_by, 'locus')
+                with self.assertRaisesWith(ValueError, "Cannot sort GenotypesTable 'genotypes_table' because the data "
+                                                       "of 'id' is not a list. Tables must be sorted before they are "
+                                                       "written."):
+                    gt.sort_by_locus()
+                self.assertEqual(gt.get_locus_rows('Pvalb').tolist(), [1, 2])
+                self.assertEqual(gt.get_locus_rows('Rorb').tolist(), [4])
+                # adding a row out of order in place removes the attribute
+                gt.diff(new).apply(gt)
+                self.assertIsNone(gt.sorted_by)
+            with NWBHDF5IO(path, mode='r') as io:
+                self.assertIsNone(io.read().subject.genotypes_table.sorted_by)
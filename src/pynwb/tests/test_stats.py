@@ -0,0 +1,74 @@
+import datetime
+import os
+import tempfile
+
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, GenotypeStatistics
+
+from .utils import make_subject
+
+SYMBOLS = ('wt', 'Ai14', 'Pvalb-IRES-Cre')
+
+
+class TestGenotypeStatistics(TestCase):
+
+    def setUp(self):
+        self.subjects = [
+            make_subject('1', [('ROSA26', 'Ai14', 'wt'), ('Pvalb', 'Pvalb-IRES-Cre', 'wt')], SYMBOLS),
+            make_subject('2', [('ROSA26', 'Ai14', 'Ai14'), ('Pvalb', 'wt', 'Pvalb-IRES-Cre')], SYMBOLS),
+            # the same alleles in another order in the alleles table
+            make_subject('3', [('ROSA26', 'Ai14', 'wt')], ('Ai14', 'wt')),
+        ]
+
+    def test_counts(self):
+        stats = GenotypeStatistics.from_genotype_subjects(self.subjects)
+        self.assertEqual(stats.num_subjects, 3)
+        self.assertEqual(stats.loci, ['Pvalb', 'ROSA26'])
+        self.assertEqual(stats.locus_subjects['ROSA26'], 3)
+        self.assertEqual(stats.allele_frequencies('ROSA26'), {'Ai14': 4 / 6, 'wt': 2 / 6})
+        self.assertEqual(stats.allele_frequencies('Pvalb'), {'Pvalb-IRES-Cre': 0.5, 'wt': 0.5})
+        self.assertEqual(stats.genotype_distribution('ROSA26'), {('Ai14', 'Ai14'): 1, ('Ai14', 'wt'): 2})
+        self.assertEqual(stats.genotype_distribution('Pvalb'), {('Pvalb-IRES-Cre', 'wt'): 2})
+        self.assertEqual(stats.zygosity_distribution('ROSA26'), {'homozygous': 1, 'heterozygous': 2})
+        self.assertEqual(stats.zygosity_distribution('Sst'), {'homozygous': 0, 'heterozygous': 0})
+
+    def test_merge(self):
+        stats = GenotypeStatistics.from_genotype_subjects(self.subjects)
+        partial = [GenotypeStatistics.from_genotype_subjects(self.subjects[:1]),
+                   GenotypeStatistics.from_genotype_subjects(self.subjects[1:])]
+        self.assertEqual(partial[0] + partial[1], stats)
+        self.assertEqual(partial[1].merge(partial[0]), stats)
+        self.assertEqual(GenotypeStatistics() + stats, stats)
+
+    def test_allele3(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Ai14'])
+        gt.add_genotypes(locus=['ROSA26', 'ROSA26'], allele1=[1, 0], allele2=[1, 0], allele3=[1, 1])
+        stats = GenotypeStatistics()
+        stats.add_table(gt)
+        self.assertEqual(stats.allele_frequencies('ROSA26'), {'Ai14': 4 / 6, 'wt': 2 / 6})
+        self.assertEqual(stats.genotype_distribution('ROSA26'), {('Ai14', 'Ai14', 'Ai14'): 1, ('Ai14', 'wt', 'wt'): 1})
+        self.assertEqual(stats.zygosity_distribution('ROSA26'), {'homozygous': 1, 'heterozygous': 1})
+
+    def test_allele_frequency_table(self):
+        df = GenotypeStatistics.from_genotype_subjects(self.subjects).allele_frequency_table()
+        self.assertEqual(df['locus'].tolist(), ['Pvalb', 'Pvalb', 'ROSA26', 'ROSA26'])
+        self.assertEqual(df['allele'].tolist(), ['Pvalb-IRES-Cre', 'wt', 'Ai14', 'wt'])
+        self.assertEqual(df['count'].tolist(), [2, 2, 4, 2])
+        self.assertEqual(df['frequency'].tolist(), [0.5, 0.5, 4 / 6, 2 / 6])
+
+    def test_from_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = list()
+            for subject in self.subjects:
+                nwbfile = NWBFile(session_description='description', identifier='id',
+                                  session_start_time=datetime.datetime.now(tzlocal()))
+                nwbfile.subject = subject
+                paths.append(os.path.join(tmpdir, 'subject%s.nwb' % subject.subject_id))
+                with NWBHDF5IO(paths[-1], mode='w') as io:
+                    io.write(nwbfile)
+            stats = GenotypeStatistics.from_files(paths)
+        self.assertEqual(stats, GenotypeStatistics.from_genotype_subjects(self.subjects))
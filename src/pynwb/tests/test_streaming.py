@@ -0,0 +1,96 @@
+import datetime
+import os
+import tempfile
+
+from dateutil.tz import tzlocal
+from hdmf.data_utils import DataChunkIterator
+from pynwb import NWBHDF5IO, NWBFile
+from pynwb.testing import TestCase
+
+from ndx_genotype import (GenotypeSubject, GenotypesTable, AllelesTable, alleles_table_from_iterators,
+                          genotypes_table_from_iterators, read_genotypes_summary)
+
+
+class TestTablesFromIterators(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'streamed.nwb')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, genotypes_table, **kwargs):
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=genotypes_table)
+        with NWBHDF5IO(self.path, mode='w') as io:
+            io.write(nwbfile, **kwargs)
+
+    def test_roundtrip(self):
+        symbols = ['wt', 'Ai14', 'Pvalb-IRES-Cre', 'Rorb-IRES2-Cre', 'Chrna2-Cre']
+        recombinase = [[], [], ['Cre'], ['Cre'], ['Cre', 'Flp']]
+        loci = ['Pvalb', 'ROSA26', 'Rorb', 'Chrna2', 'Pvalb', 'ROSA26', 'Rorb']
+        allele1 = [2, 1, 3, 4, 0, 1, 3]
+        allele2 = [0, 0, 0, 0, 0, 1, 3]
+        alleles_table = alleles_table_from_iterators(symbol=iter(symbols), recombinase=(r for r in recombinase),
+                                                     rows_per_chunk=2)
+        gt = genotypes_table_from_iterators(locus=DataChunkIterator(data=iter(loci), buffer_size=3),
+                                            allele1=(a for a in allele1), allele2=allele2, allele3=allele2,
+                                            alleles_table=alleles_table, rows_per_chunk=2, process='PCR')
+        self.write(gt, exhaust_dci=False)
+
+        expected = GenotypesTable(process='PCR')
+        expected.add_alleles(symbol=symbols, recombinase=recombinase)
+        expected.add_genotypes(locus=loci, allele1=allele1, allele2=allele2, allele3=allele2)
+        with NWBHDF5IO(self.path, mode='r') as io:
+            read_gt = io.read().subject.genotypes_table
+            self.assertEqual(read_gt.process, 'PCR')
+            self.assertEqual(read_gt.id.data[:].tolist(), list(range(7)))
+            self.assertEqual(read_gt['locus'].data[:].tolist(), loci)
+            for name in ('allele1', 'allele2', 'allele3'):
+                self.assertEqual(read_gt[name].data[:].tolist(), expected[name].data)
+                self.assertIs(read_gt[name].table, read_gt.alleles_table)
+            self.assertEqual(read_gt.alleles_table['symbol'].data[:].tolist(), symbols)
+            self.assertEqual([r.tolist() for r in read_gt.alleles_table['recombinase'][:]], recombinase)
+            self.assertEqual(read_gt.alleles_table['recombinase_index'].data[:].tolist(), [0, 0, 1, 2, 4])
+        # the summary of a table written from iterators is not known before it is written
+        self.assertIsNone(read_genotypes_summary(self.path))
+
+    def test_in_memory_alleles_table(self):
+        alleles_table = AllelesTable()
+        alleles_table.add_alleles(symbol=['wt', 'Ai14'])
+        n = 1000
+        streamed = genotypes_table_from_iterators(locus=('locus%d' % i for i in range(n)),
+                                                  allele1=(i % 2 for i in range(n)), allele2=(0 for i in range(n)),
+                                                  alleles_table=alleles_table, rows_per_chunk=64)
+        self.write(streamed, exhaust_dci=False)
+        with NWBHDF5IO(self.path, mode='r') as io:
+            read_gt = io.read().subject.genotypes_table
+            self.assertEqual(len(read_gt), n)
+            self.assertEqual(read_gt['locus'].data[n - 1], 'locus999')
+            self.assertEqual(read_gt['allele1'].data[-2:].tolist(), [0, 1])
+
+    def test_bad_values(self):
+        alleles_table = AllelesTable()
+        alleles_table.add_alleles(symbol=['wt', 'Ai14'])
+        msg = "'allele1' indices must be between 0 and 1."
+        with self.assertRaisesWith(ValueError, msg):
+            gt = genotypes_table_from_iterators(locus=['Pvalb'], allele1=[2], allele2=[0],
+                                                alleles_table=alleles_table)
+            self.write(gt, exhaust_dci=False)
+        msg = "Columns ['allele2'] have fewer rows than columns ['locus', 'allele1']."
+        with self.assertRaisesWith(ValueError, msg):
+            gt = genotypes_table_from_iterators(locus=['Pvalb', 'Rorb'], allele1=[1, 1], allele2=[0],
+                                                alleles_table=alleles_table)
+            self.write(gt, exhaust_dci=False)
+
+    def test_exhaust_dci(self):
+        alleles_table = AllelesTable()
+        alleles_table.add_alleles(symbol=['wt', 'Ai14'])
+        gt = genotypes_table_from_iterators(locus=['Pvalb'] * 10, allele1=[1] * 10, allele2=[0] * 10,
+                                            alleles_table=alleles_table, rows_per_chunk=2)
+        msg = ("The columns of a table built from iterators must be written together. Write the file with "
+               "NWBHDF5IO.write(..., exhaust_dci=False).")
+        with self.assertRaisesWith(ValueError, msg):
+            self.write(gt)
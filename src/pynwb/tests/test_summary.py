@@ -0,0 +1,126 @@
+import datetime
+import os
+import tempfile
+
+import h5py
+from dateutil.tz import tzlocal
+from pynwb import NWBHDF5IO, NWBFile, H5DataIO
+from pynwb.testing import TestCase
+
+from ndx_genotype import (GenotypeSubject, GenotypesTable, GenotypesSummary, read_genotypes_summary,
+                          genotypes_may_match)
+
+
+class TestGenotypesSummary(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable()
+        self.gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre'])
+        self.gt.add_genotypes(locus=['ROSA26', 'Pvalb'], allele1=[1, 2], allele2=[0, 0])
+
+    def test_from_table(self):
+        summary = GenotypesSummary.from_table(self.gt)
+        self.assertEqual(summary.num_rows, 2)
+        self.assertEqual(summary.num_alleles, 3)
+        self.assertEqual(summary.bloom_filter.nbytes, 8)
+        self.assertEqual(summary.content_hash, self.gt.diff(self.gt).base_hash)
+        self.assertTrue(summary.might_contain_locus('Pvalb'))
+        self.assertTrue(summary.might_contain_allele('Ai14'))
+        # loci and allele symbols are distinct items
+        self.assertFalse(summary.might_contain_locus('Ai14'))
+        self.assertFalse(summary.might_contain_allele('Pvalb'))
+        self.assertFalse(summary.might_contain_locus('Sst'))
+        self.assertEqual(repr(GenotypesSummary.from_attributes(summary.to_attributes())), repr(summary))
+
+    def test_may_match(self):
+        summary = GenotypesSummary.from_table(self.gt)
+        self.assertTrue(summary.may_match())
+        self.assertTrue(summary.may_match(loci=['Sst', 'Pvalb']))
+        self.assertTrue(summary.may_match(loci=['Pvalb'], alleles=['Ai14']))
+        self.assertFalse(summary.may_match(loci=['Pvalb'], alleles=['Sst-IRES-Cre']))
+        self.assertFalse(summary.may_match(loci=['Sst'], alleles=['Ai14']))
+        self.assertFalse(GenotypesSummary.from_table(GenotypesTable()).may_match())
+
+    def test_no_false_negatives(self):
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt'] + ['allele%d' % i for i in range(500)])
+        gt.add_genotypes(locus=['locus%d' % i for i in range(500)], allele1=list(range(1, 501)),
+                         allele2=[0] * 500)
+        summary = GenotypesSummary.from_table(gt)
+        self.assertEqual(summary.bloom_filter.nbytes, 2048)
+        self.assertTrue(all(summary.might_contain_locus('locus%d' % i) for i in range(500)))
+        self.assertTrue(all(summary.might_contain_allele('allele%d' % i) for i in range(500)))
+        false_positives = sum(summary.might_contain_locus('other%d' % i) for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestReadGenotypesSummary(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'summary.nwb')
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Ai14', 'Pvalb-IRES-Cre'])
+        gt.add_genotypes(locus=['ROSA26', 'Pvalb'], allele1=[1, 2], allele2=[0, 0])
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=gt)
+        with NWBHDF5IO(self.path, mode='w') as io:
+            io.write(nwbfile)
+        self.summary = GenotypesSummary.from_table(gt)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read(self):
+        summary = read_genotypes_summary(self.path)
+        self.assertEqual(summary.num_rows, 2)
+        self.assertEqual(summary.num_alleles, 3)
+        self.assertEqual(summary.content_hash, self.summary.content_hash)
+        self.assertEqual(summary.bloom_filter.tolist(), self.summary.bloom_filter.tolist())
+        self.assertEqual(summary.bloom_num_hashes, self.summary.bloom_num_hashes)
+        # the table reads as before
+        with NWBHDF5IO(self.path, mode='r') as io:
+            self.assertEqual(io.read().subject.genotypes_table['locus'].data[:].tolist(), ['ROSA26', 'Pvalb'])
+
+    def test_may_match(self):
+        self.assertTrue(genotypes_may_match(self.path, loci=['Pvalb'], alleles=['Pvalb-IRES-Cre']))
+        self.assertFalse(genotypes_may_match(self.path, loci=['Sst']))
+        path = os.path.join(self.tmpdir.name, 'no_subject.nwb')
+        with NWBHDF5IO(path, mode='w') as io:
+            io.write(NWBFile(session_description='description', identifier='id',
+                             session_start_time=datetime.datetime.now(tzlocal())))
+        self.assertIsNone(read_genotypes_summary(path))
+        self.assertFalse(genotypes_may_match(path, loci=['Pvalb']))
+
+    def test_no_summary(self):
+        # files written without a summary may match any query
+        with h5py.File(self.path, 'a') as f:
+            del f['/general/subject/genotypes_table'].attrs['summary_bloom_filter']
+        self.assertIsNone(read_genotypes_summary(self.path))
+        self.assertTrue(genotypes_may_match(self.path, loci=['Sst']))
+
+    def test_changed_in_place(self):
+        # the summary is recomputed when a changeset is applied to the table in the file
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Ai14'])
+        gt.add_genotypes(locus=['ROSA26'], allele1=[1], allele2=[0])
+        for table in (gt, gt.alleles_table):
+            for column in [table.id] + list(table.columns):
+                column.transform(lambda data: H5DataIO(data, maxshape=(None, )))
+        nwbfile = NWBFile(session_description='description', identifier='id',
+                          session_start_time=datetime.datetime.now(tzlocal()))
+        nwbfile.subject = GenotypeSubject(subject_id='3', genotypes_table=gt)
+        with NWBHDF5IO(self.path, mode='w') as io:
+            io.write(nwbfile)
+        self.assertFalse(genotypes_may_match(self.path, loci=['Sst']))
+        new = GenotypesTable()
+        new.add_alleles(symbol=['wt', 'Ai14', 'Sst-IRES-Cre'])
+        new.add_genotypes(locus=['ROSA26', 'Sst'], allele1=[1, 2], allele2=[0, 0])
+        with NWBHDF5IO(self.path, mode='a') as io:
+            table = io.read().subject.genotypes_table
+            table.diff(new).apply(table)
+        self.assertTrue(genotypes_may_match(self.path, loci=['Sst'], alleles=['Sst-IRES-Cre']))
+        summary = read_genotypes_summary(self.path)
+        self.assertEqual((summary.num_rows, summary.num_alleles), (2, 3))
+        self.assertEqual(summary.content_hash, GenotypesSummary.from_table(new).content_hash)
@@ -0,0 +1,101 @@
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypesTable, AllelesTable, SymbolIndex, normalize_symbol
+
+
+class TestSymbolIndex(TestCase):
+
+    def setUp(self):
+        self.index = SymbolIndex()
+        self.index.extend(['wt', 'Pvalb-IRES-Cre', 'Ai14(RCL-tdT)', 'Sst-IRES-Cre', '-'])
+
+    def test_normalize_symbol(self):
+        self.assertEqual(normalize_symbol('Pvalb-IRES-cre'), 'pvalbirescre')
+        self.assertEqual(normalize_symbol(' PVALB_IRES Cre '), 'pvalbirescre')
+        self.assertEqual(normalize_symbol('Ai14 (RCL-tdT)'), 'ai14rcltdt')
+        self.assertEqual(normalize_symbol('Ｐｖａｌｂ'), 'pvalb')  # full-width letters
+        self.assertEqual(normalize_symbol('+'), '+')
+        self.assertEqual(normalize_symbol(' - '), '-')
+
+    def test_get(self):
+        self.assertEqual(self.index.get('pvalb ires cre'), 1)
+        self.assertEqual(self.index.get('Ai14(rcl-TDT)'), 2)
+        self.assertEqual(self.index.get('-'), 4)
+        self.assertIsNone(self.index.get('Vip-IRES-Cre'))
+        self.assertEqual(len(self.index), 5)
+
+    def test_ambiguous(self):
+        self.index.extend(['pvalb-ires-cre'])
+        with self.assertWarnsWith(UserWarning, "Allele symbol 'PVALB-IRES-CRE' matches multiple alleles "
+                                               "['Pvalb-IRES-Cre', 'pvalb-ires-cre'] after normalization. "
+                                               "Using the first match."):
+            self.assertEqual(self.index.get('PVALB-IRES-CRE'), 1)
+
+    def test_synonyms(self):
+        self.index.add_synonym('Gt(ROSA)26Sor<tm14(CAG-tdTomato)Hze>', 'Ai14(RCL-tdT)')
+        self.index.add_synonym('PVALB-IRES-CRE', 'Sst-IRES-Cre')  # ignored, matches a symbol
+        self.assertEqual(self.index.get('gt(rosa)26sor<tm14(cag-tdtomato)hze>'), 2)
+        self.assertEqual(self.index.get('Pvalb-IRES-Cre'), 1)
+        with self.assertRaisesWith(ValueError, "Synonym 'Gt(ROSA)26Sor<tm14(CAG-tdTomato)Hze>' is already a synonym "
+                                               "of 'Ai14(RCL-tdT)'."):
+            self.index.add_synonym('Gt(ROSA)26Sor<tm14(CAG-tdTomato)Hze>', 'wt')
+
+    def test_suggest(self):
+        self.assertEqual(self.index.suggest('Pvlab-IRES-Cre'), ['Pvalb-IRES-Cre', 'Sst-IRES-Cre'])
+        self.assertEqual(self.index.suggest('Pvlab-IRES-Cre', limit=1), ['Pvalb-IRES-Cre'])
+        self.assertEqual(self.index.suggest('Ai41(RCL-tdT)'), ['Ai14(RCL-tdT)'])
+        self.assertEqual(self.index.suggest('Vipr2'), [])
+        self.assertEqual(SymbolIndex().suggest('wt'), [])
+
+
+class TestAllelesTableSymbols(TestCase):
+
+    def setUp(self):
+        self.gt = GenotypesTable()
+        self.gt.add_alleles(symbol=['wt', 'Pvalb-IRES-Cre', 'Ai14(RCL-tdT)'])
+
+    def test_get_allele_index(self):
+        at = self.gt.alleles_table
+        self.assertIsNone(at.get_allele_index('Pvalb-IRES-cre'))
+        self.assertEqual(at.get_allele_index('Pvalb-IRES-cre', match='normalized'), 1)
+        # alleles added after the normalized index was built are added to it
+        at.add_allele(symbol='Sst-IRES-Cre')
+        self.assertEqual(self.gt.get_allele_index('sst_ires_cre', match='normalized'), 3)
+        with self.assertRaisesRegex(ValueError, "forbidden value for 'match'"):
+            at.get_allele_index('wt', match='fuzzy')
+
+    def test_add_allele_synonyms(self):
+        self.gt.add_allele_synonyms({'Pvalb-cre': 'Pvalb-IRES-Cre'})
+        self.assertIsNone(self.gt.get_allele_index('Pvalb-cre'))
+        self.assertEqual(self.gt.get_allele_index('PVALB cre', match='normalized'), 1)
+        with self.assertRaisesWith(ValueError, "Allele symbols ['Vip-IRES-Cre'] not found in alleles table."):
+            self.gt.add_allele_synonyms({'Vip-cre': 'Vip-IRES-Cre'})
+
+    def test_resolve_alleles(self):
+        at = AllelesTable()
+        at.add_alleles(symbol=['wt', 'Pvalb-IRES-Cre', 'Ai14(RCL-tdT)'])
+        indices, near_misses = at.resolve_alleles(['wt', 'pvalb-ires-cre', 'Pvlab-IRES-Cre', 'wt', 'Vipr2'],
+                                                  match='normalized')
+        self.assertEqual(indices, [0, 1, None, 0, None])
+        self.assertEqual(near_misses, {'Pvlab-IRES-Cre': ['Pvalb-IRES-Cre'], 'Vipr2': []})
+        indices, near_misses = at.resolve_alleles(['pvalb-ires-cre'])
+        self.assertEqual((indices, near_misses), ([None], {'pvalb-ires-cre': ['Pvalb-IRES-Cre']}))
+
+    def test_add_genotypes(self):
+        self.gt.add_genotypes(locus=['Pvalb', 'ROSA26'], allele1=['pvalb-ires-CRE', 'Ai14 (RCL-tdT)'],
+                              allele2=['WT', 0], match='normalized')
+        self.assertEqual(self.gt['allele1'].data, [1, 2])
+        self.assertEqual(self.gt['allele2'].data, [0, 0])
+        msg = ("'allele1' symbols ['Pvlab-IRES-Cre', 'Vipr2'] not found in alleles table. Please first add the "
+               "alleles using GenotypesTable.add_alleles(). Closest symbols: 'Pvlab-IRES-Cre' -> ['Pvalb-IRES-Cre'].")
+        with self.assertRaisesWith(ValueError, msg):
+            self.gt.add_genotypes(locus=['Pvalb', 'Vip', 'Pvalb'], allele2=['wt', 'wt', 'wt'], match='normalized',
+                                  allele1=['Pvlab-IRES-Cre', 'Vipr2', 'Pvalb-IRES-Cre'])
+
+    def test_add_genotype(self):
+        self.gt.add_genotype(locus='Pvalb', allele1='pvalb-ires-cre', allele2='wt', match='normalized')
+        self.assertEqual(self.gt['allele1'].data, [1])
+        msg = ("'allele2' symbol 'Pvalb-IRES-cre' not found in alleles table. Please first add the allele using "
+               "GenotypeTable.add_allele(). Closest symbols: 'Pvalb-IRES-cre' -> ['Pvalb-IRES-Cre'].")
+        with self.assertRaisesWith(ValueError, msg):
+            self.gt.add_genotype(locus='Pvalb', allele1='wt', allele2='Pvalb-IRES-cre')
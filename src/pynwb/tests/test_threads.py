@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from pynwb.testing import TestCase
+
+from ndx_genotype import GenotypeSubject, GenotypesTable
+
+
+NUM_THREADS = 8
+
+
+class TestConcurrentConstruction(TestCase):
+
+    def run_threads(self, func):
+        barrier = threading.Barrier(NUM_THREADS)
+
+        def run(thread):
+            barrier.wait()
+            return func(thread)
+
+        with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+            return list(executor.map(run, range(NUM_THREADS)))
+
+    def test_add_allele(self):
+        gt = GenotypesTable()
+
+        def add(thread):
+            indices = dict()
+            for i in range(200):
+                symbol = 'A%d-%d' % (thread, i)
+                indices[symbol] = gt.add_allele(symbol=symbol)
+                if i % 50 == 0:
+                    indices.update(zip(['B%d-%d' % (thread, i), 'C%d-%d' % (thread, i)],
+                                       gt.add_alleles(symbol=['B%d-%d' % (thread, i), 'C%d-%d' % (thread, i)])))
+            return indices
+
+        indices = dict()
+        for result in self.run_threads(add):
+            indices.update(result)
+        self.assertEqual(len(gt.alleles_table), NUM_THREADS * 208)
+        self.assertEqual(list(gt.alleles_table.id.data), list(range(NUM_THREADS * 208)))
+        # each thread got the index of its allele
+        for symbol, index in indices.items():
+            self.assertEqual(gt.alleles_table['symbol'][index], symbol)
+
+    def test_add_duplicate_allele(self):
+        gt = GenotypesTable()
+
+        def add(thread):
+            try:
+                return gt.add_allele(symbol='wt')
+            except ValueError:
+                return None
+
+        self.assertEqual(sorted(self.run_threads(add), key=lambda i: i is None), [0] + [None] * (NUM_THREADS - 1))
+        self.assertEqual(len(gt.alleles_table), 1)
+
+    def test_add_genotype(self):
+        subject = GenotypeSubject(subject_id='3')
+        gt = GenotypesTable()
+        gt.add_alleles(symbol=['wt', 'Ai14'])
+
+        def add(thread):
+            for i in range(100):
+                subject.add_genotype(locus='L%d-%d' % (thread, i), allele1=1, allele2=0)
+                gt.add_genotypes(locus=['L%d-%d' % (thread, i)], allele1=[1], allele2=[0])
+            return subject.genotypes_table
+
+        tables = self.run_threads(add)
+        # the genotypes table of the subject was created once
+        self.assertTrue(all(table is tables[0] for table in tables))
+        for table in (subject.genotypes_table, gt):
+            self.assertEqual(len(table), NUM_THREADS * 100)
+            self.assertEqual(sorted(table.id.data), list(range(NUM_THREADS * 100)))
+            self.assertEqual(len(set(table['locus'].data)), NUM_THREADS * 100)
@@ -0,0 +1,21 @@
+from ndx_genotype import GenotypeSubject, GenotypesTable
+
+
+def make_genotypes_table(genotypes, symbols=()):
+    """
+    Create a GenotypesTable from a list of (locus, allele1, allele2) tuples of allele symbols. The alleles table has
+    the given symbols, in order, followed by the other symbols of the genotypes in the order they first appear.
+    """
+    gt = GenotypesTable()
+    symbols = list(dict.fromkeys(list(symbols) + [s for genotype in genotypes for s in genotype[1:]]))
+    if symbols:
+        gt.add_alleles(symbol=symbols)
+    if genotypes:
+        loci, allele1, allele2 = zip(*genotypes)
+        gt.add_genotypes(locus=list(loci), allele1=list(allele1), allele2=list(allele2))
+    return gt
+
+
+def make_subject(subject_id, genotypes, symbols=()):
+    """Create a GenotypeSubject with a GenotypesTable made by make_genotypes_table."""
+    return GenotypeSubject(subject_id=subject_id, genotypes_table=make_genotypes_table(genotypes, symbols))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import os.path
+import textwrap
+
+from ruamel.yaml import YAML
+
+
+# data types whose columns are generated, in the order they are written to the module
+TABLE_TYPES = ('AllelesTable', 'GenotypesTable')
+
+# Python types accepted for the values of a column with the given spec dtype, or None for region columns
+PYTHON_TYPES = {
+    'text': 'str',
+    'int': 'int',
+    None: 'int',
+}
+
+# columns that are specified as VectorData, so that they can be written as a DynamicTableRegion or an AlleleIndex,
+# and are DynamicTableRegions of the alleles table in memory
+REGION_COLUMNS = {
+    'GenotypesTable': ('allele1', 'allele2', 'allele3'),
+}
+
+HEADER = '''"""
+Column definitions for the tables of this extension.
+
+This file is generated from spec/ndx-genotype.extensions.yaml by src/spec/create_columns_module.py. Do not edit it
+by hand; edit src/spec/create_extension_spec.py and regenerate the spec and this file instead.
+"""
+'''
+
+
+def format_str(value, indent):
+    """Format a string literal, split over multiple lines to fit within 120 characters if needed."""
+    width = 118 - indent
+    if len(repr(value)) <= width:
+        return repr(value)
+    lines = textwrap.wrap(value, width - 3, drop_whitespace=False)
+    sep = '\n' + ' ' * (indent + 1)
+    return '(' + sep.join(repr(line) for line in lines) + ')'
+
+
+def get_columns(type_spec):
+    """Return the column definitions of a DynamicTable type spec, in the format of DynamicTable.__columns__."""
+    regions = REGION_COLUMNS.get(type_spec['neurodata_type_def'], ())
+    datasets = type_spec.get('datasets', [])
+    names = [d['name'] for d in datasets]
+    columns = list()
+    for dataset in datasets:
+        name = dataset['name']
+        if dataset.get('neurodata_type_inc') in (None, 'VectorIndex'):
+            # e.g., the rows of the sparse storage of a ragged column
+            continue
+        column = {
+            'name': name,
+            'description': dataset['doc'],
+            'required': dataset.get('quantity', 1) not in ('?', '*'),
+        }
+        if name + '_index' in names:
+            column['index'] = True
+        if dataset['neurodata_type_inc'] == 'DynamicTableRegion' or name in regions:
+            column['table'] = True
+        column['dtype'] = PYTHON_TYPES[dataset.get('dtype')]
+        columns.append(column)
+    return columns
+
+
+def main():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    with open(os.path.join(root, 'spec', 'ndx-genotype.extensions.yaml')) as f:
+        spec = YAML(typ='safe').load(f)
+    type_specs = {g['neurodata_type_def']: g for g in spec['groups']}
+
+    lines = [HEADER]
+    dtypes = dict()
+    for data_type in TABLE_TYPES:
+        columns = get_columns(type_specs[data_type])
+        lines.append('')
+        lines.append('%s_COLUMNS = (' % data_type.upper().replace('TABLE', '_TABLE'))
+        for column in columns:
+            dtypes.setdefault(data_type, dict())[column['name']] = column.pop('dtype')
+            lines.append('    {')
+            for key, value in column.items():
+                value = format_str(value, 8 + len(repr(key)) + 2) if isinstance(value, str) else repr(value)
+                lines.append('        %r: %s,' % (key, value))
+            lines.append('    },')
+        lines.append(')')
+    lines.append('')
+    lines.append('# Python types of the values of each column, used to validate rows added in bulk')
+    lines.append('COLUMN_DTYPES = {')
+    for data_type, columns in dtypes.items():
+        lines.append('    %r: {' % data_type)
+        for name, dtype in columns.items():
+            lines.append('        %r: %s,' % (name, dtype))
+        lines.append('    },')
+    lines.append('}')
+
+    output = os.path.join(root, 'src', 'pynwb', 'ndx_genotype', '_spec_columns.py')
+    with open(output, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+if __name__ == "__main__":
+    # usage: python create_columns_module.py
+    main()
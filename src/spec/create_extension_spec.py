@@ -5,6 +5,40 @@ import os.path
 from pynwb.spec import NWBNamespaceBuilder, export_spec, NWBGroupSpec, NWBAttributeSpec, NWBDatasetSpec
 
 
+def sparse_column_specs(column):
+    """Return the specs of the datasets of the given ragged column of the AllelesTable when it is stored sparsely."""
+    stored = ("If present, the column is stored sparsely: it is not listed in colnames, and '%s' and '%s_index' are "
+              "absent." % (column, column))
+    return [
+        NWBDatasetSpec(
+            name='%s_sparse_values' % column,
+            doc="Sparse storage of the ragged '%s' column. The values of all rows, in row order. %s" % (column, stored),
+            dtype='text',
+            dims=['num_values'],
+            shape=[None],
+            quantity='?',
+        ),
+        NWBDatasetSpec(
+            name='%s_sparse_index' % column,
+            doc=("Sparse storage of the ragged '%s' column. For each row that has values, the end offset of its "
+                 "values in '%s_sparse_values'." % (column, column)),
+            dtype='uint8',
+            dims=['num_rows_with_values'],
+            shape=[None],
+            quantity='?',
+        ),
+        NWBDatasetSpec(
+            name='%s_rows' % column,
+            doc=("Sparse storage of the ragged '%s' column. The indices of the rows that have values, in increasing "
+                 "order. The other rows have no values." % column),
+            dtype='uint8',
+            dims=['num_rows_with_values'],
+            shape=[None],
+            quantity='?',
+        ),
+    ]
+
+
 def main():
     # these arguments were auto-generated from your cookiecutter inputs
     ns_builder = NWBNamespaceBuilder(
@@ -51,6 +85,52 @@ def main():
                 dtype='text',
                 required=False,
             ),
+            NWBAttributeSpec(
+                name='sorted_by',
+                doc=("The column that the rows of the table are sorted by. The only allowed value is 'locus', which "
+                     "means that the rows are sorted by locus in code point order, so that the rows with a given "
+                     "locus are contiguous and can be found by binary search."),
+                dtype='text',
+                required=False,
+            ),
+            NWBAttributeSpec(
+                name='summary_num_rows',
+                doc=('Summary of the table for skipping files without reading column data. The number of rows of '
+                     'the table when it was written.'),
+                dtype='int',
+                required=False,
+            ),
+            NWBAttributeSpec(
+                name='summary_num_alleles',
+                doc=('Summary of the table for skipping files without reading column data. The number of distinct '
+                     'allele symbols of the alleles table when it was written.'),
+                dtype='int',
+                required=False,
+            ),
+            NWBAttributeSpec(
+                name='summary_hash',
+                doc=('Summary of the table for skipping files without reading column data. A hash of the locus and '
+                     'allele symbols of the rows of the table when it was written.'),
+                dtype='text',
+                required=False,
+            ),
+            NWBAttributeSpec(
+                name='summary_bloom_filter',
+                doc=('Summary of the table for skipping files without reading column data. A Bloom filter of the '
+                     'loci of the table and the allele symbols of the alleles table, as packed bits in '
+                     'little-endian bit order.'),
+                dtype='uint8',
+                dims=['num_bytes'],
+                shape=[None],
+                required=False,
+            ),
+            NWBAttributeSpec(
+                name='summary_bloom_num_hashes',
+                doc=('Summary of the table for skipping files without reading column data. The number of hash '
+                     'functions of the Bloom filter.'),
+                dtype='int',
+                required=False,
+            ),
         ],
         datasets=[
             NWBDatasetSpec(
@@ -61,18 +141,25 @@ def main():
             ),
             NWBDatasetSpec(
                 name='allele1',
-                neurodata_type_inc='DynamicTableRegion',
-                doc=('...'),
+                neurodata_type_inc='VectorData',
+                doc=('The first allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                     'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another file.'),
+                dtype='int',
             ),
             NWBDatasetSpec(
                 name='allele2',
-                neurodata_type_inc='DynamicTableRegion',
-                doc=('...'),
+                neurodata_type_inc='VectorData',
+                doc=('The second allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                     'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another file.'),
+                dtype='int',
             ),
             NWBDatasetSpec(
                 name='allele3',
-                neurodata_type_inc='DynamicTableRegion',
-                doc=('...'),
+                neurodata_type_inc='VectorData',
+                doc=('The third allele, as an index into the alleles table. A DynamicTableRegion of the alleles '
+                     'table, or an AlleleIndex if the alleles table is a link to an allele catalogue in another file.'),
+                dtype='int',
+                quantity='?',
             ),
         ],
         groups=[
@@ -98,31 +185,80 @@ def main():
             NWBDatasetSpec(
                 name='recombinase',
                 neurodata_type_inc='VectorData',
-                doc='...',
+                doc=('An enzyme that mediates a recombination exchange reaction between two DNA templates, each '
+                     'containing a specific recognition site.'),
                 dtype='text',
                 quantity='?',
             ),
+            NWBDatasetSpec(
+                name='recombinase_index',
+                neurodata_type_inc='VectorIndex',
+                doc="Index for the ragged 'recombinase' column.",
+                quantity='?',
+            ),
+            *sparse_column_specs('recombinase'),
             NWBDatasetSpec(
                 name='reporter',
                 neurodata_type_inc='VectorData',
-                doc='...',
+                doc=('Sequence that forms all or part of the protein product encoded by a transgenic locus or '
+                     'modified endogenous locus and that encodes an enzyme whose activity can be used to detect the '
+                     'presence of that protein product.'),
                 dtype='text',
                 quantity='?',
             ),
+            NWBDatasetSpec(
+                name='reporter_index',
+                neurodata_type_inc='VectorIndex',
+                doc="Index for the ragged 'reporter' column.",
+                quantity='?',
+            ),
+            *sparse_column_specs('reporter'),
             NWBDatasetSpec(
                 name='promoter',
                 neurodata_type_inc='VectorData',
-                doc='...',
+                doc='A DNA sequence at which RNA polymerase binds and initiates transcription.',
                 dtype='text',
                 quantity='?',
             ),
+            NWBDatasetSpec(
+                name='promoter_index',
+                neurodata_type_inc='VectorIndex',
+                doc="Index for the ragged 'promoter' column.",
+                quantity='?',
+            ),
+            *sparse_column_specs('promoter'),
             NWBDatasetSpec(
                 name='recombinase_recognition_site',
                 neurodata_type_inc='VectorData',
-                doc='...',
+                doc=('Site where recombination occurs mediated by a specific recombinase, leading to '
+                     'integration, deletion or inversion of a DNA fragment.'),
                 dtype='text',
                 quantity='?',
             ),
+            NWBDatasetSpec(
+                name='recombinase_recognition_site_index',
+                neurodata_type_inc='VectorIndex',
+                doc="Index for the ragged 'recombinase_recognition_site' column.",
+                quantity='?',
+            ),
+            *sparse_column_specs('recombinase_recognition_site'),
+        ],
+    )
+
+    allele_index_spec = NWBDatasetSpec(
+        neurodata_type_def='AlleleIndex',
+        neurodata_type_inc='VectorData',
+        doc=('A column of indices into the AllelesTable of an allele catalogue file, i.e., an HDF5 file with an '
+             'AllelesTable at /alleles_table that the genotypes tables of many NWB files link to. It is used instead '
+             'of a DynamicTableRegion, whose object reference cannot refer to an object in another file.'),
+        dtype='int',
+        attributes=[
+            NWBAttributeSpec(
+                name='catalogue',
+                doc=('The path of the allele catalogue file, relative to the directory of this file. The values are '
+                     'indices into the rows of its /alleles_table.'),
+                dtype='text',
+            ),
         ],
     )
 
@@ -142,7 +278,7 @@ def main():
         ],
     )
 
-    new_data_types = [genotypes_table_spec, alleles_table_spec, genotype_subject_spec]
+    new_data_types = [genotypes_table_spec, alleles_table_spec, allele_index_spec, genotype_subject_spec]
 
     # export the spec to yaml files in the spec folder
     output_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'spec'))